@@ -0,0 +1,145 @@
+"""
+Batch analysis: throughput per worker count under the process-wide LLM and backend limits, and resuming an interrupted batch
+
+The LLM is simulated with a fixed latency per call and the monitoring
+backends with fault-injecting sources, so no credentials are needed.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_analysis --incidents 200 --llm-latency 0.2 --llm-limit 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+
+# Keep benchmark incidents out of the configured store
+os.environ["STORE_BACKEND"] = "memory"
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.output_parsers import StrOutputParser
+
+from core.batch import BatchAnalysisRunner
+from core.manager import IncidentManager
+from memory.index import IncidentQuery
+from monitoring.resilience import backend_limit
+from monitoring.sources import FaultInjectingSource, SourceRegistry
+from monitoring.system import MonitoringSystem
+from nlp.azure.client import llm_limit
+from nlp.prompts.code import code_analysis_prompt
+from nlp.prompts.perf import performance_analysis_prompt
+from nlp.prompts.root_cause import root_cause_prompt
+
+
+class SlowChatModel(BaseChatModel):
+    """Chat model answering after a fixed delay and reporting token usage"""
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _result(self) -> ChatResult:
+        message = AIMessage(
+            content="Likely cause: connection pool exhaustion",
+            usage_metadata={"input_tokens": 900, "output_tokens": 150, "total_tokens": 1050},
+            response_metadata={"model_name": "slow-fake"},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+def build_manager(args) -> IncidentManager:
+    manager = IncidentManager()
+    processor = manager.analyzer.nlp_processor
+    llm = SlowChatModel(latency=args.llm_latency)
+    processor.root_cause_chain = root_cause_prompt | llm | StrOutputParser()
+    processor.code_analysis_chain = code_analysis_prompt | llm | StrOutputParser()
+    processor.performance_analysis_chain = performance_analysis_prompt | llm | StrOutputParser()
+
+    registry = SourceRegistry()
+    for name in ("logs-backend", "metrics-backend"):
+        registry.register_source(FaultInjectingSource(name, records=20, latency=args.backend_latency, jitter=0.0, seed=0))
+    processor.monitoring_system = MonitoringSystem(registry)
+    return manager
+
+
+def make_record(index: int, application: str):
+    created = datetime(2024, 1, 1) + timedelta(minutes=index)
+    return {
+        "id": f"{application}-{index:05d}",
+        "title": "checkout latency spike",
+        "description": "p99 latency on checkout above SLO",
+        "severity": "high",
+        "status": "resolved",
+        "context": {"application": application, "environment": "prod", "component": "checkout"},
+        "logs": [], "metrics": [], "code_references": [],
+        "created_at": created.isoformat() + "Z",
+        "updated_at": (created + timedelta(hours=2)).isoformat() + "Z",
+    }
+
+
+async def interrupted_run(runner: BatchAnalysisRunner, query: IncidentQuery, after: float):
+    task = asyncio.create_task(runner.run(query, "interrupted"))
+    await asyncio.sleep(after)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return await runner.run(batch_id="interrupted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--backend-latency", type=float, default=0.05)
+    parser.add_argument("--llm-limit", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    # The analysis stores monitoring rows as dicts; pydantic warns when serializing them
+    warnings.simplefilter("ignore")
+    llm_limit.limit = args.llm_limit
+
+    manager = build_manager(args)
+    ideal = args.llm_limit / (3 * args.llm_latency)
+    print(f"{args.incidents} incidents per batch, 3 LLM calls of {args.llm_latency * 1000:.0f} ms each, "
+          f"LLM limit {args.llm_limit} (at most {ideal:.1f} incidents/s), backend limit {backend_limit.limit}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in args.workers:
+            application = f"bench-{workers}"
+            asyncio.run(manager.create_incidents([make_record(i, application) for i in range(args.incidents)]))
+            llm_limit.peak, llm_limit.wait_seconds = 0, 0.0
+            runner = BatchAnalysisRunner(manager, concurrency=workers, checkpoint_dir=directory)
+            summary = asyncio.run(runner.run(IncidentQuery(application=[application])))
+            llm = summary.limits["llm"]
+            print(f"{workers:>3} workers: {summary.rate:6.1f} incidents/s, {summary.failed} failed, "
+                  f"peak LLM calls in flight {llm['peak']}, LLM queue wait {llm['wait_seconds']:.0f}s total, "
+                  f"{summary.tokens.total_tokens:,} tokens")
+
+        application = "bench-resume"
+        asyncio.run(manager.create_incidents([make_record(i, application) for i in range(args.incidents)]))
+        runner = BatchAnalysisRunner(manager, concurrency=max(args.workers), checkpoint_dir=directory)
+        halfway = args.incidents / ideal / 2
+        summary = asyncio.run(interrupted_run(runner, IncidentQuery(application=[application]), halfway))
+        print(f"interrupted after {halfway:.1f}s and resumed: {summary.resumed} incidents kept from the first run, "
+              f"{summary.succeeded} analyzed on resume, {summary.total} in the batch")
+
+
+if __name__ == "__main__":
+    main()
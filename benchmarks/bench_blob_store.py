@@ -0,0 +1,80 @@
+"""
+Header reads and appends on large incidents: inline logs vs out-of-line record blobs
+
+Run from the repository root:
+    python -m benchmarks.bench_blob_store --logs 1000 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_context_store import make_state
+from memory.serialization import StateSerializer
+from memory.sqlite_store import SQLiteContextStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    serializer = StateSerializer()
+    print(f"{'logs':>8} {'inline header':>14} {'blob header':>12} {'full load':>10} "
+          f"{'inline save':>12} {'blob save':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "incidents.db")
+        for index, logs in enumerate(args.logs):
+            state = make_state(index, logs)
+            inline = serializer.dumps(state)
+
+            store = SQLiteContextStore(path, flush_interval=3600)
+            store.save_context(state)
+            store.close()
+
+            # Before: rendering the header decoded every log
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                loaded = serializer.loads(inline)
+                loaded.incident.title, len(loaded.incident.logs)
+            inline_header = (time.perf_counter() - started) / args.repeat
+
+            # After: a cold read only decodes the state and the chunk references
+            store = SQLiteContextStore(path, flush_interval=3600, blob_cache_records=0)
+            row = store._conn.execute("SELECT state FROM incident_states WHERE incident_id = ?",
+                                      (state.incident_id,)).fetchone()[0]
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                loaded = store._decode(row)
+                loaded.incident.title, len(loaded.incident.logs)
+            blob_header = (time.perf_counter() - started) / args.repeat
+
+            started = time.perf_counter()
+            loaded.incident.logs.load()
+            full_load = time.perf_counter() - started
+
+            # Appending one log: re-encode everything vs write the last chunk
+            new_log = {"timestamp": datetime.utcnow(), "level": "info", "message": "appended"}
+            started = time.perf_counter()
+            state.incident.logs.append(new_log)
+            inline_bytes = len(serializer.dumps(state))
+            inline_save = time.perf_counter() - started
+
+            loaded.incident.logs.append(new_log)
+            store.save_context(loaded)
+            writes = store.blobs.writes
+            started = time.perf_counter()
+            store.flush()
+            blob_save = time.perf_counter() - started
+            store.close()
+
+            print(f"{logs:>8} {inline_header * 1e3:>11.2f} ms {blob_header * 1e3:>9.2f} ms "
+                  f"{full_load * 1e3:>7.1f} ms {inline_save * 1e3:>9.2f} ms {blob_save * 1e3:>7.2f} ms")
+            print(f"{'':>8} inline snapshot {inline_bytes / 1024:.0f} KB; "
+                  f"append wrote {store.blobs.writes - writes} new chunk(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Bulk incident import: NDJSON backfill throughput per store backend, against creating incidents one at a time
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_import --incidents 100000 --logs 3 --metrics 2
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import core.manager
+from contracts.incident import Incident
+from core.importer import IncidentImporter
+from core.manager import IncidentManager
+from memory.sqlite_store import SQLiteContextStore
+from memory.store import ContextStore
+from memory.wal_store import WALContextStore
+
+COMPONENTS = ["api", "db", "cache", "queue", "frontend", "checkout", "payments", "search"]
+
+
+def make_record(rng: random.Random, index: int, logs: int, metrics: int):
+    created = datetime(2024, 1, 1) + timedelta(minutes=index)
+    component = rng.choice(COMPONENTS)
+    return {
+        "id": f"TRK-{index:07d}",
+        "title": f"{component} latency spike",
+        "description": f"p99 latency on {component} above SLO in region {rng.randrange(20)}",
+        "severity": rng.choice(["low", "medium", "high", "critical"]),
+        "status": rng.choice(["resolved", "closed"]),
+        "context": {"application": "shop", "environment": "prod", "component": component},
+        "logs": [
+            {"timestamp": (created + timedelta(seconds=j)).isoformat() + "Z", "level": "error",
+             "message": f"Request to {component} timed out after {rng.randrange(1000, 5000)}ms"}
+            for j in range(logs)
+        ],
+        "metrics": [
+            {"name": "latency_p99", "value": rng.random() * 1000, "type": "gauge",
+             "timestamp": (created + timedelta(seconds=j * 15)).isoformat() + "Z"}
+            for j in range(metrics)
+        ],
+        "code_references": [],
+        "created_at": created.isoformat() + "Z",
+        "updated_at": (created + timedelta(hours=2)).isoformat() + "Z",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=100_000)
+    parser.add_argument("--logs", type=int, default=3)
+    parser.add_argument("--metrics", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=2000, help="Incidents created one at a time for comparison")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "incidents.ndjson")
+        with open(path, "w") as f:
+            for index in range(args.incidents):
+                f.write(json.dumps(make_record(rng, index, args.logs, args.metrics)) + "\n")
+        print(f"{args.incidents} incidents with {args.logs} logs and {args.metrics} metrics each, "
+              f"{os.path.getsize(path) / 2**20:.0f} MB of NDJSON")
+
+        manager = IncidentManager()
+        stores = {
+            "memory": lambda: ContextStore(max_entries=1 << 30, max_bytes=1 << 62),
+            "sqlite": lambda: SQLiteContextStore(os.path.join(directory, "incidents.db"), batch_size=1000),
+            "wal": lambda: WALContextStore(os.path.join(directory, "wal"), max_entries=1 << 30, max_bytes=1 << 62),
+        }
+        # IDs after the file's, so the import does not skip them as already stored
+        records = [make_record(rng, args.incidents + index, args.logs, args.metrics) for index in range(args.single)]
+        for name, create in stores.items():
+            # The manager saves to the module's store; point it at the backend under test
+            store = core.manager.context_store = create()
+
+            started = time.perf_counter()
+            for record in records:
+                asyncio.run(manager.create_incident(Incident(**record), prefetch=False))
+            single = args.single / (time.perf_counter() - started)
+
+            # As the command line importer runs it, in a process that only imports
+            importer = IncidentImporter(manager, batch_size=args.batch_size, freeze_imported=True)
+            report = asyncio.run(importer.import_file(path))
+            gc.unfreeze()
+            print(f"{name:>6}: bulk import {report.rate:,.0f}/s ({report.imported} in {report.seconds:.1f}s), "
+                  f"one at a time {single:,.0f}/s, {len(store.index)} indexed")
+            if hasattr(store, "close"):
+                store.close()
+
+
+if __name__ == "__main__":
+    main()
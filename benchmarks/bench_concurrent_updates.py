@@ -0,0 +1,72 @@
+"""
+Concurrent writers on the context store: lost updates and throughput
+
+Each writer increments a counter on an incident. The "copy and save" writers
+work like the processor and analyzer used to: change their own copy of the
+state and save it over whatever is stored. The compare-and-set writers go
+through `update_context`.
+
+Run from the repository root:
+    python -m benchmarks.bench_concurrent_updates --threads 8 --updates 500
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.bench_context_store import make_state
+from memory.store import ContextStore
+
+
+def copy_and_save(store, incident_id):
+    state = store.get_context(incident_id).model_copy()
+    state.confidence_scores = dict(state.confidence_scores)
+    time.sleep(0)  # yield, as an awaiting coroutine would
+    state.confidence_scores["count"] = state.confidence_scores.get("count", 0) + 1
+    store.save_context(state)
+
+
+def compare_and_set(store, incident_id):
+    def increment(state):
+        time.sleep(0)
+        state.confidence_scores["count"] = state.confidence_scores.get("count", 0) + 1
+    store.update_context(incident_id, increment, max_retries=1000)
+
+
+def run(writer, threads, updates, incidents):
+    store = ContextStore()
+    for index in range(incidents):
+        store.save_context(make_state(index, 10))
+    ids = store.list_incidents()
+
+    def work(worker):
+        incident_id = ids[worker % len(ids)]
+        for _ in range(updates):
+            writer(store, incident_id)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    counted = sum(store.get_context(incident_id).confidence_scores.get("count", 0) for incident_id in ids)
+    return threads * updates - counted, threads * updates / elapsed, store.conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'writer':>16} {'incidents':>10} {'lost':>6} {'updates/s':>10} {'conflicts':>10}")
+    for name, writer in (("copy and save", copy_and_save), ("compare-and-set", compare_and_set)):
+        for incidents in (1, args.threads):
+            lost, rate, conflicts = run(writer, args.threads, args.updates, incidents)
+            print(f"{name:>16} {incidents:>10} {lost:>6} {rate:>10.0f} {conflicts:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Context store save throughput and get latency: in-memory dict vs SQLite (WAL)
+
+Run from the repository root:
+    python -m benchmarks.bench_context_store --incidents 2000 --logs 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from contracts.base import IncidentStatus, Severity
+from contracts.incident import EnvironmentContext, Incident, IncidentState
+from memory.sqlite_store import SQLiteContextStore
+from memory.store import ContextStore
+
+
+def make_state(index: int, logs: int) -> IncidentState:
+    now = datetime.utcnow()
+    incident = Incident(
+        id=f"bench-{index:06d}",
+        title=f"Incident {index}",
+        description="Connection pool exhaustion on api",
+        severity=Severity.HIGH,
+        status=IncidentStatus.NEW,
+        context=EnvironmentContext(application="api", environment="prod", component="db"),
+        logs=[],
+        code_references=[],
+        metrics=[],
+        created_at=now,
+        updated_at=now,
+    )
+    incident.logs = [
+        {
+            "timestamp": now + timedelta(seconds=i),
+            "level": "error",
+            "message": f"Connection pool reached {90 + i % 10}% capacity",
+            "attributes": {"service": "api", "trace_id": f"{index:06x}{i:04x}"},
+        }
+        for i in range(logs)
+    ]
+    state = IncidentState(incident_id=incident.id, incident=incident, last_updated=now)
+    state.add_conversation_message(role="system", content="Incident created", analysis_type="system")
+    return state
+
+
+def time_gets(store, ids):
+    samples = []
+    for incident_id in ids:
+        started = time.perf_counter()
+        store.get_context(incident_id)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6, sorted(samples)[int(len(samples) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    states = [make_state(i, args.logs) for i in range(args.incidents)]
+    ids = [state.incident_id for state in states]
+
+    memory_store = ContextStore()
+    started = time.perf_counter()
+    for state in states:
+        memory_store.save_context(state)
+    memory_saves = args.incidents / (time.perf_counter() - started)
+    memory_get = time_gets(memory_store, ids)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "incidents.db")
+        sqlite_store = SQLiteContextStore(path, batch_size=args.batch_size, flush_interval=3600)
+        started = time.perf_counter()
+        for state in states:
+            sqlite_store.save_context(state)
+        sqlite_store.flush()
+        sqlite_saves = args.incidents / (time.perf_counter() - started)
+        warm_get = time_gets(sqlite_store, ids)
+        sqlite_store.close()
+
+        # A fresh process after a restart: every first read goes to disk
+        reopened = SQLiteContextStore(path, flush_interval=3600)
+        cold_get = time_gets(reopened, ids)
+        reopened.close()
+        size = os.path.getsize(path)
+
+    print(f"incidents x logs:        {args.incidents} x {args.logs}")
+    print(f"dict saves/sec:          {memory_saves:,.0f}")
+    print(f"sqlite saves/sec:        {sqlite_saves:,.0f} (batch {args.batch_size}, incl. final flush)")
+    print(f"dict get p50/p99:        {memory_get[0]:.2f} / {memory_get[1]:.2f} us")
+    print(f"sqlite cached p50/p99:   {warm_get[0]:.2f} / {warm_get[1]:.2f} us")
+    print(f"sqlite cold p50/p99:     {cold_get[0]:.1f} / {cold_get[1]:.1f} us")
+    print(f"database size:           {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Cost of recording one history event: full snapshot save vs journal append
+
+Run from the repository root:
+    python -m benchmarks.bench_event_journal --logs 100 1000 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_context_store import make_state
+from memory.sqlite_store import SQLiteContextStore, encode_state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'logs':>8} {'snapshot/event':>16} {'journal/event':>15} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteContextStore(os.path.join(directory, "incidents.db"), flush_interval=3600)
+        for index, logs in enumerate(args.logs):
+            state = make_state(index, logs)
+            store.save_context(state)
+            store.flush()
+
+            # Before: every event rewrote the whole state (serialize + write)
+            started = time.perf_counter()
+            for i in range(args.events):
+                state.add_conversation_message(role="system", content=f"event {i}")
+                store.save_context(state)
+                store.flush()
+            snapshot = (time.perf_counter() - started) / args.events
+
+            # After: the event is appended on its own
+            started = time.perf_counter()
+            for i in range(args.events):
+                state.add_conversation_message(role="system", content=f"event {i}")
+            journal = (time.perf_counter() - started) / args.events
+
+            print(f"{logs:>8} {snapshot * 1e3:>13.3f} ms {journal * 1e3:>12.3f} ms {snapshot / journal:>7.0f}x")
+            print(f"{'':>8} snapshot size {len(encode_state(state)) / 1024:.0f} KB, "
+                  f"{state.event_count('conversation')} events journaled")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Fan-out latency across many fault-injecting monitoring sources
+
+Run from the repository root:
+    python -m benchmarks.bench_fanout --sources 12 --failure-rate 0.1 --hang-rate 0.05
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from contracts.base import DateTimeRange
+from contracts.monitoring import MonitoringQuery
+from monitoring.sources import FaultInjectingSource, SourceRegistry
+from monitoring.system import MonitoringSystem
+
+
+def build_registry(args) -> SourceRegistry:
+    registry = SourceRegistry()
+    for i in range(args.sources):
+        registry.register_source(
+            FaultInjectingSource(
+                name=f"dummy-{i}",
+                records=args.records,
+                latency=args.latency,
+                jitter=args.latency,
+                failure_rate=args.failure_rate,
+                hang_rate=args.hang_rate,
+                seed=i
+            ),
+            budget_seconds=args.budget
+        )
+    return registry
+
+
+async def run(system: MonitoringSystem, query: MonitoringQuery, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        data = await system.query_monitoring_data(query)
+        timings.append(time.perf_counter() - started)
+    return timings, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sources", type=int, default=12)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--hang-rate", type=float, default=0.05)
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    query = MonitoringQuery(
+        metric_name="*",
+        log_level="error",
+        date_range=DateTimeRange(start=now - timedelta(hours=1), end=now)
+    )
+    system = MonitoringSystem(registry=build_registry(args))
+    timings, data = asyncio.run(run(system, query, args.rounds))
+
+    serial_estimate = 2 * args.sources * (args.latency * 1.5)
+    timings.sort()
+    print(f"sources:              {args.sources} (logs + metrics each)")
+    print(f"median fan-out:       {timings[len(timings) // 2] * 1000:.1f} ms")
+    print(f"max fan-out:          {timings[-1] * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    print(f"serial mean estimate: {serial_estimate * 1000:.1f} ms")
+    print(f"last round:           {len(data.logs)} logs, {len(data.metrics)} metrics")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Incident listing and counts through the secondary indexes at 100k incidents
+
+Run from the repository root:
+    python -m benchmarks.bench_incident_index --incidents 100000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from contracts.base import IncidentStatus, Severity
+from memory.index import IncidentIndex, IncidentQuery
+
+APPLICATIONS = [f"app-{i:02d}" for i in range(40)]
+ENVIRONMENTS = ["prod", "staging", "dev"]
+COMPONENTS = ["api", "db", "cache", "queue", "frontend"]
+
+
+def make_summaries(count: int, now: datetime):
+    rng = random.Random(0)
+    for i in range(count):
+        created = now - timedelta(minutes=rng.randrange(90 * 24 * 60))
+        yield f"inc-{i:06d}", {
+            "status": rng.choice(list(IncidentStatus)).value,
+            "severity": rng.choice(list(Severity)).value,
+            "application": rng.choice(APPLICATIONS),
+            "environment": rng.choice(ENVIRONMENTS),
+            "component": rng.choice(COMPONENTS),
+            "created_at": (created - datetime(1970, 1, 1)).total_seconds(),
+            "updated_at": (created + timedelta(minutes=rng.randrange(600)) - datetime(1970, 1, 1)).total_seconds(),
+        }
+
+
+def measure(operation, repeat: int = 200):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=100_000)
+    args = parser.parse_args()
+
+    now = datetime(2024, 6, 1)
+    summaries = list(make_summaries(args.incidents, now))
+    index = IncidentIndex()
+    started = time.perf_counter()
+    index.bulk_load(summaries)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for incident_id, summary in summaries[:1000]:
+        index.add(incident_id, dict(summary, status=IncidentStatus.RESOLVED.value))
+    update = (time.perf_counter() - started) / 1000
+
+    week = now - timedelta(days=7)
+    queries = {
+        "latest 50": IncidentQuery(),
+        "open critical app-07 this week": IncidentQuery(
+            status=[IncidentStatus.NEW, IncidentStatus.IN_PROGRESS],
+            severity=[Severity.CRITICAL],
+            application=["app-07"],
+            created_from=week,
+        ),
+        "open, page 10": IncidentQuery(status=[IncidentStatus.NEW, IncidentStatus.IN_PROGRESS], offset=500),
+        "prod updated this week": IncidentQuery(environment=["prod"], updated_from=week, sort_by="updated_at"),
+    }
+
+    def scan(query: IncidentQuery):
+        # What listing cost before: filter every summary, then sort
+        statuses = {status.value for status in query.status or []}
+        matches = [
+            (summary["created_at"], incident_id) for incident_id, summary in summaries
+            if (not statuses or summary["status"] in statuses)
+        ]
+        matches.sort(reverse=True)
+        return matches[query.offset:query.offset + query.limit]
+
+    print(f"incidents:               {args.incidents:,} (bulk load {build:.2f}s, update {update * 1e6:.0f} us)")
+    for name, query in queries.items():
+        page = index.query(query)
+        print(f"{name + ':':<33}{measure(lambda: index.query(query)):.3f} ms ({page.total} matches)")
+    print(f"{'counts by severity (open):':<33}"
+          f"{measure(lambda: index.count_by('severity', IncidentQuery(status=[IncidentStatus.NEW]))):.3f} ms")
+    print(f"{'counts by status:':<33}{measure(lambda: index.count_by('status')):.3f} ms")
+    print(f"{'full scan (open, page 10):':<33}{measure(lambda: scan(queries['open, page 10']), repeat=5):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
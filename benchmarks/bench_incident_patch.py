@@ -0,0 +1,81 @@
+"""
+Incident patching: a status or severity change on incidents of growing size, patched in place against rebuilding the incident
+
+Run from the repository root:
+    python -m benchmarks.bench_incident_patch --logs 100 10000 100000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+# Keep benchmark incidents out of the configured store
+os.environ["STORE_BACKEND"] = "memory"
+
+from contracts.incident import Incident
+from core.manager import IncidentManager
+from memory.store import context_store
+
+
+def make_record(incident_id: str, logs: int):
+    created = datetime(2024, 1, 1)
+    return {
+        "id": incident_id,
+        "title": "checkout latency spike",
+        "description": "p99 latency on checkout above SLO",
+        "severity": "high",
+        "status": "new",
+        "context": {"application": "shop", "environment": "prod", "component": "checkout"},
+        "logs": [
+            {"timestamp": (created + timedelta(seconds=j)).isoformat() + "Z", "level": "error",
+             "message": f"Request to checkout timed out after {1000 + j % 4000}ms"}
+            for j in range(logs)
+        ],
+        "metrics": [], "code_references": [],
+        "created_at": created.isoformat() + "Z",
+        "updated_at": created.isoformat() + "Z",
+    }
+
+
+def rebuild(incident_id: str, updates):
+    """What update_incident did before: dump the incident, merge and validate it again"""
+    def apply_updates(state):
+        data = state.incident.model_dump()
+        data.update(updates)
+        state.incident = Incident(**data)
+        state.incident.updated_at = datetime.utcnow()
+    context_store.update_context(incident_id, apply_updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    manager = IncidentManager()
+    for logs in args.logs:
+        incident_id = f"PATCH-{logs}"
+        asyncio.run(manager.create_incidents([make_record(incident_id, logs)]))
+        severities = ["critical", "high"]
+
+        started = time.perf_counter()
+        for i in range(args.repeat):
+            asyncio.run(manager.patch_incident(incident_id, {"severity": severities[i % 2]}))
+        patched = (time.perf_counter() - started) / args.repeat
+
+        repeat = max(1, min(args.repeat, 2_000_000 // max(logs, 1)))
+        started = time.perf_counter()
+        for i in range(repeat):
+            rebuild(incident_id, {"severity": severities[i % 2]})
+        rebuilt = (time.perf_counter() - started) / repeat
+
+        print(f"{logs:>7} logs: patch {patched * 1000:7.2f} ms, rebuild {rebuilt * 1000:8.2f} ms "
+              f"({rebuilt / patched:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Full-text incident search at 100k incidents: ranked, prefix and filtered queries, and re-indexing on save
+
+Run from the repository root:
+    python -m benchmarks.bench_incident_search --incidents 100000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+
+from benchmarks.bench_context_store import make_state
+from contracts.base import IncidentStatus, Severity
+from memory.search import SearchIndex, SearchQuery
+
+COMPONENTS = ["api", "db", "cache", "queue", "frontend", "checkout", "payments", "search"]
+SYMPTOMS = ["latency spike", "connection pool exhaustion", "memory leak", "deadlock", "timeout storm",
+            "disk pressure", "certificate expiry", "replication lag", "cache stampede", "error burst"]
+LOG_TEMPLATES = [
+    "Connection pool reached {n}% capacity",
+    "Request to {c} timed out after {n}ms",
+    "GC pause of {n}ms on worker {n}",
+    "Deadlock detected on table {c}_{n}",
+    "Retrying {c} call, attempt {n}",
+    "Replica {n} is {n}s behind primary",
+]
+CAUSES = ["misconfigured autoscaling", "slow query on orders", "noisy neighbour", "expired credentials",
+          "bad deploy of the {c} service", "thundering herd after cache flush"]
+
+
+def make_document(rng: random.Random, index: int):
+    component = rng.choice(COMPONENTS)
+    symptom = rng.choice(SYMPTOMS)
+    words = [f"w{rng.randrange(50_000)}" for _ in range(8)]
+    return {
+        "title": f"{component} {symptom} {words[0]}",
+        "description": f"{symptom} reported on {component} in region {rng.randrange(20)}: {' '.join(words[1:])}",
+        "component": component,
+        "templates": sorted({
+            template.format(n="<num>", c=rng.choice(COMPONENTS)) for template in rng.sample(LOG_TEMPLATES, 3)
+        }),
+        "analysis": f"Probable cause: {rng.choice(CAUSES).format(c=component)}. Incident {index}.",
+    }
+
+
+def measure(operation, repeat: int = 200):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples) * 1e3, samples[int(len(samples) * 0.99)] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    statuses = [status.value for status in IncidentStatus]
+    severities = [severity.value for severity in Severity]
+    index = SearchIndex()
+    started = time.perf_counter()
+    for i in range(args.incidents):
+        index.add(f"inc-{i:06d}", make_document(rng, i), rng.choice(statuses), rng.choice(severities))
+    build = time.perf_counter() - started
+    print(f"indexed {args.incidents} incidents in {build:.1f}s; {index.get_stats()}")
+
+    # Incremental update on save: a live-tailed incident gains one log per save
+    state = make_state(0, 1000)
+    index.add_state(state)
+    saves = []
+    for i in range(1000):
+        state.incident.logs.append({"timestamp": datetime.utcnow(), "level": "error",
+                                    "message": f"Request to api timed out after {i}ms"})
+        started = time.perf_counter()
+        index.add_state(state)
+        saves.append(time.perf_counter() - started)
+    print(f"re-index on save (incident with {len(state.incident.logs)} logs): "
+          f"{statistics.median(saves) * 1e6:.0f} us median")
+
+    open_statuses = [IncidentStatus.NEW, IncidentStatus.IN_PROGRESS]
+    queries = {
+        "rare term": SearchQuery(text="w4242"),
+        "common term": SearchQuery(text="latency"),
+        "two common terms": SearchQuery(text="connection pool"),
+        "log template words": SearchQuery(text="deadlock detected orders"),
+        "analysis text": SearchQuery(text="autoscaling"),
+        "prefix (as you type)": SearchQuery(text="check", prefix=True),
+        "short prefix w1*": SearchQuery(text="w1*"),
+        "open critical payments": SearchQuery(
+            text="payments", status=open_statuses, severity=[Severity.CRITICAL]
+        ),
+        "common term, page 10": SearchQuery(text="timeout", offset=180),
+    }
+    print(f"{'query':<26} {'matches':>8} {'p50':>8} {'p99':>8}")
+    for name, query in queries.items():
+        total = index.search(query).total
+        p50, p99 = measure(lambda: index.search(query))
+        print(f"{name:<26} {total:>8} {p50:>5.2f} ms {p99:>5.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
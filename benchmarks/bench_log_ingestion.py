@@ -0,0 +1,57 @@
+"""
+Log ingestion throughput: validated parse_logs vs bulk parse_logs_bulk
+
+Run from the repository root:
+    python -m benchmarks.bench_log_ingestion --records 100000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from monitoring.coralogix.client import mock_logs_json, parse_logs, parse_logs_bulk
+
+
+def build_payload(records: int) -> str:
+    """Build a JSON array of synthetic logs based on the mock Coralogix data"""
+    templates = json.loads(mock_logs_json)
+    start = datetime(2024, 2, 23, 13, 0, 0)
+    logs = []
+    for i in range(records):
+        log = dict(templates[i % len(templates)])
+        log['timestamp'] = (start + timedelta(milliseconds=i * 10)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        logs.append(log)
+    return json.dumps(logs)
+
+
+def measure(parser, payload: str, records: int, repeat: int) -> float:
+    """Return the best records/sec over several runs"""
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parsed = parser(payload)
+        elapsed = time.perf_counter() - started
+        assert len(parsed) == records
+        best = max(best, records / elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = build_payload(args.records)
+
+    validated = measure(parse_logs, payload, args.records, args.repeat)
+    bulk = measure(parse_logs_bulk, payload, args.records, args.repeat)
+
+    print(f"records:          {args.records}")
+    print(f"parse_logs:       {validated:,.0f} records/sec")
+    print(f"parse_logs_bulk:  {bulk:,.0f} records/sec")
+    print(f"speedup:          {bulk / validated:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
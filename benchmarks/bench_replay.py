@@ -0,0 +1,51 @@
+"""
+Replay a recorded incident analysis offline and report its latency
+
+Record first by running the app with REPLAY_MODE=record, then:
+    python -m benchmarks.bench_replay <incident_id> --speed 0 --repeat 5
+
+--speed 1 reproduces the recorded backend and LLM latencies, higher values
+accelerate them and 0 serves responses immediately to isolate local cost.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from contracts.incident import Incident
+from nlp.processor import NLPProcessor
+from utils.replay import ReplayMode, use_cassette
+
+
+async def replay_once(processor: NLPProcessor, incident_id: str, speed: float) -> float:
+    with use_cassette(incident_id, mode=ReplayMode.REPLAY, speed=speed) as cassette:
+        incident = Incident.model_validate(cassette.metadata["incident"])
+        started = time.perf_counter()
+        results = await processor.analyze_incident(incident)
+        elapsed = time.perf_counter() - started
+    if "error" in results:
+        raise RuntimeError(f"Replay failed: {results['error']}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("incident_id")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = NLPProcessor()
+    timings = [
+        asyncio.run(replay_once(processor, args.incident_id, args.speed))
+        for _ in range(args.repeat)
+    ]
+
+    print(f"incident:  {args.incident_id}")
+    print(f"speed:     {args.speed}")
+    print(f"median:    {statistics.median(timings) * 1000:.1f} ms")
+    print(f"min / max: {min(timings) * 1000:.1f} / {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Retention tiering: bytes reclaimed per tier and compaction time for resolved and closed incidents
+
+Run from the repository root:
+    python -m benchmarks.bench_retention_tiering --incidents 1000 --logs 2000 --metrics 2000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_context_store import make_state
+from contracts.base import IncidentStatus
+from contracts.monitoring import Metric, MetricType
+from memory.sqlite_store import SQLiteContextStore
+from memory.store import ContextStore
+from memory.tiering import ColdStorage, RetentionTiering
+
+STATUSES = [IncidentStatus.RESOLVED, IncidentStatus.CLOSED, IncidentStatus.IN_PROGRESS]
+
+
+def fill(store, incidents, logs, metrics):
+    old = datetime.utcnow() - timedelta(days=7)
+    for index in range(incidents):
+        state = make_state(index, logs)
+        state.incident.metrics = [
+            Metric(name=f"latency_{j % 4}", value=float(j % 250), timestamp=old + timedelta(seconds=j * 15),
+                   type=MetricType.GAUGE, labels={"host": f"web-{j % 3}"})
+            for j in range(metrics)
+        ]
+        state.incident.status = STATUSES[index % len(STATUSES)]
+        state.incident.updated_at = old
+        state.analysis_results = {"root_cause": "Connection pool too small for peak traffic"}
+        store.save_context(state)
+    store.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=1000)
+    parser.add_argument("--logs", type=int, default=2000)
+    parser.add_argument("--metrics", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        stores = {
+            "memory": ContextStore(max_entries=1 << 30, max_bytes=1 << 62),
+            "sqlite": SQLiteContextStore(os.path.join(directory, "incidents.db")),
+        }
+        for name, store in stores.items():
+            fill(store, args.incidents, args.logs, args.metrics)
+            cache_before = store.get_stats()["cache"]["bytes"]
+            job = RetentionTiering(
+                store,
+                ColdStorage(os.path.join(directory, f"cold-{name}")),
+                ages={IncidentStatus.RESOLVED: 3 * 86400, IncidentStatus.CLOSED: 86400}
+            )
+            started = time.perf_counter()
+            compacted = job.run_once()
+            seconds = time.perf_counter() - started
+            stats = job.get_stats()
+            print(f"{name}: compacted {compacted} of {args.incidents} incidents in {seconds:.1f}s "
+                  f"({seconds / max(1, compacted) * 1e3:.1f} ms each), cache {cache_before / 2**20:.0f} MB -> "
+                  f"{store.get_stats()['cache']['bytes'] / 2**20:.0f} MB, {stats['pruned_blobs']} blobs pruned")
+            for tier, totals in stats["tiers"].items():
+                print(f"  {tier:>8}: {totals['incidents']} incidents, {totals['logs']} logs, {totals['metrics']} metrics, "
+                      f"reclaimed {totals['bytes_reclaimed'] / 2**20:.1f} MB of {totals['bytes_before'] / 2**20:.1f} MB, "
+                      f"cold copies {totals['cold_bytes'] / 1024:.0f} KB")
+            if name == "sqlite":
+                store.close()
+                print(f"  database {os.path.getsize(store.path) / 2**20:.0f} MB after compaction")
+
+
+if __name__ == "__main__":
+    main()
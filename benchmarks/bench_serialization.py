@@ -0,0 +1,69 @@
+"""
+Incident state encode/decode time and size: pydantic JSON vs codec + compression envelopes
+
+Run from the repository root:
+    python -m benchmarks.bench_serialization --logs 1000 --metrics 1000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_context_store import make_state
+from contracts.incident import IncidentState
+from memory.serialization import CODECS, COMPRESSORS, StateSerializer
+
+
+def add_metrics(state: IncidentState, count: int) -> None:
+    now = datetime.utcnow()
+    state.incident.metrics = [
+        {
+            "name": f"http_request_duration_seconds_{i % 5}",
+            "value": 0.1 + (i % 37) / 100,
+            "timestamp": now + timedelta(seconds=15 * i),
+            "type": "gauge",
+            "labels": {"service": "api", "instance": f"api-{i % 3}"},
+        }
+        for i in range(count)
+    ]
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, default=1000)
+    parser.add_argument("--metrics", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    state = make_state(0, args.logs)
+    add_metrics(state, args.metrics)
+    print(f"incident with {args.logs} logs and {args.metrics} metrics\n")
+    print(f"{'encoding':>18} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+
+    payload, encode = timed(lambda: state.model_dump_json(warnings=False), args.repeat)
+    _, decode = timed(lambda: IncidentState.model_validate_json(payload), args.repeat)
+    baseline = len(payload)
+    print(f"{'model_dump_json':>18} {baseline:>10} {encode * 1e3:>10.2f} {decode * 1e3:>10.2f}")
+
+    for codec, (_, codec_available, _, _) in CODECS.items():
+        for compression, (_, compression_available, _, _) in COMPRESSORS.items():
+            if not (codec_available and compression_available):
+                continue
+            serializer = StateSerializer(codec, compression)
+            payload, encode = timed(lambda: serializer.dumps(state), args.repeat)
+            decoded, decode = timed(lambda: serializer.loads(payload), args.repeat)
+            assert decoded.incident.logs == state.incident.logs
+            assert decoded.incident.metrics == state.incident.metrics
+            name = f"{codec}+{compression}"
+            print(f"{name:>18} {len(payload):>10} {encode * 1e3:>10.2f} {decode * 1e3:>10.2f}"
+                  f"   {baseline / len(payload):.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
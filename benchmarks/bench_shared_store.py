@@ -0,0 +1,110 @@
+"""
+Several processes sharing one SQLite store: lost updates, write throughput and change propagation
+
+Each worker process opens its own SharedSQLiteContextStore on the same file
+and increments counters on a few shared incidents through `update_context`.
+A watcher process measures how long a save takes to become visible.
+
+Run from the repository root:
+    python -m benchmarks.bench_shared_store --processes 4 --updates 200
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.bench_context_store import make_state
+
+
+def open_store(path):
+    from memory.shared_store import SharedSQLiteContextStore
+    logging.disable(logging.INFO)
+    return SharedSQLiteContextStore(path, flush_interval=0.05)
+
+
+def increment(state):
+    state.confidence_scores["count"] = state.confidence_scores.get("count", 0) + 1
+
+
+def writer(path, incident_ids, updates, worker, results):
+    store = open_store(path)
+    started = time.perf_counter()
+    for i in range(updates):
+        store.update_context(incident_ids[(worker + i) % len(incident_ids)], increment, max_retries=1000)
+    results.put((time.perf_counter() - started, store.conflicts))
+    store.close()
+
+
+def watcher(path, incident_id, rounds, ready, results):
+    store = open_store(path)
+    ready.set()
+    delays = []
+    for _ in range(rounds):
+        version = store.get_context(incident_id).version
+        while True:
+            state = store.get_context(incident_id)
+            if state.version > version:
+                delays.append(time.time() - state.last_updated.timestamp())
+                break
+            time.sleep(0.001)
+    results.put(sorted(delays)[len(delays) // 2])
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--incidents", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "incidents.db")
+        store = open_store(path)
+        for index in range(args.incidents):
+            store.save_context(make_state(index, 100))
+        incident_ids = store.list_incidents()
+
+        # Fresh interpreters, as separate app replicas would be
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        workers = [
+            context.Process(target=writer, args=(path, incident_ids, args.updates, worker, results))
+            for worker in range(args.processes)
+        ]
+        for process in workers:
+            process.start()
+        outcomes = [results.get(timeout=600) for _ in workers]
+        for process in workers:
+            process.join()
+
+        store.sync()
+        total = int(sum(store.get_context(incident_id).confidence_scores.get("count", 0) for incident_id in incident_ids))
+        expected = args.processes * args.updates
+        print(f"{args.processes} processes x {args.updates} updates on {args.incidents} shared incidents")
+        # Timed inside the workers, leaving out interpreter start-up
+        busy = max(seconds for seconds, _ in outcomes)
+        print(f"  applied {total}/{expected} (lost {expected - total}), "
+              f"{expected / busy:.0f} updates/s, {sum(conflicts for _, conflicts in outcomes)} version conflicts")
+
+        # Propagation: the watcher polls its own store while this process saves
+        ready = context.Event()
+        process = context.Process(target=watcher, args=(path, incident_ids[0], 20, ready, results))
+        process.start()
+        ready.wait()
+        time.sleep(0.2)
+        for _ in range(20):
+            def touch(state):
+                state.last_updated = state.last_updated.utcnow()
+            store.update_context(incident_ids[0], touch)
+            time.sleep(0.05)
+        median = results.get(timeout=600)
+        process.join()
+        print(f"  median delay before another process sees a save: {median * 1e3:.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
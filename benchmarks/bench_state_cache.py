@@ -0,0 +1,53 @@
+"""
+Bounded state cache under incident churn: per-operation cost and footprint
+
+Run from the repository root:
+    python -m benchmarks.bench_state_cache --incidents 20000 --max-entries 1000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.bench_context_store import make_state
+from memory.cache import BoundedStateCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=20000)
+    parser.add_argument("--logs", type=int, default=20)
+    parser.add_argument("--max-entries", type=int, default=1000)
+    parser.add_argument("--max-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    cache = BoundedStateCache(args.max_entries, int(args.max_mb * 1024 * 1024), ttl_seconds=3600)
+    tracemalloc.start()
+
+    put_time = get_time = 0.0
+    peak_entries = 0
+    for i in range(args.incidents):
+        state = make_state(i, args.logs)
+        started = time.perf_counter()
+        cache.put(state.incident_id, state)
+        put_time += time.perf_counter() - started
+
+        # Re-read a recent incident, as the UI does on every rerun
+        started = time.perf_counter()
+        cache.get(f"bench-{max(0, i - 10):06d}")
+        get_time += time.perf_counter() - started
+        peak_entries = max(peak_entries, len(cache))
+
+    current, peak = tracemalloc.get_traced_memory()
+    stats = cache.get_stats()
+
+    print(f"incidents inserted:  {args.incidents} ({args.logs} logs each)")
+    print(f"put / get avg:       {put_time / args.incidents * 1e6:.1f} / {get_time / args.incidents * 1e6:.2f} us (under tracemalloc)")
+    print(f"entries (peak):      {stats['entries']} ({peak_entries}), limit {args.max_entries}")
+    print(f"estimated bytes:     {stats['bytes'] / 1e6:.1f} MB, limit {args.max_mb} MB")
+    print(f"traced memory:       {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)")
+    print(f"evictions:           {stats['evictions']}")
+    print(f"hits / misses:       {stats['hits']} / {stats['misses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Versioned incident history: storage per update, delta vs full copies, and rebuild/diff latency
+
+Each update appends a log, and every tenth one also rewrites the analysis
+results, as a live-tailed incident under analysis would.
+
+Run from the repository root:
+    python -m benchmarks.bench_state_history --logs 100 10000 --updates 2000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+
+from benchmarks.bench_context_store import make_state
+from memory.serialization import StateSerializer
+from memory.versions import StateHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--keyframe-interval", type=int, default=50)
+    args = parser.parse_args()
+
+    serializer = StateSerializer()
+    rng = random.Random(0)
+    for logs in args.logs:
+        history = StateHistory(serializer, keyframe_interval=args.keyframe_interval)
+        state = make_state(0, logs)
+        recording = []
+        full_copies = 0
+        for version in range(1, args.updates + 1):
+            state.version = version
+            state.last_updated = datetime.utcnow()
+            state.incident.logs.append({"timestamp": state.last_updated, "level": "warning",
+                                        "message": f"Retrying db call, attempt {version}"})
+            if version % 10 == 0:
+                state.analysis_results = {"root_cause": f"hypothesis {version}", "confidence": rng.random(),
+                                          "evidence": [f"log {version - i}" for i in range(5)]}
+            started = time.perf_counter()
+            history.record(state)
+            recording.append(time.perf_counter() - started)
+            if version % 100 == 0:
+                # Sampled: what storing a full copy of this version would take
+                full_copies += len(serializer.dumps(state)) * 100
+
+        stats = history.get_stats()
+        stored = stats["keyframe_bytes"] + stats["delta_bytes"]
+        versions = [rng.randrange(1, args.updates + 1) for _ in range(100)]
+        started = time.perf_counter()
+        for version in versions:
+            history.get(state.incident_id, version)
+        rebuild = (time.perf_counter() - started) / len(versions)
+        started = time.perf_counter()
+        for version in versions[:50]:
+            history.diff(state.incident_id, max(1, version - 20), version)
+        diff = (time.perf_counter() - started) / 50
+        keyframes = sum(entry.keyframe for entry in history.versions(state.incident_id))
+
+        print(f"{logs} starting logs, {args.updates} updates ({keyframes} keyframes)")
+        print(f"  stored {stored / 1024:.0f} KB ({stored / args.updates:.0f} B per update) "
+              f"vs full copies {full_copies / 1024:.0f} KB ({full_copies / args.updates:.0f} B per update): "
+              f"{full_copies / stored:.0f}x smaller")
+        print(f"  record on save: {statistics.median(recording) * 1e3:.2f} ms median, "
+              f"rebuild a version: {rebuild * 1e3:.1f} ms, diff 20 versions apart: {diff * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Trace index build and lookup cost at millions of logs
+
+Run from the repository root:
+    python -m benchmarks.bench_trace_index --logs 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from monitoring.trace_index import TraceIndex
+
+
+def make_logs(count: int, spans_per_trace: int):
+    start = datetime(2024, 2, 23, 13, 0, 0)
+    services = ["gateway", "api", "db", "cache"]
+    return [
+        {
+            "timestamp": start + timedelta(milliseconds=i * 5),
+            "level": "error" if i % 50 == 0 else "info",
+            "message": f"step {i % spans_per_trace}",
+            "attributes": {
+                "service": services[i % len(services)],
+                "trace_id": f"trace-{i // spans_per_trace:08x}",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    parser.add_argument("--spans-per-trace", type=int, default=8)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    logs = make_logs(args.logs, args.spans_per_trace)
+    traces = args.logs // args.spans_per_trace
+    rng = random.Random(0)
+    targets = [f"trace-{rng.randrange(traces):08x}" for _ in range(args.lookups)]
+
+    index = TraceIndex(chunk_seconds=300, bloom_capacity=100_000, bloom_error_rate=0.01)
+    started = time.perf_counter()
+    index.extend(logs)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for trace_id in targets:
+        index.breakdown(logs, trace_id)
+    indexed_lookup = (time.perf_counter() - started) / args.lookups
+
+    sample = targets[:20]
+    started = time.perf_counter()
+    for trace_id in sample:
+        [log for log in logs if log["attributes"]["trace_id"] == trace_id]
+    scan_lookup = (time.perf_counter() - started) / len(sample)
+
+    missing = [f"missing-{i}" for i in range(args.lookups)]
+    false_positives = sum(index.might_contain(trace_id) for trace_id in missing)
+
+    print(f"logs / traces:       {args.logs:,} / {traces:,}")
+    print(f"index build:         {build:.2f}s ({args.logs / build:,.0f} logs/s)")
+    print(f"breakdown (indexed): {indexed_lookup * 1e6:.1f} us")
+    print(f"lookup (full scan):  {scan_lookup * 1e3:.1f} ms")
+    print(f"bloom false pos.:    {false_positives}/{args.lookups} across {index.get_stats()['chunks']} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Write-ahead logged store: write throughput by sync mode, and recovery time with and without a snapshot
+
+Each change appends one log record to an incident and saves it, as live
+tailing does. Group commit is measured with many writer threads sharing each
+fsync; async mode with the same threads not waiting for the disk.
+
+Run from the repository root:
+    python -m benchmarks.bench_wal_store --changes 1000000 --threads 64
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.bench_context_store import make_state
+from memory.wal_store import WALContextStore
+
+
+def open_store(directory, sync):
+    # Snapshots are taken explicitly below
+    return WALContextStore(directory, sync=sync, snapshot_bytes=1 << 62, max_entries=1 << 30, max_bytes=1 << 62)
+
+
+def write(store, incidents, changes, threads):
+    ids = [store.get_context(f"bench-{index:06d}") for index in range(incidents)]
+
+    def worker(offset):
+        for i in range(offset, changes, threads):
+            state = ids[i % incidents]
+            with store.lock(state.incident_id):
+                state.incident.logs.append({"timestamp": datetime.utcnow(), "level": "info", "message": f"change {i}"})
+            store.save_context(state)
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    store.flush()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--changes", type=int, default=1_000_000)
+    parser.add_argument("--incidents", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=64)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    for sync in ("group", "async"):
+        with tempfile.TemporaryDirectory() as directory:
+            store = open_store(directory, sync)
+            for index in range(args.incidents):
+                store.save_context(make_state(index, 0))
+            seconds = write(store, args.incidents, args.changes, args.threads)
+            wal = store.get_stats()["wal"]
+            log_bytes = wal["bytes"]
+            print(f"{sync:>5}: {args.changes} changes from {args.threads} threads in {seconds:.1f}s "
+                  f"({args.changes / seconds:,.0f}/s), {wal['records_per_commit']:.0f} records per fsync, "
+                  f"log {log_bytes / 2**20:.0f} MB")
+            store.close()
+            if sync != "group":
+                continue
+
+            # Recovery from the log alone
+            store = open_store(directory, sync)
+            print(f"       recovery replaying {store.replayed} logged changes: {store.recovery_seconds:.2f}s")
+            store.snapshot()
+            print(f"       snapshot of {args.incidents} incidents: {store.last_snapshot_seconds:.2f}s")
+            write(store, args.incidents, args.changes // 100, args.threads)
+            store.close()
+
+            # Recovery from the snapshot plus a short tail
+            store = open_store(directory, sync)
+            total = sum(len(store.get_context(incident_id).incident.logs) for incident_id in store.list_incidents())
+            print(f"       recovery from snapshot + {store.replayed} logged changes: {store.recovery_seconds:.2f}s "
+                  f"({total} log records restored)")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
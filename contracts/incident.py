@@ -1,8 +1,9 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, PrivateAttr, TypeAdapter
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import threading
 
-from contracts.monitoring import Metric
+from contracts.monitoring import LiveTailState, Metric
 
 from .base import Severity, IncidentStatus
 
@@ -40,6 +41,11 @@ class EnvironmentContext(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Fields identifying an incident; patching them would make it a different incident
+_FIXED_FIELDS = frozenset({"id", "created_at"})
+# Validator per Incident field, built on first use
+_FIELD_ADAPTERS: Dict[str, TypeAdapter] = {}
+
 class Incident(BaseModel):
     id: str
     title: str
@@ -65,6 +71,58 @@ class Incident(BaseModel):
             data['updated_at'] = datetime.fromisoformat(data['updated_at'].replace('Z', '+00:00'))
         super().__init__(**data)
 
+    def load_records(self) -> "Incident":
+        """Load logs and metrics the store left in blob storage"""
+        for records in (self.logs, self.metrics):
+            load = getattr(records, "load", None)
+            if load is not None:
+                load()
+        return self
+
+    def model_dump(self, **kwargs):
+        # Serializers read list storage directly; lazily loaded records must be present
+        return super(Incident, self.load_records()).model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs):
+        return super(Incident, self.load_records()).model_dump_json(**kwargs)
+
+    @classmethod
+    def validate_fields(cls, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate new values for some fields, each on its own
+
+        Unlike rebuilding the incident, this leaves every other field, such
+        as thousands of logs, untouched.
+
+        Raises:
+            ValueError: Unknown or fixed field
+            ValidationError: Invalid value
+        """
+        values = {}
+        for name, value in changes.items():
+            adapter = _FIELD_ADAPTERS.get(name)
+            if adapter is None:
+                if name in _FIXED_FIELDS or name not in cls.model_fields:
+                    raise ValueError(f"Incident field {name} cannot be patched")
+                adapter = _FIELD_ADAPTERS[name] = TypeAdapter(cls.model_fields[name].annotation)
+            values[name] = adapter.validate_python(value)
+        return values
+
+    def apply_fields(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Set validated field values in place
+
+        Returns:
+            The previous value of each field that changed
+        """
+        previous = {}
+        for name, value in values.items():
+            current = getattr(self, name)
+            if current != value:
+                previous[name] = current
+                setattr(self, name, value)
+        return previous
+
     def add_log(self, level: str, message: str):
         """Add a new debug log entry"""
         log = DebugLog(
@@ -116,21 +174,161 @@ class PerformanceAnalysis(BaseModel):
                      key=lambda x: len(x),  # Simple example ordering
                      reverse=True)
 
+class CompactionInfo(BaseModel):
+    """
+    Left on an incident whose raw logs and metrics were moved to cold storage
+
+    The cold copy keeps log templates with counts and metric rollups; the
+    templates are also kept here so the incident stays searchable.
+    """
+    tier: str
+    compacted_at: datetime
+    log_templates: List[str] = []
+    log_count: int = 0
+    metric_count: int = 0
+    bytes_reclaimed: int = 0
+
 class IncidentState(BaseModel):
-    """Incident state and analysis information"""
+    """
+    Incident state and analysis information
+
+    Conversation history and analysis steps are append-only event streams.
+    Once a store attaches its journal, events are appended there instead of
+    being rewritten with every snapshot, and the history is read from the
+    journal on first access or a page at a time.
+    """
     incident_id: str
     incident: Incident
     analysis_results: Optional[Dict] = None
-    conversation_history: List[Dict] = []
-    analysis_steps: List[Dict] = []
     confidence_scores: Dict[str, float] = {}
+    live_tail: Optional[LiveTailState] = None
     last_updated: datetime = datetime.utcnow()
+    # Set by retention tiering once raw logs and metrics are in cold storage
+    compaction: Optional[CompactionInfo] = None
+    # Bumped by the store on every save; used for compare-and-set updates
+    version: int = 0
 
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
         from_attributes=True
     )
 
+    # Any object with append(incident_id, kind, event), read(...) and count(...)
+    _journal: Any = PrivateAttr(default=None)
+    # kind -> events loaded in this process; missing until first read
+    _events: Dict[str, List[Dict]] = PrivateAttr(default_factory=dict)
+    # kind -> events recorded before a journal was attached
+    _buffered: Dict[str, List[Dict]] = PrivateAttr(default_factory=dict)
+    # thread ident -> (kind, event) recorded during a change that is not saved yet
+    _held: Dict[int, List[Tuple[str, Dict]]] = PrivateAttr(default_factory=dict)
+
+    def __init__(
+        self,
+        conversation_history: Optional[List[Dict]] = None,
+        analysis_steps: Optional[List[Dict]] = None,
+        **data
+    ):
+        super().__init__(**data)
+        self.buffer_events("conversation", conversation_history or [])
+        self.buffer_events("analysis_step", analysis_steps or [])
+
+    def buffer_events(self, kind: str, events: List[Dict]) -> None:
+        """Record events that will be appended to the journal once one is attached"""
+        if not events:
+            return
+        if self._journal is not None:
+            for event in events:
+                self._append_event(kind, event)
+            return
+        self._buffered.setdefault(kind, []).extend(events)
+        self._stream(kind).extend(events)
+
+    def attach_journal(self, journal, pending: Optional[List] = None) -> None:
+        """
+        Route events to a journal, appending any buffered ones first
+
+        Args:
+            journal: Journal to attach
+            pending: When given, buffered events are added to it as
+                (incident_id, kind, event) for the caller to append in bulk
+        """
+        if self._journal is journal:
+            return
+        self._journal = journal
+        for kind, events in self._buffered.items():
+            for event in events:
+                if pending is not None:
+                    pending.append((self.incident_id, kind, event))
+                else:
+                    journal.append(self.incident_id, kind, event)
+        self._buffered = {}
+        # The journal may hold events recorded through other copies of this state
+        self._events = {}
+
+    def hold_events(self) -> None:
+        """
+        Keep events recorded by this thread out of the journal until `release_events`
+
+        For changes that may be retried: events from an attempt whose save
+        failed are dropped rather than journaled once per attempt.
+        """
+        self._held[threading.get_ident()] = []
+
+    def release_events(self, keep: bool) -> None:
+        """Journal the events this thread held, or drop them if their change was not saved"""
+        held = self._held.pop(threading.get_ident(), None)
+        if keep and held:
+            for kind, event in held:
+                self._append_event(kind, event)
+
+    def forget_loaded_events(self) -> None:
+        """Drop history loaded in this process; the next read goes back to the journal"""
+        self._events = {}
+
+    def _stream(self, kind: str) -> List[Dict]:
+        events = self._events.get(kind)
+        if events is None:
+            events = self._journal.read(self.incident_id, kind) if self._journal is not None else []
+            self._events[kind] = events
+        return events
+
+    def _append_event(self, kind: str, event: Dict) -> None:
+        held = self._held.get(threading.get_ident())
+        if held is not None:
+            held.append((kind, event))
+            return
+        if self._journal is None:
+            self._buffered.setdefault(kind, []).append(event)
+            self._stream(kind).append(event)
+            return
+        self._journal.append(self.incident_id, kind, event)
+        loaded = self._events.get(kind)
+        if loaded is not None:
+            loaded.append(event)
+
+    @property
+    def conversation_history(self) -> List[Dict]:
+        return self._stream("conversation")
+
+    @property
+    def analysis_steps(self) -> List[Dict]:
+        return self._stream("analysis_step")
+
+    def event_count(self, kind: str) -> int:
+        if kind in self._events or self._journal is None:
+            return len(self._stream(kind))
+        return self._journal.count(self.incident_id, kind)
+
+    def history_page(self, kind: str, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """One page of an event stream, without loading the rest"""
+        if kind in self._events or self._journal is None:
+            return self._stream(kind)[offset:offset + limit]
+        return self._journal.read(self.incident_id, kind, offset, limit)
+
+    def loaded_events(self) -> List[Dict]:
+        """Events currently held in memory, without reading the journal"""
+        return [event for events in self._events.values() for event in events]
+
     def add_conversation_message(self, role: str, content: str, 
                                analysis_type: Optional[str] = None):
         message = {
@@ -139,7 +337,7 @@ class IncidentState(BaseModel):
             "timestamp": datetime.utcnow(),
             "analysis_type": analysis_type
         }
-        self.conversation_history.append(message)
+        self._append_event("conversation", message)
         self.last_updated = datetime.utcnow()
 
     def add_analysis_step(self, step_type: str, input_context: Dict, 
@@ -151,5 +349,5 @@ class IncidentState(BaseModel):
             "output_result": output_result,
             "confidence_score": confidence_score
         }
-        self.analysis_steps.append(step)
+        self._append_event("analysis_step", step)
         self.last_updated = datetime.utcnow()
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from pydantic import BaseModel, ConfigDict
-from typing import List, Optional, Dict
+from typing import Iterable, List, Optional, Dict
 from enum import Enum
 
 from .base import DateTimeRange
@@ -83,4 +83,54 @@ class MonitoringData(BaseModel):
         return [
             log for log in self.logs 
             if log.level.upper() == level.upper()
-        ]
\ No newline at end of file
+        ]
+
+class LiveTailState(BaseModel):
+    """High-watermarks and incrementally maintained statistics for a live-tailed incident"""
+    active: bool = False
+    watermarks: Dict[str, datetime] = {}
+    log_level_counts: Dict[str, int] = {}
+    metric_stats: Dict[str, Dict[str, float]] = {}
+    polls: int = 0
+    appended_logs: int = 0
+    appended_metrics: int = 0
+    last_polled: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        from_attributes=True
+    )
+
+    def reseed(self, logs: Iterable, metrics: Iterable) -> None:
+        """Recount the statistics from scratch after the incident's records were replaced"""
+        self.log_level_counts = {}
+        self.metric_stats = {}
+        for log in logs:
+            self.record_log(log["level"] if isinstance(log, dict) else log.level)
+        for metric in metrics:
+            if isinstance(metric, dict):
+                self.record_metric(metric["name"], float(metric["value"]))
+            else:
+                self.record_metric(metric.name, float(metric.value))
+
+    def record_log(self, level: str) -> None:
+        level = level.upper()
+        self.log_level_counts[level] = self.log_level_counts.get(level, 0) + 1
+
+    def record_metric(self, name: str, value: float) -> None:
+        """Update running count/mean/variance (Welford) and min/max/last for a metric"""
+        stats = self.metric_stats.get(name)
+        if stats is None:
+            self.metric_stats[name] = {
+                "count": 1, "mean": value, "m2": 0.0,
+                "min": value, "max": value, "last": value
+            }
+            return
+
+        stats["count"] += 1
+        delta = value - stats["mean"]
+        stats["mean"] += delta / stats["count"]
+        stats["m2"] += delta * (value - stats["mean"])
+        stats["min"] = min(stats["min"], value)
+        stats["max"] = max(stats["max"], value)
+        stats["last"] = value
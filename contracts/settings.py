@@ -30,6 +30,8 @@ class AzureOpenAISettings(BaseSettings):
     api_base: str
     api_key: str
     temperature: float = 0.0
+    # Chain calls in flight at once across the process; 0 for no cap
+    max_concurrency: int = 8
 
     model_config = SettingsConfigDict(
         env_prefix='AZURE_OPENAI_',
@@ -38,10 +40,107 @@ class AzureOpenAISettings(BaseSettings):
         extra='ignore'
     )
 
+class MonitoringSettings(BaseSettings):
+    backend_timeout_seconds: float = 10.0
+    # Backend queries in flight at once across all backends; 0 for no cap
+    backend_max_concurrency: int = 16
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout_seconds: float = 30.0
+    hedge_enabled: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    latency_window: int = 200
+    prefetch_enabled: bool = False
+    prefetch_max_concurrency: int = 4
+    prefetch_max_age_seconds: float = 300.0
+    live_tail_interval_seconds: float = 30.0
+    anomaly_top_k: int = 10
+    anomaly_ewma_alpha: float = 0.3
+    anomaly_season_length: int = 0
+    anomaly_min_score: float = 0.0
+    correlation_bins: int = 60
+    correlation_max_lag_bins: int = 5
+    correlation_top_k: int = 10
+    correlation_min_strength: float = 0.5
+    trace_chunk_seconds: float = 300.0
+    trace_bloom_capacity: int = 100_000
+    trace_bloom_error_rate: float = 0.01
+
+    model_config = SettingsConfigDict(
+        env_prefix='MONITORING_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+class ReplaySettings(BaseSettings):
+    mode: str = "off"
+    directory: str = "cassettes"
+    speed: float = 1.0
+
+    model_config = SettingsConfigDict(
+        env_prefix='REPLAY_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+class BatchSettings(BaseSettings):
+    # Incidents analyzed at once by a batch run
+    concurrency: int = 4
+    checkpoint_dir: str = "data/batches"
+
+    model_config = SettingsConfigDict(
+        env_prefix='BATCH_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+class StoreSettings(BaseSettings):
+    backend: str = "memory"
+    sqlite_path: str = "data/incidents.db"
+    batch_size: int = 50
+    flush_interval_seconds: float = 1.0
+    cache_max_entries: int = 1000
+    cache_max_bytes: int = 256 * 1024 * 1024
+    cache_ttl_seconds: float = 30 * 24 * 3600.0
+    lock_stripes: int = 64
+    update_retries: int = 3
+    serialization_codec: str = "orjson"
+    serialization_compression: str = "zstd"
+    blob_chunk_records: int = 1000
+    blob_cache_records: int = 200_000
+    wal_dir: str = "data/wal"
+    # group: saves wait for their fsync batch; async: a crash can lose the last batch
+    wal_sync: str = "group"
+    wal_commit_delay_seconds: float = 0.002
+    wal_snapshot_bytes: int = 16 * 1024 * 1024
+    # Versions stored as deltas before the next full keyframe
+    history_keyframe_interval: int = 50
+    # Resolved and closed incidents are compacted to cold storage this long after their last update
+    tiering_resolved_after_hours: float = 72.0
+    tiering_closed_after_hours: float = 24.0
+    tiering_rollup_seconds: int = 300
+    # 0 disables the background job
+    tiering_interval_seconds: float = 3600.0
+    tiering_cold_dir: str = "data/cold"
+
+    model_config = SettingsConfigDict(
+        env_prefix='STORE_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
 class Settings(BaseSettings):
     coralogix: Optional[CoralogixSettings] = None
     prometheus: Optional[PrometheusSettings] = None
     azure_openai: Optional[AzureOpenAISettings] = None
+    monitoring: Optional[MonitoringSettings] = None
+    replay: Optional[ReplaySettings] = None
+    store: Optional[StoreSettings] = None
+    batch: Optional[BatchSettings] = None
     log_level: str = "INFO"
 
     model_config = SettingsConfigDict(
@@ -55,6 +154,10 @@ class Settings(BaseSettings):
         self.coralogix = CoralogixSettings()
         self.prometheus = PrometheusSettings()
         self.azure_openai = AzureOpenAISettings()
+        self.monitoring = MonitoringSettings()
+        self.replay = ReplaySettings()
+        self.store = StoreSettings()
+        self.batch = BatchSettings()
 
 @lru_cache()
 def get_settings() -> Settings:
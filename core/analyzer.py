@@ -49,7 +49,10 @@ class IncidentAnalyzer:
                 # Handle successful analysis
                 if "error" not in analysis_results:
                     logger.info(f"[Core Analyzer] Analysis completed successfully for incident: {incident_id}")
-                    self._update_incident_state(incident_state, analysis_results)
+                    # The processor saved its own updates meanwhile; apply ours to the current version
+                    context_store.update_context(
+                        incident_id, lambda state: self._update_incident_state(state, analysis_results)
+                    )
                 else:
                     logger.error(f"[Core Analyzer] Analysis failed for incident: {incident_id}")
                     incident_state.add_conversation_message(
@@ -72,12 +75,7 @@ class IncidentAnalyzer:
                     "code_analysis": "Analysis failed",
                     "performance_analysis": "Analysis failed"
                 }
-            
-            logger.info(f"[Core Analyzer] saving incident state for incident: {incident_state.incident}")
 
-            # Save final state
-            context_store.save_context(incident_state)
-            
             return analysis_results
         except Exception as e:
             error_msg = f"Critical error in incident analysis: {str(e)}"
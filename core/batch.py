@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from pydantic import BaseModel
+
+from contracts.settings import settings
+from core.manager import IncidentManager
+from memory.index import IncidentQuery
+from memory.store import context_store
+from monitoring.resilience import backend_limit
+from nlp.azure.client import llm_limit
+from nlp.usage import TokenUsage, track_token_usage
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+class BatchSummary(BaseModel):
+    """Outcome of one run of a batch analysis"""
+    batch_id: str
+    total: int = 0
+    # Analyzed by an earlier, interrupted run of the same batch
+    resumed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    tokens: TokenUsage = TokenUsage()
+    # incident_id -> error, first failures only; `failed` has the full count
+    errors: Dict[str, str] = {}
+    limits: Dict[str, Dict] = {}
+
+    @property
+    def rate(self) -> float:
+        """Incidents analyzed per second in this run"""
+        return (self.succeeded + self.failed) / self.seconds if self.seconds else 0.0
+
+class BatchCheckpoint:
+    """
+    Progress of a batch as an append-only NDJSON file
+
+    The first line holds the batch's incident IDs, resolved once when the
+    batch starts, so a resumed run works through the same incidents even
+    though analyzing them changes their update times. Each finished analysis
+    appends one line and flushes it; a line cut short by a crash is ignored
+    on resume and that incident is analyzed again.
+    """
+
+    def __init__(self, directory: str, batch_id: str):
+        self.batch_id = batch_id
+        self.path = os.path.join(directory, f"{batch_id}.ndjson")
+        self._handle = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def create(self, query: IncidentQuery, incident_ids: List[str]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        header = {
+            "batch_id": self.batch_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "query": query.model_dump(mode="json"),
+            "incident_ids": incident_ids,
+        }
+        with open(self.path, "w") as handle:
+            handle.write(json.dumps(header) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def load(self) -> Tuple[List[str], Set[str]]:
+        """The batch's incident IDs and the ones already analyzed successfully"""
+        done: Set[str] = set()
+        with open(self.path) as handle:
+            header = json.loads(handle.readline())
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("ok"):
+                    done.add(entry["incident_id"])
+                else:
+                    done.discard(entry["incident_id"])
+        return header["incident_ids"], done
+
+    def _ends_torn(self) -> bool:
+        """Whether the file ends in a line cut short by a crash"""
+        with open(self.path, "rb") as handle:
+            handle.seek(0, os.SEEK_END)
+            if handle.tell() == 0:
+                return False
+            handle.seek(-1, os.SEEK_END)
+            return handle.read(1) != b"\n"
+
+    def record(self, incident_id: str, ok: bool, seconds: float, tokens: TokenUsage, error: Optional[str] = None) -> None:
+        if self._handle is None:
+            torn = self.exists() and self._ends_torn()
+            self._handle = open(self.path, "a")
+            if torn:
+                # End the torn line so it does not swallow this entry
+                self._handle.write("\n")
+        entry = {"incident_id": incident_id, "ok": ok, "seconds": round(seconds, 3), "tokens": tokens.total_tokens}
+        if error is not None:
+            entry["error"] = error
+        self._handle.write(json.dumps(entry) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+class BatchAnalysisRunner:
+    """
+    Analyzes every incident matching a query, e.g. for a post-incident review
+
+    A fixed number of workers each take the next incident and run
+    `IncidentManager.analyze_incident` on it. LLM and monitoring backend calls
+    are also capped process-wide (AZURE_OPENAI_MAX_CONCURRENCY and
+    MONITORING_BACKEND_MAX_CONCURRENCY), so a batch does not starve
+    interactive analyses of rate limit. Progress is checkpointed after every
+    incident; running the same batch ID again skips incidents already
+    analyzed and retries the ones that failed.
+    """
+
+    def __init__(
+        self,
+        manager: Optional[IncidentManager] = None,
+        concurrency: Optional[int] = None,
+        checkpoint_dir: Optional[str] = None,
+        page_size: int = 500,
+        max_errors: int = 100
+    ):
+        self.manager = manager or IncidentManager()
+        self.concurrency = max(1, concurrency or settings.batch.concurrency)
+        self.checkpoint_dir = checkpoint_dir or settings.batch.checkpoint_dir
+        self.page_size = page_size
+        self.max_errors = max_errors
+
+    def _matching_ids(self, query: IncidentQuery) -> List[str]:
+        """Every incident ID matching the query's filters, regardless of its offset and limit"""
+        ids: List[str] = []
+        while True:
+            page = context_store.query_incidents(query.model_copy(update={"offset": len(ids), "limit": self.page_size}))
+            ids.extend(page.incident_ids)
+            if not page.incident_ids or len(ids) >= page.total:
+                return ids
+
+    async def run(self, query: Optional[IncidentQuery] = None, batch_id: Optional[str] = None) -> BatchSummary:
+        """
+        Analyze a batch of incidents
+
+        Args:
+            query: Incidents to analyze; ignored when resuming
+            batch_id: Resume this batch if its checkpoint exists, otherwise
+                start a new batch under this ID
+
+        Returns:
+            BatchSummary for this run
+        """
+        batch_id = batch_id or f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        checkpoint = BatchCheckpoint(self.checkpoint_dir, batch_id)
+        if checkpoint.exists():
+            incident_ids, done = checkpoint.load()
+            logger.info(f"[Batch] Resuming batch {batch_id}: {len(done)} of {len(incident_ids)} incidents already analyzed")
+        else:
+            if query is None:
+                raise ValueError(f"No checkpoint for batch {batch_id}; a query is needed to start it")
+            incident_ids, done = self._matching_ids(query), set()
+            checkpoint.create(query, incident_ids)
+            logger.info(f"[Batch] Starting batch {batch_id} over {len(incident_ids)} incidents")
+
+        summary = BatchSummary(batch_id=batch_id, total=len(incident_ids), resumed=len(done))
+        pending = iter([incident_id for incident_id in incident_ids if incident_id not in done])
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(self._worker(pending, checkpoint, summary) for _ in range(self.concurrency)))
+        finally:
+            checkpoint.close()
+            summary.seconds = time.perf_counter() - started
+            summary.limits = {"llm": llm_limit.get_stats(), "monitoring": backend_limit.get_stats()}
+
+        logger.info(
+            f"[Batch] Batch {batch_id}: {summary.succeeded} analyzed, {summary.failed} failed in {summary.seconds:.1f}s "
+            f"({summary.rate:.2f}/s), {summary.tokens.total_tokens} tokens"
+        )
+        return summary
+
+    async def _worker(self, pending: Iterator[str], checkpoint: BatchCheckpoint, summary: BatchSummary) -> None:
+        # Workers share one iterator; each takes the next incident when it is free
+        for incident_id in pending:
+            started = time.perf_counter()
+            error = None
+            with track_token_usage() as tokens:
+                try:
+                    results = await self.manager.analyze_incident(incident_id)
+                    if "error" in results:
+                        error = str(results["error"])
+                except Exception as e:
+                    error = str(e)
+            seconds = time.perf_counter() - started
+
+            summary.tokens.add(tokens)
+            if error is None:
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+                if len(summary.errors) < self.max_errors:
+                    summary.errors[incident_id] = error
+            checkpoint.record(incident_id, error is None, seconds, tokens, error)
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze every incident matching a query")
+    parser.add_argument("--batch-id", help="Resume this batch, or start a new batch under this ID")
+    parser.add_argument("--status", nargs="*")
+    parser.add_argument("--severity", nargs="*")
+    parser.add_argument("--application", nargs="*")
+    parser.add_argument("--environment", nargs="*")
+    parser.add_argument("--component", nargs="*")
+    parser.add_argument("--created-from", type=datetime.fromisoformat)
+    parser.add_argument("--created-to", type=datetime.fromisoformat)
+    parser.add_argument("--concurrency", type=int)
+    args = parser.parse_args()
+
+    query = IncidentQuery(
+        status=args.status,
+        severity=args.severity,
+        application=args.application,
+        environment=args.environment,
+        component=args.component,
+        created_from=args.created_from,
+        created_to=args.created_to
+    )
+    runner = BatchAnalysisRunner(concurrency=args.concurrency)
+    summary = asyncio.run(runner.run(query, args.batch_id))
+    print(
+        f"Batch {summary.batch_id}: {summary.succeeded} analyzed, {summary.failed} failed, "
+        f"{summary.resumed} from an earlier run, in {summary.seconds:.1f}s ({summary.rate:.2f}/s)"
+    )
+    print(
+        f"Tokens: {summary.tokens.total_tokens} ({summary.tokens.prompt_tokens} prompt, "
+        f"{summary.tokens.completion_tokens} completion) over {summary.tokens.calls} LLM calls"
+    )
+    for incident_id, error in summary.errors.items():
+        print(f"  {incident_id}: {error}")
+
+if __name__ == "__main__":
+    main()
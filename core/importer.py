@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import gc
+import gzip
+import json
+import time
+from typing import Dict, Iterator, List, Optional, Union
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from contracts.incident import Incident
+from core.manager import IncidentManager
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_INCIDENTS = TypeAdapter(List[Incident])
+
+class ImportReport(BaseModel):
+    """Outcome of importing one file"""
+    path: str
+    imported: int = 0
+    # Already in the store, or earlier in the file, and left as they were
+    skipped: int = 0
+    failed: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    # First errors only; `failed` has the full count
+    errors: List[str] = []
+
+    @property
+    def rate(self) -> float:
+        """Incidents imported per second"""
+        return self.imported / self.seconds if self.seconds else 0.0
+
+def read_ndjson(path: str) -> Iterator[Union[Dict, ValueError]]:
+    """
+    Incident records from a newline-delimited JSON file, optionally gzipped
+
+    Malformed lines are yielded as ValueError instances, so the import can
+    count them and carry on.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield _json_loads(line)
+            except ValueError as e:
+                yield ValueError(f"line {number}: {str(e)}")
+
+def read_parquet(path: str, batch_size: int = 10_000) -> Iterator[Dict]:
+    """Incident records from a Parquet file, read one row group batch at a time; needs pyarrow"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Importing Parquet files needs pyarrow; install it with 'pip install pyarrow'")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+def read_records(path: str, format: Optional[str] = None) -> Iterator[Union[Dict, ValueError]]:
+    """Records from an NDJSON or Parquet file; the format defaults to the file extension"""
+    format = format or ("parquet" if path.endswith(".parquet") else "ndjson")
+    if format == "parquet":
+        return read_parquet(path)
+    if format == "ndjson":
+        return read_ndjson(path)
+    raise ValueError(f"Unknown import format {format}; expected ndjson or parquet")
+
+class IncidentImporter:
+    """
+    Streams incidents from a tracker export into the store
+
+    Records are read lazily and validated a batch at a time. When a batch
+    fails validation it is validated again record by record, so a bad record
+    only costs itself. Each batch of valid incidents is created with
+    `IncidentManager.create_incidents`: one grouped store write and one index
+    update per batch. Incidents that already exist are skipped, so
+    re-importing an export keeps their analyses; with `overwrite` they are
+    replaced by the imported copy instead.
+
+    With `freeze_imported`, objects alive after each batch are moved out of
+    garbage collection with gc.freeze(), so collections do not rescan every
+    incident imported so far. That is process-wide and never undone here;
+    only a process that does nothing but import, like the command line
+    tool, should turn it on.
+    """
+
+    def __init__(
+        self,
+        manager: IncidentManager,
+        batch_size: int = 1000,
+        max_errors: int = 100,
+        overwrite: bool = False,
+        freeze_imported: bool = False
+    ):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.overwrite = overwrite
+        self.freeze_imported = freeze_imported
+
+    def _validate(self, records: List[Dict], report: ImportReport) -> List[Incident]:
+        try:
+            return _INCIDENTS.validate_python(records)
+        except ValidationError:
+            pass
+        incidents = []
+        for record in records:
+            try:
+                incidents.append(Incident.model_validate(record))
+            except ValidationError as e:
+                self._fail(report, f"incident {record.get('id', '?')}: {e.error_count()} invalid fields: {e.errors()[0]['msg']}")
+        return incidents
+
+    def _fail(self, report: ImportReport, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < self.max_errors:
+            report.errors.append(error)
+
+    async def _import_batch(self, records: List[Dict], report: ImportReport) -> None:
+        incidents = self._validate(records, report)
+        if incidents:
+            created = await self.manager.create_incidents(incidents, skip_existing=not self.overwrite)
+            report.imported += len(created)
+            report.skipped += len(incidents) - len(created)
+        report.batches += 1
+        if self.freeze_imported:
+            # Imported states stay alive; keep the collector from rescanning them on every later batch
+            gc.freeze()
+
+    async def import_file(self, path: str, format: Optional[str] = None) -> ImportReport:
+        """
+        Import every incident in a file
+
+        Args:
+            path: NDJSON (optionally .gz) or Parquet file
+            format: "ndjson" or "parquet"; defaults to the file extension
+        """
+        report = ImportReport(path=path)
+        started = time.perf_counter()
+        batch: List[Dict] = []
+        for record in read_records(path, format):
+            if isinstance(record, ValueError):
+                self._fail(report, str(record))
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch, report)
+                batch = []
+        if batch:
+            await self._import_batch(batch, report)
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"[Importer] Imported {report.imported} incidents from {path} in {report.seconds:.1f}s "
+            f"({report.rate:,.0f}/s), {report.skipped} already stored, {report.failed} failed"
+        )
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Import incidents from an NDJSON or Parquet export")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--format", choices=["ndjson", "parquet"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--overwrite", action="store_true", help="Replace incidents that already exist, dropping their analyses")
+    args = parser.parse_args()
+
+    # This process only imports, so freezing imported objects out of GC affects nothing else
+    importer = IncidentImporter(
+        IncidentManager(), batch_size=args.batch_size, overwrite=args.overwrite, freeze_imported=True
+    )
+    for path in args.paths:
+        report = asyncio.run(importer.import_file(path, args.format))
+        print(
+            f"{path}: {report.imported} imported, {report.skipped} already stored, {report.failed} failed "
+            f"in {report.seconds:.1f}s ({report.rate:,.0f}/s)"
+        )
+        for error in report.errors:
+            print(f"  {error}")
+
+if __name__ == "__main__":
+    main()
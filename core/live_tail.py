@@ -0,0 +1,199 @@
+import asyncio
+import concurrent.futures
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from contracts.base import DateTimeRange, IncidentStatus
+from contracts.incident import Incident, IncidentState
+from contracts.monitoring import LiveTailState, MonitoringQuery
+from contracts.settings import settings
+from memory.store import context_store
+from monitoring.system import MonitoringSystem
+from monitoring.trace_index import trace_index_registry
+from utils.background import background_loop
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = (IncidentStatus.NEW, IncidentStatus.IN_PROGRESS)
+
+def _as_utc(value: datetime) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _field(record, name: str):
+    return record[name] if isinstance(record, dict) else getattr(record, name)
+
+def _latest(records: Iterable, default: datetime) -> datetime:
+    latest = default
+    for record in records:
+        latest = max(latest, _as_utc(_field(record, 'timestamp')))
+    return latest
+
+class LiveTail:
+    """Polls monitoring data newer than per-source watermarks for open incidents"""
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._tasks: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._monitoring_system: Optional[MonitoringSystem] = None
+
+    def is_active(self, incident_id: str) -> bool:
+        with self._lock:
+            task = self._tasks.get(incident_id)
+            return task is not None and not task.done()
+
+    def start(self, incident_id: str) -> bool:
+        """
+        Start live-tailing an open incident
+
+        Args:
+            incident_id: ID of the incident to tail
+
+        Returns:
+            bool: True if tailing is running after the call
+        """
+        state = context_store.get_context(incident_id)
+        if not state or state.incident.status not in OPEN_STATUSES:
+            return False
+
+        def activate(current: IncidentState) -> bool:
+            if current.incident.status not in OPEN_STATUSES:
+                return False
+            if current.live_tail is None:
+                current.live_tail = self._initial_state(current.incident)
+            current.live_tail.active = True
+            return True
+
+        with self._lock:
+            task = self._tasks.get(incident_id)
+            if task is not None and not task.done():
+                return True
+
+            if not context_store.update_context(incident_id, activate):
+                return False
+
+            self._tasks[incident_id] = background_loop.submit(self._run(incident_id))
+
+        logger.info(f"[Live Tail] Started live tail for incident: {incident_id}")
+        return True
+
+    def stop(self, incident_id: str) -> None:
+        """Stop live-tailing an incident"""
+        with self._lock:
+            task = self._tasks.pop(incident_id, None)
+        if task is not None:
+            task.cancel()
+        self._mark_inactive(incident_id)
+
+    def _mark_inactive(self, incident_id: str) -> None:
+        state = context_store.get_context(incident_id)
+        if not state or not state.live_tail or not state.live_tail.active:
+            return
+
+        def deactivate(current: IncidentState) -> None:
+            if current.live_tail is not None:
+                current.live_tail.active = False
+
+        try:
+            context_store.update_context(incident_id, deactivate)
+        except ValueError:
+            # Removed while tailing; nothing left to mark
+            return
+        logger.info(f"[Live Tail] Stopped live tail for incident: {incident_id}")
+
+    def _initial_state(self, incident: Incident) -> LiveTailState:
+        """Seed watermarks and statistics from the data already on the incident"""
+        window_start = _as_utc(incident.created_at) - timedelta(hours=1)
+        tail = LiveTailState(
+            watermarks={
+                "logs": _latest(incident.logs, window_start),
+                "metrics": _latest(incident.metrics, window_start),
+            }
+        )
+        tail.reseed(incident.logs, incident.metrics)
+        return tail
+
+    async def _run(self, incident_id: str) -> None:
+        try:
+            while True:
+                state = context_store.get_context(incident_id)
+                if not state or state.incident.status not in OPEN_STATUSES:
+                    break
+                await self.poll_once(state)
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            logger.error(f"[Live Tail] Error tailing incident {incident_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._tasks.pop(incident_id, None)
+            self._mark_inactive(incident_id)
+
+    async def poll_once(self, state: IncidentState) -> Tuple[int, int]:
+        """
+        Fetch data newer than the watermarks and append it to the incident
+
+        Args:
+            state: Incident state being tailed
+
+        Returns:
+            Tuple of (logs appended, metrics appended)
+        """
+        if self._monitoring_system is None:
+            self._monitoring_system = MonitoringSystem()
+
+        tail = state.live_tail
+        query = MonitoringQuery(
+            metric_name="*",
+            log_level="error",
+            date_range=DateTimeRange(
+                start=min(tail.watermarks["logs"], tail.watermarks["metrics"]),
+                end=datetime.now(timezone.utc)
+            )
+        )
+        data = await self._monitoring_system.query_monitoring_data(query)
+
+        def append_new(current: IncidentState) -> Tuple[int, int]:
+            # Filter against the current watermarks so a retried update never appends twice
+            tail = current.live_tail
+            logs_mark = tail.watermarks["logs"]
+            metrics_mark = tail.watermarks["metrics"]
+            new_logs = [log for log in data.logs if _as_utc(log.timestamp) > logs_mark]
+            new_metrics = [metric for metric in data.metrics if _as_utc(metric.timestamp) > metrics_mark]
+
+            incident = current.incident
+            for log in new_logs:
+                incident.logs.append(log.model_dump())
+                tail.record_log(log.level)
+            for metric in new_metrics:
+                incident.metrics.append(metric.model_dump())
+                tail.record_metric(metric.name, metric.value)
+            if new_logs:
+                trace_index_registry.index_incident(incident)
+
+            tail.watermarks["logs"] = _latest(new_logs, logs_mark)
+            tail.watermarks["metrics"] = _latest(new_metrics, metrics_mark)
+            tail.polls += 1
+            tail.appended_logs += len(new_logs)
+            tail.appended_metrics += len(new_metrics)
+            tail.last_polled = datetime.utcnow()
+
+            if new_logs or new_metrics:
+                incident.updated_at = datetime.utcnow()
+                logger.info(
+                    f"[Live Tail] Appended {len(new_logs)} logs and {len(new_metrics)} metrics "
+                    f"to incident: {incident.id}"
+                )
+            current.last_updated = datetime.utcnow()
+            return len(new_logs), len(new_metrics)
+
+        return context_store.update_context(state.incident_id, append_new)
+
+# Create singleton instance
+live_tail = LiveTail(poll_interval=settings.monitoring.live_tail_interval_seconds)
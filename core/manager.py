@@ -1,8 +1,13 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 from contracts.monitoring import LogMessage, Metric
 from core.analyzer import IncidentAnalyzer
+from core.live_tail import live_tail
 from memory.store import context_store
+from contracts.settings import settings
+from monitoring.prefetch import build_incident_query, monitoring_prefetcher
+from monitoring.trace_index import trace_index_registry
+from utils.singleflight import SingleFlight
 from contracts.incident import (
     CodeReference,
     Incident,
@@ -10,23 +15,31 @@ from contracts.incident import (
     EnvironmentContext,
     IncidentStatus
 )
+from pydantic import TypeAdapter
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
+_INCIDENTS = TypeAdapter(List[Incident])
+
+# Process-wide, since each Streamlit session has its own manager
+analysis_flights = SingleFlight("analysis")
+
 class IncidentManager:
     """Manager for handling incident lifecycle and coordination"""
     def __init__(self):
         self.analyzer = IncidentAnalyzer()
 
-    async def create_incident(self, incident_data: Incident) -> str:
+    async def create_incident(self, incident_data: Incident, prefetch: Optional[bool] = None) -> str:
         """
         Create a new incident with proper context structure
         
         Args:
             incident_data: Dictionary containing incident details
+            prefetch: Start fetching monitoring data in the background;
+                defaults to the MONITORING_PREFETCH_ENABLED setting
             
         Returns:
             str: Incident ID
@@ -96,6 +109,15 @@ class IncidentManager:
 
             # Store the state
             context_store.save_context(state)
+
+            # Take monitoring latency off the analysis critical path
+            if prefetch is None:
+                prefetch = settings.monitoring.prefetch_enabled
+            if prefetch:
+                monitoring_prefetcher.prefetch(
+                    incident.id,
+                    build_incident_query(incident.created_at)
+                )
             
             return incident.id
             
@@ -105,6 +127,69 @@ class IncidentManager:
             raise ValueError(error_msg)
 
 
+    async def create_incidents(
+        self,
+        incidents: List[Union[Incident, Dict]],
+        prefetch: bool = False,
+        skip_existing: bool = False
+    ) -> List[str]:
+        """
+        Create many incidents at once, e.g. when backfilling from a tracker
+
+        Dicts are validated together in one pass and incidents that are
+        already validated are used as they are, not rebuilt. All states are
+        saved in one grouped write with a single index update. An incident
+        whose ID is already stored replaces it with a fresh state, dropping
+        its analysis and history, unless `skip_existing` is set.
+
+        Args:
+            incidents: Incidents or their raw data
+            prefetch: Start fetching monitoring data for each incident; off by
+                default since backfilled incidents are usually historical
+            skip_existing: Leave incidents that are already stored, or that
+                appear earlier in the list, as they are
+
+        Returns:
+            List[str]: IDs of the incidents created, in the order given
+        """
+        try:
+            raw = [data for data in incidents if not isinstance(data, Incident)]
+            validated = iter(_INCIDENTS.validate_python(raw) if raw else ())
+            incidents = [data if isinstance(data, Incident) else next(validated) for data in incidents]
+            if skip_existing:
+                seen = set()
+                new = []
+                for incident in incidents:
+                    if incident.id not in seen and not context_store.stored_version(incident.id):
+                        new.append(incident)
+                    seen.add(incident.id)
+                incidents = new
+
+            now = datetime.utcnow()
+            states = []
+            for incident in incidents:
+                state = IncidentState(incident_id=incident.id, incident=incident, last_updated=now)
+                state.add_conversation_message(
+                    role="system",
+                    content="Incident created",
+                    analysis_type="system"
+                )
+                states.append(state)
+
+            logger.info(f"[Incident Manager] Creating {len(states)} incident states")
+            context_store.save_many(states)
+
+            if prefetch:
+                for incident in incidents:
+                    monitoring_prefetcher.prefetch(incident.id, build_incident_query(incident.created_at))
+
+            return [incident.id for incident in incidents]
+
+        except Exception as e:
+            error_msg = f"Failed to create incidents: {str(e)}"
+            logger.error(f"[Incident Manager] {error_msg}")
+            raise ValueError(error_msg)
+
     async def get_incident(self, incident_id: str) -> Optional[Incident]:
         """
         Retrieve incident by ID
@@ -120,46 +205,67 @@ class IncidentManager:
             return state.incident
         return None
 
-    async def update_incident(self, incident_id: str, updates: Dict) -> None:
+    async def patch_incident(self, incident_id: str, changes: Dict) -> Dict:
         """
-        Update incident with validation
-        
+        Change some incident fields in place
+
+        Only the changed fields are validated and the rest of the incident,
+        including its logs and metrics, is left as it is, so flipping the
+        status of a large incident costs the same as a small one. The save
+        records the change in the incident's version history, and a
+        conversation message lists the fields that changed.
+
         Args:
-            incident_id: ID of the incident to update
-            updates: Dictionary containing update data
+            incident_id: ID of the incident to change
+            changes: New values by field name; `updated_at` defaults to now
+
+        Returns:
+            Dict: Previous value of each field that changed
         """
         state = context_store.get_context(incident_id)
         if not state:
             raise ValueError(f"Incident {incident_id} not found")
-            
+
         try:
-            # Update incident data
-            incident_data = state.incident.model_dump()
-            incident_data.update(updates)
-            
-            # Create new incident with updates
-            updated_incident = Incident(**incident_data)
-            updated_incident.updated_at = datetime.utcnow()
+            # Validated once, outside the compare-and-set retries
+            values = Incident.validate_fields(changes)
 
-            # Update state
-            state.incident = updated_incident
-            state.last_updated = datetime.utcnow()
+            def apply_changes(state: IncidentState) -> Dict:
+                previous = state.incident.apply_fields(values)
+                if previous:
+                    if "updated_at" not in values:
+                        state.incident.updated_at = datetime.utcnow()
+                    # Journaled with the save, and dropped if this attempt is retried
+                    state.add_conversation_message(
+                        role="system",
+                        content=f"Incident updated: {', '.join(previous.keys())}",
+                        analysis_type="update"
+                    )
+                state.last_updated = datetime.utcnow()
+                return previous
+
+            # Nothing to save when the incident already has these values
+            if all(getattr(state.incident, name) == value for name, value in values.items()):
+                return {}
+
+            # Compare-and-set against the stored version, retried on concurrent saves
+            return context_store.update_context(incident_id, apply_changes)
 
-            # Add update message
-            state.add_conversation_message(
-                role="system",
-                content=f"Incident updated: {', '.join(updates.keys())}",
-                analysis_type="update"
-            )
-            
-            # Save updated state
-            context_store.save_context(state)
-            
         except Exception as e:
             error_msg = f"Failed to update incident: {str(e)}"
             logger.error(f"[Incident Manager] {error_msg}")
             raise ValueError(error_msg)
 
+    async def update_incident(self, incident_id: str, updates: Dict) -> None:
+        """
+        Update incident with validation
+        
+        Args:
+            incident_id: ID of the incident to update
+            updates: Dictionary containing update data
+        """
+        await self.patch_incident(incident_id, updates)
+
     async def resolve_incident(self, incident_id: str) -> None:
         """
         Mark incident as resolved
@@ -168,12 +274,15 @@ class IncidentManager:
             incident_id: ID of the incident to resolve
         """
         try:
-            await self.update_incident(
+            await self.patch_incident(
                 incident_id,
                 {'status': IncidentStatus.RESOLVED}
             )
+
+            # Resolved incidents receive no further data
+            live_tail.stop(incident_id)
             
-            # Get state to add resolution message
+            # Get state to add resolution message; history is journaled, so no snapshot save
             state = context_store.get_context(incident_id)
             if state:
                 state.add_conversation_message(
@@ -181,13 +290,34 @@ class IncidentManager:
                     content="Incident marked as resolved",
                     analysis_type="status_change"
                 )
-                context_store.save_context(state)
                 
         except Exception as e:
             error_msg = f"Failed to resolve incident: {str(e)}"
             logger.error(f"[Incident Manager] {error_msg}")
             raise ValueError(error_msg)
 
+    async def start_live_tail(self, incident_id: str) -> bool:
+        """
+        Start appending new logs and metrics to an open incident
+        
+        Args:
+            incident_id: ID of the incident to tail
+            
+        Returns:
+            bool: True if live tail is running, False if the incident is not open
+        """
+        if not context_store.get_context(incident_id):
+            raise ValueError(f"Incident {incident_id} not found")
+        return live_tail.start(incident_id)
+
+    async def stop_live_tail(self, incident_id: str) -> None:
+        """Stop live-tailing an incident"""
+        live_tail.stop(incident_id)
+
+    def is_live_tail_active(self, incident_id: str) -> bool:
+        """Whether new data is currently being tailed into the incident"""
+        return live_tail.is_active(incident_id)
+
     async def analyze_incident(
         self,
         incident_id: str,
@@ -195,10 +325,15 @@ class IncidentManager:
     ) -> Dict:
         """
         Analyze incident and store results
+
+        Requests for the same incident and stored version, e.g. several
+        engineers starting the analysis of a freshly paged incident, join the
+        analysis already running and all receive its results.
         
         Args:
             incident_id: ID of the incident to analyze
-            follow_up_query: Optional follow-up query for analysis
+            follow_up_query: Optional follow-up query for analysis; a follow-up
+                always runs its own analysis
             
         Returns:
             Dict: Analysis results
@@ -208,7 +343,15 @@ class IncidentManager:
         state = context_store.get_context(incident_id)
         if not state:
             raise ValueError(f"Incident {incident_id} not found")
-            
+
+        if follow_up_query:
+            return await self._analyze_incident(state, follow_up_query)
+        return await analysis_flights.run(
+            (incident_id, state.version),
+            lambda: self._analyze_incident(state, None)
+        )
+
+    async def _analyze_incident(self, state: IncidentState, follow_up_query: Optional[str]) -> Dict:
         try:
            # Prepare incident data for analysis
             incident_data = state.incident
@@ -251,7 +394,6 @@ class IncidentManager:
                     content=error_msg,
                     analysis_type="error"
                 )
-                context_store.save_context(state)
                 
             raise ValueError(error_msg)
 
@@ -262,8 +404,7 @@ class IncidentManager:
         message: str
     ) -> None:
         """Add a log entry to the incident"""
-        state = context_store.get_context(incident_id)
-        if not state:
+        if not context_store.get_context(incident_id):
             raise ValueError(f"Incident {incident_id} not found")
             
         new_log = {
@@ -271,7 +412,10 @@ class IncidentManager:
             'level': level,
             'message': message
         }
-        
-        state.incident.logs.append(new_log)
-        state.last_updated = datetime.utcnow()
-        context_store.save_context(state)
\ No newline at end of file
+
+        def append_log(state: IncidentState) -> None:
+            state.incident.logs.append(new_log)
+            trace_index_registry.index_incident(state.incident)
+            state.last_updated = datetime.utcnow()
+
+        context_store.update_context(incident_id, append_log)
\ No newline at end of file
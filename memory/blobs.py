@@ -0,0 +1,414 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+from pydantic import BaseModel
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+_BLOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID
+"""
+_INCIDENT_BLOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incident_blobs (
+    incident_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (incident_id, digest)
+) WITHOUT ROWID
+"""
+# Blobs referenced by keyframes in an incident's version history
+_HISTORY_BLOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_blobs (
+    incident_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (incident_id, digest)
+) WITHOUT ROWID
+"""
+_INSERT_BLOB = "INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)"
+_SELECT_BLOB = "SELECT data FROM blobs WHERE digest = ?"
+_HAS_BLOB = "SELECT 1 FROM blobs WHERE digest = ?"
+_DELETE_INCIDENT_BLOBS = "DELETE FROM incident_blobs WHERE incident_id = ?"
+_INSERT_INCIDENT_BLOB = "INSERT OR IGNORE INTO incident_blobs (incident_id, digest) VALUES (?, ?)"
+_DELETE_HISTORY_BLOBS = "DELETE FROM history_blobs WHERE incident_id = ?"
+_INSERT_HISTORY_BLOB = "INSERT OR IGNORE INTO history_blobs (incident_id, digest) VALUES (?, ?)"
+_UNREFERENCED_BLOBS = """
+SELECT digest FROM blobs
+WHERE digest NOT IN (SELECT digest FROM incident_blobs) AND digest NOT IN (SELECT digest FROM history_blobs)
+"""
+_DELETE_BLOB = "DELETE FROM blobs WHERE digest = ?"
+
+# Serializes first loads of lazy record lists; held only while chunks are read
+_LOAD_LOCK = threading.Lock()
+
+class BlobRef(BaseModel):
+    """Reference to one chunk of records stored as a blob"""
+    digest: str
+    count: int
+    size: int
+
+class LazyRecords(list):
+    """
+    List of log or metric records whose chunks load on first use
+
+    Until loaded, `len()` is answered from the chunk references, so headers
+    and listings never touch the blobs. Any other read or write loads every
+    chunk; `page` and `tail` load only the chunks they need. Appending to a
+    loaded list keeps the references of the untouched chunks, so the next save
+    only writes the chunks that changed.
+
+    Code that hands the list to C serializers (pydantic dumps, orjson, the
+    json encoder) must call `load()` first, since they read list storage
+    directly.
+    """
+
+    def __init__(self, refs: Sequence[BlobRef] = (), loader: Optional[Callable[[Sequence[BlobRef]], List]] = None):
+        super().__init__()
+        self._refs = list(refs)
+        self._loader = loader
+        self._loaded = loader is None or not self._refs
+        # Records before this position are still exactly what the references hold
+        self._clean = sum(ref.count for ref in self._refs)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def refs(self) -> List[BlobRef]:
+        return self._refs
+
+    def clean_refs(self) -> List[BlobRef]:
+        """References to chunks that are still unchanged, in order"""
+        if not self._loaded:
+            return list(self._refs)
+        kept, position = [], 0
+        for ref in self._refs:
+            position += ref.count
+            if position > self._clean:
+                break
+            kept.append(ref)
+        return kept
+
+    def load(self) -> "LazyRecords":
+        if not self._loaded:
+            with _LOAD_LOCK:
+                if not self._loaded:
+                    list.extend(self, self._loader(self._refs))
+                    self._loaded = True
+        return self
+
+    def page(self, offset: int, limit: int) -> List:
+        """Records [offset, offset + limit), loading only the chunks that hold them"""
+        if self._loaded:
+            return list.__getitem__(self, slice(offset, offset + limit))
+        wanted, position, first = [], 0, None
+        for ref in self._refs:
+            if position + ref.count > offset and position < offset + limit:
+                if first is None:
+                    first = position
+                wanted.append(ref)
+            position += ref.count
+        if not wanted:
+            return []
+        records = self._loader(wanted)
+        start = offset - first
+        return records[start:start + limit]
+
+    def tail(self, count: int) -> List:
+        """The last `count` records"""
+        total = len(self)
+        return self.page(max(total - count, 0), count)
+
+    def _touched(self, position: int) -> None:
+        self._clean = min(self._clean, position)
+
+    def __len__(self) -> int:
+        if self._loaded:
+            return list.__len__(self)
+        return sum(ref.count for ref in self._refs)
+
+    def __iter__(self):
+        return list.__iter__(self.load())
+
+    def __reversed__(self):
+        return list.__reversed__(self.load())
+
+    def __getitem__(self, item):
+        return list.__getitem__(self.load(), item)
+
+    def __contains__(self, item) -> bool:
+        return list.__contains__(self.load(), item)
+
+    def __eq__(self, other) -> bool:
+        return list.__eq__(self.load(), other)
+
+    def __ne__(self, other) -> bool:
+        return list.__ne__(self.load(), other)
+
+    def __add__(self, other):
+        return list.__add__(self.load(), other)
+
+    def __repr__(self) -> str:
+        return list.__repr__(self.load())
+
+    def __reduce__(self):
+        # Copies and pickles are plain lists
+        return (list, (list(self),))
+
+    def index(self, *args):
+        return list.index(self.load(), *args)
+
+    def count(self, value) -> int:
+        return list.count(self.load(), value)
+
+    def copy(self) -> List:
+        return list(self)
+
+    def append(self, record) -> None:
+        list.append(self.load(), record)
+
+    def extend(self, records: Iterable) -> None:
+        list.extend(self.load(), records)
+
+    def __iadd__(self, records: Iterable):
+        self.extend(records)
+        return self
+
+    def insert(self, position: int, record) -> None:
+        self.load()
+        self._touched(position if position >= 0 else 0)
+        list.insert(self, position, record)
+
+    def __setitem__(self, item, value) -> None:
+        self.load()
+        self._touched(0 if isinstance(item, slice) or item < 0 else item)
+        list.__setitem__(self, item, value)
+
+    def __delitem__(self, item) -> None:
+        self.load()
+        self._touched(0 if isinstance(item, slice) or item < 0 else item)
+        list.__delitem__(self, item)
+
+    def pop(self, *args):
+        self.load()
+        self._touched(list.__len__(self) - 1 if not args or args[0] == -1 else 0)
+        return list.pop(self, *args)
+
+    def remove(self, value) -> None:
+        self.load()
+        self._touched(0)
+        list.remove(self, value)
+
+    def clear(self) -> None:
+        self.load()
+        self._touched(0)
+        list.clear(self)
+
+    def sort(self, *args, **kwargs) -> None:
+        self.load()
+        self._touched(0)
+        list.sort(self, *args, **kwargs)
+
+    def reverse(self) -> None:
+        self.load()
+        self._touched(0)
+        list.reverse(self)
+
+class SQLiteBlobStore:
+    """
+    Blobs in the context store's database, with the digests each incident references
+
+    New blobs are staged in memory and written by `write_staged` inside the
+    store's flush transaction, next to the states that reference them.
+    Every digest handed out since the last flush, new or deduplicated, is
+    pinned until that flush links it, so a prune in between cannot delete
+    a blob an unflushed state or history version still needs.
+    Digests referenced by an incident's version history are linked
+    separately, since older versions may reference chunks the latest state
+    no longer does.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+        self._conn.execute(_BLOBS_SCHEMA)
+        self._conn.execute(_INCIDENT_BLOBS_SCHEMA)
+        self._conn.execute(_HISTORY_BLOBS_SCHEMA)
+        self._staged: Dict[str, bytes] = {}
+        self._pinned: Set[str] = set()
+        self._staged_lock = threading.Lock()
+
+    def pin(self, digest: str) -> None:
+        """Keep a blob from being pruned until the next flush; call before `has` so a prune cannot slip in between"""
+        with self._staged_lock:
+            self._pinned.add(digest)
+
+    def has(self, digest: str) -> bool:
+        with self._staged_lock:
+            if digest in self._staged:
+                return True
+        with self._lock:
+            return self._conn.execute(_HAS_BLOB, (digest,)).fetchone() is not None
+
+    def put(self, digest: str, payload: bytes) -> None:
+        with self._staged_lock:
+            self._staged.setdefault(digest, payload)
+
+    def get(self, digest: str) -> Optional[bytes]:
+        with self._staged_lock:
+            payload = self._staged.get(digest)
+        if payload is not None:
+            return payload
+        with self._lock:
+            row = self._conn.execute(_SELECT_BLOB, (digest,)).fetchone()
+        return row[0] if row else None
+
+    def write_staged(self) -> Dict[str, Optional[bytes]]:
+        """Insert staged blobs; call inside the flush transaction and `clear_staged` after it commits"""
+        with self._staged_lock:
+            staged = dict(self._staged)
+            written: Dict[str, Optional[bytes]] = dict.fromkeys(self._pinned)
+        self._conn.executemany(_INSERT_BLOB, staged.items())
+        written.update(staged)
+        return written
+
+    def clear_staged(self, written: Dict[str, Optional[bytes]]) -> None:
+        """Drop the blobs and pins a committed flush wrote and linked"""
+        with self._staged_lock:
+            for digest in written:
+                self._staged.pop(digest, None)
+                self._pinned.discard(digest)
+
+    def link(self, incident_id: str, digests: Iterable[str]) -> None:
+        """Record the blobs an incident's latest state references; call inside the flush transaction"""
+        self._conn.execute(_DELETE_INCIDENT_BLOBS, (incident_id,))
+        self._conn.executemany(_INSERT_INCIDENT_BLOB, [(incident_id, digest) for digest in digests])
+
+    def link_history(self, incident_id: str, digests: Iterable[str]) -> None:
+        """Add blobs an incident's version history references; call inside the flush transaction"""
+        self._conn.executemany(_INSERT_HISTORY_BLOB, [(incident_id, digest) for digest in digests])
+
+    def unlink_history(self, incident_id: str) -> None:
+        """Drop the history's blob references; call with the database lock held"""
+        self._conn.execute(_DELETE_HISTORY_BLOBS, (incident_id,))
+
+    def unlink(self, incident_id: str) -> None:
+        with self._lock:
+            self._conn.execute(_DELETE_INCIDENT_BLOBS, (incident_id,))
+            self._conn.execute(_DELETE_HISTORY_BLOBS, (incident_id,))
+
+    def prune(self) -> int:
+        """Delete blobs no stored incident references, except those pinned for the next flush"""
+        with self._lock:
+            with self._staged_lock:
+                pinned = set(self._pinned)
+            unreferenced = [row[0] for row in self._conn.execute(_UNREFERENCED_BLOBS)]
+            doomed = [(digest,) for digest in unreferenced if digest not in pinned]
+            self._conn.executemany(_DELETE_BLOB, doomed)
+            return len(doomed)
+
+class RecordBlobs:
+    """
+    Chunked, content-addressed storage of log and metric records
+
+    Records are split into fixed-size chunks, each encoded with the store's
+    serializer and keyed by its digest. Identical chunks are stored once, so
+    saving an incident after appending records only writes its last chunks.
+    Recently read chunks stay decoded in a small LRU bounded by record count.
+    """
+
+    def __init__(self, store, serializer, chunk_records: int = 1000, hot_records: int = 200_000):
+        self.store = store
+        self.serializer = serializer
+        self.chunk_records = chunk_records
+        self.hot_records = hot_records
+
+        self._hot: "OrderedDict[str, List]" = OrderedDict()
+        self._hot_count = 0
+        self._lock = threading.Lock()
+
+        self.hot_hits = 0
+        self.reads = 0
+        self.writes = 0
+        self.dedups = 0
+
+    def write(self, records: Sequence) -> List[BlobRef]:
+        """Store records as chunks and return their references, pinned until the next flush links them"""
+        if isinstance(records, LazyRecords):
+            refs = records.clean_refs()
+            for ref in refs:
+                self.store.pin(ref.digest)
+            if not records.loaded:
+                return refs
+            # Re-chunk a trailing partial chunk together with the appended records
+            while refs and refs[-1].count < self.chunk_records:
+                refs.pop()
+            start = sum(ref.count for ref in refs)
+        else:
+            refs, start = [], 0
+
+        rows = list.__getitem__(records, slice(start, None)) if isinstance(records, list) else list(records)[start:]
+        for offset in range(0, len(rows), self.chunk_records):
+            chunk = rows[offset:offset + self.chunk_records]
+            payload = self.serializer.dumps_records(chunk)
+            digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+            self.store.pin(digest)
+            if self.store.has(digest):
+                self.dedups += 1
+            else:
+                self.store.put(digest, payload)
+                self.writes += 1
+            refs.append(BlobRef(digest=digest, count=len(chunk), size=len(payload)))
+        return refs
+
+    def read(self, refs: Sequence[BlobRef]) -> List:
+        """Records of the referenced chunks, in order"""
+        records: List = []
+        for ref in refs:
+            with self._lock:
+                chunk = self._hot.get(ref.digest)
+                if chunk is not None:
+                    self._hot.move_to_end(ref.digest)
+                    self.hot_hits += 1
+            if chunk is None:
+                payload = self.store.get(ref.digest)
+                if payload is None:
+                    raise KeyError(f"Missing record blob {ref.digest}")
+                chunk = self.serializer.loads_records(payload)
+                self.reads += 1
+                self._remember(ref.digest, chunk)
+            # Chunks are shared through the hot cache; hand out copies of the records
+            records.extend(dict(record) for record in chunk)
+        return records
+
+    def lazy(self, refs: Sequence[BlobRef]) -> LazyRecords:
+        return LazyRecords(refs, self.read)
+
+    def _remember(self, digest: str, chunk: List) -> None:
+        with self._lock:
+            if digest in self._hot:
+                return
+            self._hot[digest] = chunk
+            self._hot_count += len(chunk)
+            while self._hot_count > self.hot_records and len(self._hot) > 1:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_count -= len(evicted)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hot_chunks": len(self._hot),
+                "hot_records": self._hot_count,
+                "hot_hits": self.hot_hits,
+                "reads": self.reads,
+                "writes": self.writes,
+                "dedups": self.dedups,
+            }
@@ -0,0 +1,226 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from contracts.incident import IncidentState
+from memory.blobs import LazyRecords
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+# Rough per-object costs used by the size estimate; exact accounting would
+# need a full traversal on every save
+_RECORD_OVERHEAD = 400
+_STATE_OVERHEAD = 4096
+_REF_OVERHEAD = 200
+
+def _text_bytes(value) -> int:
+    return sys.getsizeof(value) if isinstance(value, str) else 0
+
+def _records_bytes(records) -> int:
+    total = 0
+    for record in records:
+        total += _RECORD_OVERHEAD
+        if isinstance(record, dict):
+            total += _text_bytes(record.get('message')) + _text_bytes(record.get('content'))
+            attributes = record.get('attributes') or record.get('labels')
+            if attributes:
+                total += sum(_text_bytes(value) + _text_bytes(key) for key, value in attributes.items())
+        else:
+            # Field values of a model; getattr on a missing pydantic field takes a slow path
+            values = record.__dict__
+            total += _text_bytes(values.get('message')) + _text_bytes(values.get('code'))
+    return total
+
+def estimate_state_bytes(state: IncidentState, counted: Optional[Dict] = None) -> int:
+    """
+    Approximate in-memory size of an incident state
+
+    Args:
+        state: State to measure
+        counted: Filled with what was measured per record list; pass it back
+            for the same state and only records appended since are walked
+    """
+    incident = state.incident
+    total = _STATE_OVERHEAD + _text_bytes(incident.title) + _text_bytes(incident.description)
+    counted = {} if counted is None else counted
+    for name in ("logs", "metrics", "code_references"):
+        records = getattr(incident, name)
+        if isinstance(records, LazyRecords) and not records.loaded:
+            # Still in blob storage; only the references are in memory
+            total += len(records.refs) * _REF_OVERHEAD
+            counted.pop(name, None)
+            continue
+        previous, length, size = counted.get(name, (None, 0, 0))
+        if records is not previous or len(records) < length:
+            length, size = 0, 0
+        size += _records_bytes(records[length:] if length else records)
+        counted[name] = (records, len(records), size)
+        total += size
+    # History lives in the store's journal; only count what this process has loaded
+    total += _records_bytes(state.loaded_events())
+    if state.analysis_results:
+        total += sum(_text_bytes(value) for value in state.analysis_results.values())
+    return total
+
+def _epoch(value: datetime) -> float:
+    # IncidentState timestamps are naive UTC
+    if value.tzinfo is None:
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return value.timestamp()
+
+class BoundedStateCache:
+    """
+    LRU cache of incident states bounded by entry count, estimated bytes and age
+
+    Two orderings are kept: recency of access for LRU eviction, and time of
+    last save for TTL expiry by `last_updated`. Each access only inspects the
+    front of the save ordering, so maintenance is O(1) amortised.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float = 0.0,
+        on_evict: Optional[Callable[[str, IncidentState, str], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+
+        # key -> (state, estimated bytes, records measured so far), in access order
+        self._entries: "OrderedDict[str, Tuple[IncidentState, int, Dict]]" = OrderedDict()
+        # key -> last_updated epoch seconds, in save order
+        self._saved: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"entries": 0, "bytes": 0, "ttl": 0}
+
+    def get(self, key: str) -> Optional[IncidentState]:
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, state: IncidentState) -> None:
+        with self._lock:
+            previous = self._entries.get(key)
+        # Saving the same state again only measures records appended since
+        counted = previous[2] if previous is not None and previous[0] is state else {}
+        size = estimate_state_bytes(state, counted)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (state, size, counted)
+            self.bytes += size
+            self._saved.pop(key, None)
+            self._saved[key] = _epoch(state.last_updated)
+
+            self._expire()
+            self._evict_to_bounds(keep=key)
+
+    def peek(self, key: str) -> Optional[IncidentState]:
+        """State for a key without counting a hit or refreshing its recency"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def setdefault(self, key: str, state: IncidentState) -> IncidentState:
+        with self._lock:
+            existing = self.get(key)
+            if existing is not None:
+                return existing
+            self.put(key, state)
+            return state
+
+    def pop(self, key: str) -> Optional[IncidentState]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._saved.pop(key, None)
+            if entry is None:
+                return None
+            self.bytes -= entry[1]
+            return entry[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            self._expire()
+            return list(self._entries.keys())
+
+    def items(self) -> Iterator[Tuple[str, IncidentState]]:
+        with self._lock:
+            return iter([(key, entry[0]) for key, entry in self._entries.items()])
+
+    def expire(self) -> None:
+        """Drop states past their TTL without waiting for the next access"""
+        with self._lock:
+            self._expire()
+
+    def _remove(self, key: str, reason: str) -> None:
+        state = self.pop(key)
+        self.evictions[reason] += 1
+        if state is not None and self.on_evict is not None:
+            self.on_evict(key, state, reason)
+
+    def _expire(self) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        while self._saved:
+            key, saved_at = next(iter(self._saved.items()))
+            if saved_at >= cutoff:
+                break
+            state = self._entries[key][0]
+            current = _epoch(state.last_updated)
+            if current >= cutoff:
+                # Updated in place since it was saved; requeue at its real age
+                self._saved.move_to_end(key)
+                self._saved[key] = current
+                continue
+            self._remove(key, "ttl")
+
+    def _evict_to_bounds(self, keep: str) -> None:
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.bytes > self.max_bytes
+        ):
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            reason = "entries" if len(self._entries) > self.max_entries else "bytes"
+            self._remove(key, reason)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": dict(self.evictions),
+            }
@@ -0,0 +1,150 @@
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from contracts.incident import IncidentState
+from memory.versions import StateChange, StateHistory, StateVersion
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class ConcurrentModificationError(Exception):
+    """Raised when a save expected a version of the incident that is no longer current"""
+
+class StripedLocks:
+    """Fixed pool of re-entrant locks; each incident always maps to the same stripe"""
+
+    def __init__(self, stripes: int):
+        self._locks = [threading.RLock() for _ in range(max(1, stripes))]
+
+    def lock_for(self, incident_id: str) -> threading.RLock:
+        # crc32 rather than hash() so the mapping is stable across processes
+        return self._locks[zlib.crc32(incident_id.encode()) % len(self._locks)]
+
+class VersionedStore:
+    """
+    Per-incident locking and optimistic versioning shared by the context stores
+
+    Every save bumps the incident's version. `save_context(state,
+    expected_version=...)` is a compare-and-set: it fails with
+    ConcurrentModificationError when another writer saved in between.
+    `update_context` wraps read, modify and compare-and-set in a retry loop.
+    Locks are striped by incident, so writers to different incidents never
+    contend on a shared lock. Stores record each saved version in `history`.
+    """
+
+    def __init__(self, lock_stripes: int, max_retries: int):
+        self._locks = StripedLocks(lock_stripes)
+        self.max_retries = max_retries
+        self._versions: Dict[str, int] = {}
+        self.conflicts = 0
+        self.retries = 0
+        self.history: Optional[StateHistory] = None
+
+    def lock(self, incident_id: str) -> threading.RLock:
+        """Lock serializing writers of one incident"""
+        return self._locks.lock_for(incident_id)
+
+    def stored_version(self, incident_id: str) -> int:
+        """Version of the incident last saved, by any process sharing the store; 0 if never saved"""
+        return self._stored_version(incident_id)
+
+    def refresh(self, incident_id: str) -> None:
+        """Drop the in-process copy of an incident, e.g. after losing a compare-and-set, so the next read is current"""
+        self._refresh(incident_id)
+
+    def _stored_version(self, incident_id: str) -> int:
+        return self._versions.get(incident_id, 0)
+
+    def _claim_version(self, state: IncidentState, expected_version: Optional[int]) -> None:
+        """Check the expected version and assign the next one; call with the incident lock held"""
+        current = self._stored_version(state.incident_id)
+        if expected_version is not None and expected_version != current:
+            self.conflicts += 1
+            raise ConcurrentModificationError(
+                f"Incident {state.incident_id} is at version {current}, expected {expected_version}"
+            )
+        state.version = current + 1
+        self._versions[state.incident_id] = state.version
+
+    def _forget_version(self, incident_id: str) -> None:
+        self._versions.pop(incident_id, None)
+
+    def _refresh(self, incident_id: str) -> None:
+        """Drop any stale in-process copy before a retry; stores with a cache override this"""
+
+    def update_context(
+        self,
+        incident_id: str,
+        mutate: Callable[[IncidentState], T],
+        max_retries: Optional[int] = None
+    ) -> T:
+        """
+        Apply a change to the current state of an incident and save it
+
+        Args:
+            incident_id: ID of the incident to change
+            mutate: Applies the change in place; may be called again on a fresh
+                state if another writer saved first. Conversation messages and
+                analysis steps it adds are journaled only once the save succeeds
+            max_retries: Overrides the store's retry limit
+
+        Returns:
+            Whatever `mutate` returns
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(retries + 1):
+            state = self.get_context(incident_id)
+            if state is None:
+                raise ValueError(f"Incident {incident_id} not found")
+
+            expected = state.version
+            with self.lock(incident_id):
+                if self._stored_version(incident_id) == expected:
+                    # Events the change records are journaled once it is saved, not once per attempt
+                    state.hold_events()
+                    saved = False
+                    try:
+                        result = mutate(state)
+                        try:
+                            self.save_context(state, expected_version=expected)
+                            saved = True
+                        except ConcurrentModificationError:
+                            # Another process saved between the check and the write
+                            pass
+                    finally:
+                        state.release_events(saved)
+                    if saved:
+                        return result
+                else:
+                    self.conflicts += 1
+
+            self.retries += 1
+            logger.info(f"[Store] Version conflict on incident {incident_id}, retrying ({attempt + 1}/{retries})")
+            self._refresh(incident_id)
+
+        raise ConcurrentModificationError(f"Incident {incident_id} kept changing after {retries} retries")
+
+    def save_many(self, states: List[IncidentState]) -> None:
+        """Save several states; stores override this to group the writes and index updates"""
+        for state in states:
+            self.save_context(state)
+
+    def list_versions(self, incident_id: str) -> List[StateVersion]:
+        """Saved versions of an incident, oldest first"""
+        return self.history.versions(incident_id)
+
+    def get_version(self, incident_id: str, version: int) -> Optional[IncidentState]:
+        """An incident as it was saved at a version, rebuilt from the history"""
+        return self.history.get(incident_id, version)
+
+    def diff_versions(self, incident_id: str, from_version: int, to_version: int) -> List[StateChange]:
+        """Changes to an incident between two saved versions"""
+        return self.history.diff(incident_id, from_version, to_version)
+
+    def get_concurrency_stats(self) -> Dict:
+        return {"conflicts": self.conflicts, "retries": self.retries, "max_retries": self.max_retries}
@@ -0,0 +1,354 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel
+
+from contracts.base import IncidentStatus, Severity
+from contracts.incident import IncidentState
+from memory.cache import _epoch
+
+# Exact-match fields and where they live on the incident
+EQUALITY_FIELDS = ("status", "severity", "application", "environment", "component")
+TIME_FIELDS = ("created_at", "updated_at")
+
+class IncidentQuery(BaseModel):
+    """Filters, ordering and page for listing incidents"""
+    status: Optional[List[IncidentStatus]] = None
+    severity: Optional[List[Severity]] = None
+    application: Optional[List[str]] = None
+    environment: Optional[List[str]] = None
+    component: Optional[List[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    updated_from: Optional[datetime] = None
+    updated_to: Optional[datetime] = None
+    sort_by: str = "created_at"
+    descending: bool = True
+    offset: int = 0
+    limit: int = 50
+
+class IncidentPage(BaseModel):
+    """One page of incident IDs plus the total number of matches"""
+    incident_ids: List[str]
+    total: int
+    offset: int
+    limit: int
+
+def summarize_state(state: IncidentState) -> Dict:
+    """Indexed field values of an incident state"""
+    incident = state.incident
+    return {
+        "status": getattr(incident.status, "value", incident.status),
+        "severity": getattr(incident.severity, "value", incident.severity),
+        "application": incident.context.application,
+        "environment": incident.context.environment,
+        "component": incident.context.component,
+        "created_at": _epoch(incident.created_at),
+        "updated_at": _epoch(incident.updated_at),
+    }
+
+class _DisjointUnion:
+    """Read-only union of disjoint ID sets, such as the sets for several values of one field"""
+
+    def __init__(self, sets: List[Set[str]]):
+        self._sets = sets
+
+    def __contains__(self, incident_id: str) -> bool:
+        return any(incident_id in ids for ids in self._sets)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._sets)
+
+    def __iter__(self):
+        for ids in self._sets:
+            yield from ids
+
+def _matches_ranges(summary: Dict, ranges: List[Tuple[str, float, float]]) -> bool:
+    for field, low, high in ranges:
+        if not low <= summary[field] <= high:
+            return False
+    return True
+
+class IncidentIndex:
+    """
+    Secondary indexes over incident summaries
+
+    Equality fields map each value to a set of incident IDs; time fields are
+    sorted (epoch, id) lists for range scans with bisect. Counts for every
+    pair of equality fields are kept up to date so dashboard breakdowns such
+    as "severity of open incidents" never touch individual incidents.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Dict[str, Set[str]]] = {field: {} for field in EQUALITY_FIELDS}
+        self._times: Dict[str, List[Tuple[float, str]]] = {field: [] for field in TIME_FIELDS}
+        self._summaries: Dict[str, Dict] = {}
+        # (filter field, filter value, counted field) -> counted value -> count
+        self._pair_counts: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._summaries
+
+    def add(self, incident_id: str, summary: Dict) -> None:
+        """Index or re-index an incident"""
+        with self._lock:
+            previous = self._summaries.get(incident_id)
+            if previous == summary:
+                return
+            if previous is not None:
+                self._unindex(incident_id, previous)
+            self._summaries[incident_id] = summary
+            for field in EQUALITY_FIELDS:
+                self._values[field].setdefault(summary[field], set()).add(incident_id)
+            for field in TIME_FIELDS:
+                insort(self._times[field], (summary[field], incident_id))
+            self._count_pairs(summary, 1)
+
+    def add_many(self, items: List[Tuple[str, Dict]]) -> None:
+        """Index or re-index several incidents, merging their times into the sorted indexes at once"""
+        with self._lock:
+            added: Dict[str, List[Tuple[float, str]]] = {field: [] for field in TIME_FIELDS}
+            for incident_id, summary in items:
+                previous = self._summaries.get(incident_id)
+                if previous == summary:
+                    continue
+                if previous is not None:
+                    self._unindex(incident_id, previous)
+                self._summaries[incident_id] = summary
+                for field in EQUALITY_FIELDS:
+                    self._values[field].setdefault(summary[field], set()).add(incident_id)
+                for field in TIME_FIELDS:
+                    added[field].append((summary[field], incident_id))
+                self._count_pairs(summary, 1)
+            for field, entries in added.items():
+                # Two sorted runs; the sort merges them in linear time
+                self._times[field].extend(sorted(entries))
+                self._times[field].sort()
+
+    def bulk_load(self, items: List[Tuple[str, Dict]]) -> None:
+        """Index many new incidents at once, sorting the time indexes a single time"""
+        with self._lock:
+            for incident_id, summary in items:
+                if incident_id in self._summaries:
+                    self._unindex(incident_id, self._summaries[incident_id])
+                self._summaries[incident_id] = summary
+                for field in EQUALITY_FIELDS:
+                    self._values[field].setdefault(summary[field], set()).add(incident_id)
+                self._count_pairs(summary, 1)
+            for field in TIME_FIELDS:
+                self._times[field] = sorted((summary[field], incident_id) for incident_id, summary in self._summaries.items())
+
+    def remove(self, incident_id: str) -> None:
+        with self._lock:
+            summary = self._summaries.pop(incident_id, None)
+            if summary is not None:
+                self._unindex(incident_id, summary)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {field: {} for field in EQUALITY_FIELDS}
+            self._times = {field: [] for field in TIME_FIELDS}
+            self._summaries = {}
+            self._pair_counts = {}
+
+    def _unindex(self, incident_id: str, summary: Dict) -> None:
+        for field in EQUALITY_FIELDS:
+            ids = self._values[field].get(summary[field])
+            if ids is not None:
+                ids.discard(incident_id)
+                if not ids:
+                    del self._values[field][summary[field]]
+        for field in TIME_FIELDS:
+            entries = self._times[field]
+            position = bisect_left(entries, (summary[field], incident_id))
+            if position < len(entries) and entries[position] == (summary[field], incident_id):
+                del entries[position]
+        self._count_pairs(summary, -1)
+
+    def _count_pairs(self, summary: Dict, delta: int) -> None:
+        for field in EQUALITY_FIELDS:
+            for counted in EQUALITY_FIELDS:
+                if counted == field:
+                    continue
+                counts = self._pair_counts.setdefault((field, summary[field], counted), {})
+                value = summary[counted]
+                counts[value] = counts.get(value, 0) + delta
+                if not counts[value]:
+                    del counts[value]
+
+    def _equality_filters(self, query: IncidentQuery) -> List[Tuple[str, List[str]]]:
+        return [
+            (field, [getattr(value, "value", value) for value in getattr(query, field)])
+            for field in EQUALITY_FIELDS
+            if getattr(query, field) is not None
+        ]
+
+    @staticmethod
+    def _ranges(query: IncidentQuery) -> List[Tuple[str, float, float]]:
+        ranges = []
+        for field, start, end in (
+            ("created_at", query.created_from, query.created_to),
+            ("updated_at", query.updated_from, query.updated_to),
+        ):
+            if start is not None or end is not None:
+                ranges.append((
+                    field,
+                    _epoch(start) if start is not None else float("-inf"),
+                    _epoch(end) if end is not None else float("inf"),
+                ))
+        return ranges
+
+    def _candidates(self, query: IncidentQuery):
+        """
+        IDs matching every equality filter, or None when there are none
+
+        The result may be one of the index's own sets and must not be mutated.
+        """
+        groups = [
+            [self._values[field].get(value, set()) for value in values]
+            for field, values in self._equality_filters(query)
+        ]
+        if not groups:
+            return None
+        # Start from the most selective field and probe the others per ID
+        groups.sort(key=lambda sets: sum(len(ids) for ids in sets))
+        first = groups[0]
+        result = first[0] if len(first) == 1 else _DisjointUnion(first)
+        for sets in groups[1:]:
+            if len(sets) == 1 and isinstance(result, set):
+                result = result & sets[0]
+            elif len(sets) == 1:
+                result = {incident_id for incident_id in result if incident_id in sets[0]}
+            else:
+                result = {incident_id for incident_id in result if any(incident_id in ids for ids in sets)}
+            if not result:
+                break
+        return result
+
+    def query(self, query: IncidentQuery) -> IncidentPage:
+        """
+        Find incidents matching a query
+
+        Args:
+            query: Filters, sort field and page
+
+        Returns:
+            IncidentPage with the requested page of IDs and the total match count
+        """
+        if query.sort_by not in TIME_FIELDS:
+            raise ValueError(f"Cannot sort by {query.sort_by}; expected one of {', '.join(TIME_FIELDS)}")
+        ranges = self._ranges(query)
+        sort_range = next((r for r in ranges if r[0] == query.sort_by), None)
+        others = [r for r in ranges if r[0] != query.sort_by]
+        wanted = query.offset + query.limit
+
+        with self._lock:
+            summaries = self._summaries
+            candidates = self._candidates(query)
+            entries = self._times[query.sort_by]
+            low, high = 0, len(entries)
+            if sort_range is not None:
+                low = bisect_left(entries, (sort_range[1], ""))
+                high = bisect_right(entries, (sort_range[2], "\uffff"))
+            ordered = range(high - 1, low - 1, -1) if query.descending else range(low, high)
+
+            if candidates is None and not others:
+                # Pure range scan: slice the sorted index directly
+                total = high - low
+                page = [entries[position][1] for position in ordered[query.offset:wanted]]
+            elif candidates is None:
+                page, total = [], 0
+                for position in ordered:
+                    incident_id = entries[position][1]
+                    if _matches_ranges(summaries[incident_id], others):
+                        if total >= query.offset and len(page) < query.limit:
+                            page.append(incident_id)
+                        total += 1
+            else:
+                selectivity = len(candidates) / max(len(summaries), 1)
+                if selectivity and wanted / selectivity < len(candidates):
+                    # Common filters: walk the sort order until the page is full
+                    page, seen = [], 0
+                    for position in ordered:
+                        incident_id = entries[position][1]
+                        if incident_id in candidates and _matches_ranges(summaries[incident_id], others):
+                            if seen >= query.offset:
+                                page.append(incident_id)
+                                if len(page) >= query.limit:
+                                    break
+                            seen += 1
+                    if not ranges:
+                        total = len(candidates)
+                    elif high - low < len(candidates):
+                        total = sum(
+                            1 for position in range(low, high)
+                            if entries[position][1] in candidates
+                            and _matches_ranges(summaries[entries[position][1]], others)
+                        )
+                    else:
+                        total = sum(
+                            1 for incident_id in candidates if _matches_ranges(summaries[incident_id], ranges)
+                        )
+                else:
+                    # Selective filters: sort the few matches
+                    matches = [
+                        incident_id for incident_id in candidates
+                        if _matches_ranges(summaries[incident_id], ranges)
+                    ]
+                    matches.sort(key=lambda incident_id: (summaries[incident_id][query.sort_by], incident_id),
+                                 reverse=query.descending)
+                    total = len(matches)
+                    page = matches[query.offset:wanted]
+
+        return IncidentPage(incident_ids=page, total=total, offset=query.offset, limit=query.limit)
+
+    def count_by(self, field: str, query: Optional[IncidentQuery] = None) -> Dict[str, int]:
+        """
+        Number of incidents per value of an equality field
+
+        Args:
+            field: One of the equality fields
+            query: Optional filters; ordering and page are ignored
+        """
+        if field not in EQUALITY_FIELDS:
+            raise ValueError(f"Cannot count by {field}; expected one of {', '.join(EQUALITY_FIELDS)}")
+        with self._lock:
+            filters = self._equality_filters(query) if query is not None else []
+            ranges = self._ranges(query) if query is not None else []
+
+            if not filters and not ranges:
+                return {value: len(ids) for value, ids in self._values[field].items()}
+
+            if len(filters) == 1 and not ranges and filters[0][0] != field:
+                # Single filter on another field: answered from the pair counts
+                filter_field, values = filters[0]
+                counts: Dict[str, int] = {}
+                for value in values:
+                    for counted, count in self._pair_counts.get((filter_field, value, field), {}).items():
+                        counts[counted] = counts.get(counted, 0) + count
+                return counts
+
+            candidates = self._candidates(query)
+            if candidates is None:
+                candidates = self._range_matches(ranges)
+            counts = {}
+            for incident_id in candidates:
+                summary = self._summaries[incident_id]
+                if _matches_ranges(summary, ranges):
+                    counts[summary[field]] = counts.get(summary[field], 0) + 1
+            return counts
+
+    def _range_matches(self, ranges: List[Tuple[str, float, float]]) -> List[str]:
+        """IDs inside the narrowest time range; other ranges are checked by the caller"""
+        narrowest: List[Tuple[float, str]] = []
+        for field, low, high in ranges:
+            entries = self._times[field]
+            matched = entries[bisect_left(entries, (low, "")):bisect_right(entries, (high, "\uffff"))]
+            if not narrowest or len(matched) < len(narrowest):
+                narrowest = matched
+        return [incident_id for _, incident_id in narrowest]
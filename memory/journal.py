@@ -0,0 +1,56 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Event streams kept per incident, outside the incident snapshot
+CONVERSATION = "conversation"
+ANALYSIS_STEP = "analysis_step"
+EVENT_KINDS = (CONVERSATION, ANALYSIS_STEP)
+
+class MemoryJournal:
+    """
+    In-process append-only event journal keyed by incident and event kind
+
+    Appending an event costs O(1) regardless of how large the incident's
+    logs and metrics are.
+    """
+
+    def __init__(self):
+        self._events: Dict[Tuple[str, str], List[Dict]] = {}
+        self._lock = threading.Lock()
+        self.appends = 0
+
+    def append(self, incident_id: str, kind: str, event: Dict) -> None:
+        with self._lock:
+            self._events.setdefault((incident_id, kind), []).append(event)
+            self.appends += 1
+
+    def append_many(self, events: List[Tuple[str, str, Dict]]) -> None:
+        """Append (incident_id, kind, event) entries in one go"""
+        with self._lock:
+            for incident_id, kind, event in events:
+                self._events.setdefault((incident_id, kind), []).append(event)
+            self.appends += len(events)
+
+    def read(self, incident_id: str, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Events in append order, optionally one page at a time"""
+        with self._lock:
+            events = self._events.get((incident_id, kind), [])
+            end = len(events) if limit is None else offset + limit
+            return list(events[offset:end])
+
+    def count(self, incident_id: str, kind: str) -> int:
+        with self._lock:
+            return len(self._events.get((incident_id, kind), []))
+
+    def discard(self, incident_id: str) -> None:
+        with self._lock:
+            for kind in EVENT_KINDS:
+                self._events.pop((incident_id, kind), None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "streams": len(self._events),
+                "events": sum(len(events) for events in self._events.values()),
+                "appends": self.appends,
+            }
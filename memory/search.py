@@ -0,0 +1,396 @@
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from heapq import nlargest
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from contracts.base import IncidentStatus, Severity
+from contracts.incident import IncidentState
+from memory.blobs import LazyRecords
+from monitoring.log_templates import log_template
+
+# Searchable fields and their weight in an incident's combined term frequency
+FIELD_WEIGHTS = {"title": 3.0, "component": 2.0, "description": 1.0, "templates": 1.0, "analysis": 1.0}
+# BM25 term-frequency saturation and length normalisation
+_K1 = 1.2
+_B = 0.75
+# Distinct log templates kept per incident
+_MAX_TEMPLATES = 500
+# Vocabulary terms a prefix may expand to, and how many are considered
+_MAX_EXPANSIONS = 64
+_MAX_SCANNED = 2000
+# New terms are bisected into the sorted vocabulary in batches of this size
+_MERGE_TERMS = 1024
+
+_TOKEN = re.compile(r"[^\W_]+")
+_QUERY_TOKEN = re.compile(r"([^\W_]+)(\*?)")
+# Masks left in log templates, such as <num>
+_PLACEHOLDER = re.compile(r"<\w+>")
+
+class SearchQuery(BaseModel):
+    """
+    Full-text query over incidents
+
+    Every term must match. A term ending in '*' matches any word it starts,
+    and with `prefix` the last term does too, for search as you type.
+    """
+    text: str
+    status: Optional[List[IncidentStatus]] = None
+    severity: Optional[List[Severity]] = None
+    prefix: bool = False
+    offset: int = 0
+    limit: int = 20
+
+class SearchHit(BaseModel):
+    incident_id: str
+    score: float
+
+class SearchPage(BaseModel):
+    """One page of hits, best first, plus the total number of matches"""
+    hits: List[SearchHit]
+    total: int
+    offset: int
+    limit: int
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+def _message(record) -> Optional[str]:
+    if isinstance(record, dict):
+        return record.get("message")
+    return getattr(record, "message", None)
+
+def _collect_text(value, parts: List[str]) -> None:
+    if isinstance(value, str):
+        parts.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_text(item, parts)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_text(item, parts)
+
+def _add_templates(templates: set, records) -> None:
+    for record in records:
+        if len(templates) >= _MAX_TEMPLATES:
+            return
+        message = _message(record)
+        if message:
+            templates.add(log_template(message))
+
+def _column(values: array, dtype) -> np.ndarray:
+    # Copy, so the array.array can keep growing after the query
+    return np.frombuffer(values, dtype=dtype).copy() if len(values) else np.zeros(0, dtype=dtype)
+
+class SearchIndex:
+    """
+    In-process inverted index over incident text with BM25 ranking
+
+    Title, description, component, log templates and analysis text are
+    tokenised into one weighted term-frequency vector per incident. Each term
+    keeps a posting list of (document number, frequency) in compact arrays,
+    which queries score with numpy, so a query costs a few vector operations
+    over the postings of its terms rather than a Python loop per match.
+
+    Re-indexing an incident whose terms changed gives it a new document
+    number and retires the old one; status and severity changes are applied
+    in place. Retired numbers are compacted away once they outnumber live
+    ones. Log templates are extracted incrementally, only for records
+    appended since the incident was last indexed.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        # incident_id -> document number; document number -> incident_id
+        self._docids: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._lengths = array("f")
+        self._alive = bytearray()
+        self._status = array("h")
+        self._severity = array("h")
+        self._codes: Dict[str, int] = {}
+        # term -> (document numbers, weighted frequencies)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Dict[str, int] = {}
+        # Sorted vocabulary for prefix search, plus terms not merged in yet
+        self._vocabulary: List[str] = []
+        self._recent: List[str] = []
+        self._terms: Dict[str, Dict[str, float]] = {}
+        # incident_id -> (log list, records seen, templates) as last indexed
+        self._sources: Dict[str, Tuple[object, int, set]] = {}
+        self._total_length = 0.0
+        self.queries = 0
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return len(self._docids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def document(self, state: IncidentState) -> Dict:
+        """
+        Searchable text of an incident
+
+        Only logs appended since the incident was last indexed are reduced to
+        templates; logs still in blob storage keep the templates already known.
+        """
+        incident = state.incident
+        logs = incident.logs
+        with self._lock:
+            source = self._sources.get(state.incident_id)
+        if source is not None and logs is source[0] and len(logs) >= source[1]:
+            templates = source[2]
+            if len(logs) > source[1]:
+                templates = set(templates)
+                _add_templates(templates, logs[source[1]:])
+        elif source is not None and isinstance(logs, LazyRecords) and not logs.loaded:
+            templates = source[2]
+        else:
+            templates = set()
+            _add_templates(templates, logs)
+        with self._lock:
+            self._sources[state.incident_id] = (logs, len(logs), templates)
+
+        if state.compaction is not None:
+            # Raw logs are in cold storage; the templates kept on the stub stand in for them
+            templates = templates | set(state.compaction.log_templates)
+
+        analysis: List[str] = []
+        _collect_text(state.analysis_results, analysis)
+        return {
+            "title": incident.title,
+            "description": incident.description,
+            "component": incident.context.component,
+            "templates": sorted(templates),
+            "analysis": "\n".join(analysis),
+        }
+
+    def add_state(self, state: IncidentState) -> Dict:
+        """Index or re-index an incident state; returns its document"""
+        document = self.document(state)
+        incident = state.incident
+        self.add(
+            state.incident_id,
+            document,
+            getattr(incident.status, "value", incident.status),
+            getattr(incident.severity, "value", incident.severity)
+        )
+        return document
+
+    def add_states(self, states: List[IncidentState]) -> None:
+        """Index or re-index several incident states under one acquisition of the lock"""
+        with self._lock:
+            for state in states:
+                self.add_state(state)
+
+    @staticmethod
+    def _weigh(document: Dict) -> Dict[str, float]:
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = document.get(field)
+            if not value:
+                continue
+            if field == "templates":
+                value = _PLACEHOLDER.sub(" ", "\n".join(value))
+            for token in _tokens(value):
+                terms[token] = terms.get(token, 0.0) + weight
+        return terms
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._codes)
+        return code
+
+    def add(self, incident_id: str, document: Dict, status: str, severity: str) -> None:
+        """Index or re-index an incident from a document made by `document`"""
+        terms = self._weigh(document)
+        with self._lock:
+            if incident_id not in self._sources:
+                # Loaded from storage; keep its templates for when its logs are not in memory
+                self._sources[incident_id] = (None, -1, set(document.get("templates") or ()))
+            docid = self._docids.get(incident_id)
+            if docid is not None and self._terms[incident_id] == terms:
+                self._status[docid] = self._code(status)
+                self._severity[docid] = self._code(severity)
+                return
+            if docid is not None:
+                self._retire(incident_id, docid)
+
+            docid = len(self._ids)
+            self._docids[incident_id] = docid
+            self._ids.append(incident_id)
+            length = sum(terms.values())
+            self._lengths.append(length)
+            self._alive.append(1)
+            self._status.append(self._code(status))
+            self._severity.append(self._code(severity))
+            self._total_length += length
+            self._terms[incident_id] = terms
+            for term, frequency in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("i"), array("f"))
+                    self._recent.append(term)
+                postings[0].append(docid)
+                postings[1].append(frequency)
+                self._df[term] = self._df.get(term, 0) + 1
+            if len(self._recent) >= _MERGE_TERMS:
+                self._merge_vocabulary()
+            if len(self._ids) > 1024 and len(self._ids) > 2 * len(self._docids):
+                self._compact()
+
+    def remove(self, incident_id: str) -> None:
+        with self._lock:
+            self._sources.pop(incident_id, None)
+            docid = self._docids.pop(incident_id, None)
+            if docid is not None:
+                self._retire(incident_id, docid)
+                self._terms.pop(incident_id)
+
+    def _retire(self, incident_id: str, docid: int) -> None:
+        self._alive[docid] = 0
+        self._ids[docid] = None
+        self._total_length -= self._lengths[docid]
+        for term in self._terms[incident_id]:
+            self._df[term] -= 1
+
+    def _merge_vocabulary(self) -> None:
+        # Two sorted runs; the sort merges them in linear time
+        self._vocabulary.extend(sorted(self._recent))
+        self._vocabulary.sort()
+        self._recent = []
+
+    def _compact(self) -> None:
+        """Renumber live documents and rebuild the posting lists without retired ones"""
+        terms, statuses = self._terms, {}
+        for incident_id, docid in self._docids.items():
+            statuses[incident_id] = (self._status[docid], self._severity[docid])
+        sources, codes, queries, compactions = self._sources, self._codes, self.queries, self.compactions
+        self._clear()
+        self._sources, self._codes, self.queries, self.compactions = sources, codes, queries, compactions + 1
+        for incident_id, weighted in terms.items():
+            docid = len(self._ids)
+            self._docids[incident_id] = docid
+            self._ids.append(incident_id)
+            length = sum(weighted.values())
+            self._lengths.append(length)
+            self._alive.append(1)
+            self._status.append(statuses[incident_id][0])
+            self._severity.append(statuses[incident_id][1])
+            self._total_length += length
+            for term, frequency in weighted.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("i"), array("f"))
+                postings[0].append(docid)
+                postings[1].append(frequency)
+                self._df[term] = self._df.get(term, 0) + 1
+        self._terms = terms
+        self._vocabulary = sorted(self._postings)
+
+    def _expand(self, prefix: str) -> List[str]:
+        """Most frequent live terms starting with a prefix"""
+        matches = []
+        start = bisect_left(self._vocabulary, prefix)
+        for term in self._vocabulary[start:start + _MAX_SCANNED]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        matches.extend(term for term in self._recent if term.startswith(prefix))
+        matches = [term for term in matches if self._df.get(term)]
+        if len(matches) > _MAX_EXPANSIONS:
+            matches = nlargest(_MAX_EXPANSIONS, matches, key=self._df.__getitem__)
+        return matches
+
+    def _groups(self, query: SearchQuery) -> List[List[str]]:
+        """Terms per query word; a document must match one term of every group"""
+        words = _QUERY_TOKEN.findall(query.text.lower())
+        groups = []
+        for position, (word, star) in enumerate(words):
+            if star or (query.prefix and position == len(words) - 1):
+                groups.append(self._expand(word))
+            else:
+                groups.append([word] if self._df.get(word) else [])
+        return groups
+
+    def search(self, query: SearchQuery) -> SearchPage:
+        """
+        Find incidents matching a full-text query
+
+        Args:
+            query: Text, status and severity filters, and page
+
+        Returns:
+            SearchPage with the requested page of hits by descending BM25 score
+        """
+        with self._lock:
+            self.queries += 1
+            groups = self._groups(query)
+            if not groups or not all(groups) or not self._docids:
+                return SearchPage(hits=[], total=0, offset=query.offset, limit=query.limit)
+
+            size = len(self._ids)
+            live = len(self._docids)
+            lengths = _column(self._lengths, np.float32)
+            norm = _K1 * (1 - _B + _B * lengths / (self._total_length / live))
+            matched = np.frombuffer(bytes(self._alive), dtype=np.bool_).copy()
+            for field, column in (("status", self._status), ("severity", self._severity)):
+                values = getattr(query, field)
+                if values is not None:
+                    codes = [self._codes.get(getattr(value, "value", value), -1) for value in values]
+                    matched &= np.isin(_column(column, np.int16), codes)
+
+            scores = np.zeros(size, dtype=np.float64)
+            for terms in groups:
+                docids, weights = [], []
+                for term in terms:
+                    postings, frequencies = self._postings[term]
+                    postings = _column(postings, np.int32)
+                    frequencies = _column(frequencies, np.float32)
+                    df = self._df[term]
+                    idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                    docids.append(postings)
+                    weights.append(idf * frequencies * (_K1 + 1) / (frequencies + norm[postings]))
+                if len(terms) > 1:
+                    docids, weights = [np.concatenate(docids)], [np.concatenate(weights)]
+                docids = docids[0]
+                scores += np.bincount(docids, weights=weights[0], minlength=size)
+                hit = np.zeros(size, dtype=np.bool_)
+                hit[docids] = True
+                matched &= hit
+
+            candidates = np.flatnonzero(matched)
+            total = len(candidates)
+            wanted = query.offset + query.limit
+            ranked = scores[candidates]
+            if total > wanted > 0:
+                best = np.argpartition(-ranked, wanted - 1)[:wanted]
+            else:
+                best = np.arange(total)
+            best = best[np.argsort(-ranked[best], kind="stable")][query.offset:wanted]
+            hits = [
+                SearchHit(incident_id=self._ids[candidates[position]], score=float(ranked[position]))
+                for position in best
+            ]
+        return SearchPage(hits=hits, total=total, offset=query.offset, limit=query.limit)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "documents": len(self._docids),
+                "retired": len(self._ids) - len(self._docids),
+                "terms": sum(1 for count in self._df.values() if count),
+                "queries": self.queries,
+                "compactions": self.compactions,
+            }
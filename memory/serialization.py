@@ -0,0 +1,320 @@
+import json
+import struct
+import zlib
+from operator import itemgetter
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, get_args
+from pydantic import BaseModel
+
+from contracts.incident import IncidentState
+from memory.blobs import BlobRef
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Envelope: magic, schema version, codec id, compression id
+MAGIC = b"IST"
+# 2: logs and metrics may be blob references instead of inline columns
+SCHEMA_VERSION = 2
+_HEADER = struct.Struct(">3sBBB")
+
+# Lists on the incident stored column by column
+_RECORD_LISTS = ("logs", "metrics")
+
+# schema version -> upgrade of a decoded body to the next version
+_UPGRADES: Dict[int, Callable[[Dict], Dict]] = {
+    # Inline columns are still valid in version 2
+    1: lambda body: body,
+}
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_MISSING = object()
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _orjson_dumps(data) -> bytes:
+    return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+def _json_dumps(data) -> bytes:
+    return json.dumps(data, default=_json_default, separators=(",", ":")).encode()
+
+def _msgpack_dumps(data) -> bytes:
+    return msgpack.packb(data, default=_json_default, use_bin_type=True)
+
+def _msgpack_loads(payload: bytes):
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+def _zstd_compress(payload: bytes, level: Optional[int]) -> bytes:
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compress(payload)
+
+def _zstd_decompress(payload: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+# name -> (envelope id, available, dumps, loads)
+CODECS: Dict[str, Tuple[int, bool, Callable, Callable]] = {
+    "json": (1, True, _json_dumps, json.loads),
+    "orjson": (2, orjson is not None, _orjson_dumps, orjson.loads if orjson else None),
+    "msgpack": (3, msgpack is not None, _msgpack_dumps, _msgpack_loads),
+}
+
+# name -> (envelope id, available, compress(payload, level), decompress)
+COMPRESSORS: Dict[str, Tuple[int, bool, Callable, Callable]] = {
+    "none": (0, True, lambda payload, level: payload, lambda payload: payload),
+    "zlib": (1, True, lambda payload, level: zlib.compress(payload, 6 if level is None else level), zlib.decompress),
+    "zstd": (2, zstandard is not None, _zstd_compress, _zstd_decompress),
+    "lz4": (
+        3,
+        lz4_frame is not None,
+        lambda payload, level: lz4_frame.compress(payload, compression_level=level or 0),
+        lz4_frame.decompress if lz4_frame else None
+    ),
+}
+
+_CODEC_IDS = {spec[0]: name for name, spec in CODECS.items()}
+_COMPRESSOR_IDS = {spec[0]: name for name, spec in COMPRESSORS.items()}
+
+# model class -> whether its fields only hold plain values
+_FLAT_MODELS: Dict[type, bool] = {}
+
+def _holds_model(annotation) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_holds_model(arg) for arg in get_args(annotation))
+
+def _as_dict(record) -> Dict:
+    if isinstance(record, dict):
+        return record
+    cls = type(record)
+    flat = _FLAT_MODELS.get(cls)
+    if flat is None:
+        flat = _FLAT_MODELS[cls] = not any(_holds_model(field.annotation) for field in cls.model_fields.values())
+    # Log and metric models hold plain values, so their field dict is what model_dump would build
+    return record.__dict__ if flat else record.model_dump()
+
+def _encode_timestamps(values) -> Optional[Dict]:
+    """Integer microseconds since the epoch, if every value is a datetime with one offset"""
+    first = values[0]
+    if not isinstance(first, datetime):
+        return None
+    offset = first.utcoffset()
+    if not all(isinstance(value, datetime) and value.utcoffset() == offset for value in values):
+        return None
+    if offset is None:
+        return {"epoch_us": [(value - _EPOCH) // _MICROSECOND for value in values], "tz": None}
+    return {
+        "epoch_us": [(value - _EPOCH_UTC) // _MICROSECOND for value in values],
+        "tz": int(offset.total_seconds()),
+    }
+
+def _decode_timestamps(column: Dict) -> List[datetime]:
+    if column["tz"] is None:
+        return [_EPOCH + value * _MICROSECOND for value in column["epoch_us"]]
+    tz = timezone(timedelta(seconds=column["tz"]))
+    return [(_EPOCH_UTC + value * _MICROSECOND).astimezone(tz) for value in column["epoch_us"]]
+
+def encode_records(records: List) -> Dict:
+    """
+    Columnar form of a list of log or metric records
+
+    Each key becomes one list of values, so repeated keys are written once and
+    timestamps shrink to integers. Rows missing a key are listed in `absent`.
+    """
+    rows = [_as_dict(record) for record in records]
+    if not rows:
+        return {"count": 0, "columns": {}}
+
+    keys = list(rows[0])
+    if all(row.keys() == rows[0].keys() for row in rows):
+        # Uniform records, the usual case: transpose in one pass
+        getter = itemgetter(*keys)
+        transposed = zip(*map(getter, rows)) if len(keys) > 1 else [list(map(getter, rows))]
+        columns = {}
+        for key, values in zip(keys, transposed):
+            columns[key] = _encode_timestamps(values) or {"values": list(values)}
+        return {"count": len(rows), "columns": columns}
+
+    union: Dict[str, None] = {}
+    for row in rows:
+        union.update(dict.fromkeys(row))
+    columns = {}
+    for key in union:
+        values = [row.get(key, _MISSING) for row in rows]
+        absent = [position for position, value in enumerate(values) if value is _MISSING]
+        present = [value for value in values if value is not _MISSING]
+        column = (_encode_timestamps(present) if present else None) or {"values": present}
+        if absent:
+            column["absent"] = absent
+        columns[key] = column
+    return {"count": len(rows), "columns": columns}
+
+def decode_records(data: Dict) -> List[Dict]:
+    """Rebuild the records written by `encode_records`"""
+    count = data["count"]
+    columns = {
+        key: _decode_timestamps(column) if "epoch_us" in column else column["values"]
+        for key, column in data["columns"].items()
+    }
+    if not any("absent" in column for column in data["columns"].values()):
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*columns.values())] if keys else [{} for _ in range(count)]
+
+    rows: List[Dict] = [{} for _ in range(count)]
+    for key, values in columns.items():
+        absent = data["columns"][key].get("absent")
+        if absent:
+            skipped = set(absent)
+            targets = [row for position, row in enumerate(rows) if position not in skipped]
+        else:
+            targets = rows
+        for row, value in zip(targets, values):
+            row[key] = value
+    return rows
+
+class StateSerializer:
+    """
+    Compact binary encoding of incident states
+
+    Payloads are a small envelope header followed by the compressed body. The
+    header records the schema version, codec and compressor, so any serializer
+    can read what another one wrote, and older schema versions are upgraded on
+    read. Logs and metrics are stored column by column, inline or as separate
+    record blobs.
+    """
+
+    def __init__(self, codec: str = "orjson", compression: str = "zstd", level: Optional[int] = None):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec}; expected one of {', '.join(CODECS)}")
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression {compression}; expected one of {', '.join(COMPRESSORS)}")
+        if not CODECS[codec][1]:
+            logger.warning(f"[Serialization] {codec} is not installed, falling back to json")
+            codec = "json"
+        if not COMPRESSORS[compression][1]:
+            logger.warning(f"[Serialization] {compression} is not installed, falling back to zlib")
+            compression = "zlib"
+        self.codec = codec
+        self.compression = compression
+        self.level = level
+
+    def to_body(self, state: IncidentState, blobs=None) -> Dict:
+        """
+        Plain-data form of a state
+
+        With a RecordBlobs store, logs and metrics are written there as chunks
+        and the body only holds their references.
+        """
+        incident = state.incident
+        body = state.model_dump(mode="json", exclude={"incident": set(_RECORD_LISTS)}, warnings=False)
+        for name in _RECORD_LISTS:
+            records = getattr(incident, name)
+            if blobs is not None:
+                body["incident"][name] = {"refs": [ref.model_dump() for ref in blobs.write(records)]}
+            else:
+                body["incident"][name] = encode_records(records)
+        return body
+
+    def pack(self, body) -> bytes:
+        codec_id, _, dumps, _ = CODECS[self.codec]
+        compressor_id, _, compress, _ = COMPRESSORS[self.compression]
+        return _HEADER.pack(MAGIC, SCHEMA_VERSION, codec_id, compressor_id) + compress(dumps(body), self.level)
+
+    @staticmethod
+    def blob_digests(body: Dict) -> List[str]:
+        """Digests of the record blobs a body from `to_body` references"""
+        return [
+            ref["digest"]
+            for name in _RECORD_LISTS
+            for ref in body["incident"][name].get("refs", [])
+        ]
+
+    def _unpack(self, payload) -> Tuple[int, Any]:
+        if not self.is_envelope(payload):
+            raise ValueError("Payload is not an incident state envelope")
+
+        payload = bytes(payload)
+        _, version, codec_id, compressor_id = _HEADER.unpack_from(payload)
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Incident state schema {version} is newer than supported ({SCHEMA_VERSION})")
+        codec, compression = _CODEC_IDS.get(codec_id), _COMPRESSOR_IDS.get(compressor_id)
+        if codec is None or compression is None or not CODECS[codec][1] or not COMPRESSORS[compression][1]:
+            raise ValueError(f"Cannot decode incident state with codec {codec_id} and compression {compressor_id}")
+        return version, CODECS[codec][3](COMPRESSORS[compression][3](payload[_HEADER.size:]))
+
+    def dumps(self, state: IncidentState, blobs=None) -> bytes:
+        return self.pack(self.to_body(state, blobs))
+
+    def dumps_records(self, records: List) -> bytes:
+        """Envelope holding one columnar chunk of records"""
+        return self.pack(encode_records(records))
+
+    def loads_records(self, payload) -> List[Dict]:
+        return decode_records(self.unpack(payload))
+
+    def unpack(self, payload) -> Any:
+        """Body of an envelope written by `pack`"""
+        return self._unpack(payload)[1]
+
+    @staticmethod
+    def is_envelope(payload: Any) -> bool:
+        return isinstance(payload, (bytes, memoryview)) and bytes(payload[:len(MAGIC)]) == MAGIC
+
+    def loads(self, payload, blobs=None) -> IncidentState:
+        """
+        Rebuild an incident state from bytes written by `dumps`
+
+        Logs and metrics stored as blob references come back as lazily loaded
+        lists; pass the RecordBlobs store they were written to.
+        """
+        version, body = self._unpack(payload)
+        for step in range(version, SCHEMA_VERSION):
+            body = _UPGRADES[step](body)
+        return self.from_body(body, blobs)
+
+    @staticmethod
+    def from_body(body: Dict, blobs=None) -> IncidentState:
+        records = {}
+        for name in _RECORD_LISTS:
+            data = body["incident"].pop(name)
+            if "refs" in data:
+                if blobs is None:
+                    raise ValueError(f"Incident {name} are stored as blobs but no blob store was given")
+                records[name] = blobs.lazy([BlobRef(**ref) for ref in data["refs"]])
+            else:
+                records[name] = decode_records(data)
+        body["incident"].update({name: [] for name in _RECORD_LISTS})
+        state = IncidentState.model_validate(body)
+        for name, values in records.items():
+            setattr(state.incident, name, values)
+        return state
@@ -0,0 +1,394 @@
+import json
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from contracts.incident import IncidentState
+from memory.concurrency import ConcurrentModificationError
+from memory.index import IncidentPage, IncidentQuery, summarize_state
+from memory.search import SearchPage, SearchQuery
+from memory.serialization import _json_default
+from memory.sqlite_store import _COUNT_EVENTS, _UPSERT, SQLiteContextStore, SQLiteJournal
+from monitoring.trace_index import trace_index_registry
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+_CHANGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incident_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    incident_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    origin TEXT NOT NULL
+)
+"""
+_INSERT_CHANGE = "INSERT INTO incident_changes (incident_id, version, kind, origin) VALUES (?, ?, ?, ?)"
+_SELECT_CHANGES = "SELECT seq, incident_id, version, kind, origin FROM incident_changes WHERE seq > ? ORDER BY seq"
+_LAST_CHANGE = "SELECT COALESCE(MAX(seq), 0) FROM incident_changes"
+_TRIM_CHANGES = "DELETE FROM incident_changes WHERE seq <= ?"
+_SELECT_VERSION = "SELECT version FROM incident_states WHERE incident_id = ?"
+_SELECT_SUMMARY = "SELECT summary, search FROM incident_states WHERE incident_id = ?"
+# Sequence number and event in one statement, so concurrent writers never collide
+_APPEND_EVENT = """
+INSERT INTO incident_events (incident_id, kind, seq, payload)
+SELECT ?, ?, COALESCE(MAX(seq) + 1, 0), ? FROM incident_events WHERE incident_id = ? AND kind = ?
+"""
+
+SAVED = "save"
+DELETED = "delete"
+EVENT = "event"
+
+class SharedSQLiteJournal(SQLiteJournal):
+    """
+    Event journal safe for several processes appending to one database
+
+    Sequence numbers are assigned by the database instead of a per-process
+    counter, and each append is announced in the change log.
+    """
+
+    origin: str = ""
+
+    def append(self, incident_id: str, kind: str, event: Dict) -> None:
+        payload = json.dumps(event, default=_json_default)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(_APPEND_EVENT, (incident_id, kind, payload, incident_id, kind))
+                self._conn.execute(_INSERT_CHANGE, (incident_id, 0, EVENT, self.origin))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.appends += 1
+
+    def append_many(self, events: List[Tuple[str, str, Dict]]) -> None:
+        rows = [(incident_id, kind, json.dumps(event, default=_json_default)) for incident_id, kind, event in events]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    _APPEND_EVENT, [(incident_id, kind, payload, incident_id, kind) for incident_id, kind, payload in rows]
+                )
+                self._conn.executemany(
+                    _INSERT_CHANGE, [(incident_id, 0, EVENT, self.origin) for incident_id, _, _ in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.appends += len(rows)
+
+    def count(self, incident_id: str, kind: str) -> int:
+        with self._lock:
+            return self._conn.execute(_COUNT_EVENTS, (incident_id, kind)).fetchone()[0]
+
+class SharedSQLiteContextStore(SQLiteContextStore):
+    """
+    SQLite context store shared by several processes on one host
+
+    Every save is written through immediately inside a write transaction that
+    re-checks the stored version, so compare-and-set holds across processes,
+    and is recorded in a change log. Each process watches `PRAGMA
+    data_version`, which moves only when another connection commits, and
+    replays new change-log entries to drop stale cached states, refresh its
+    indexes and versions, and reload history. The watcher runs every
+    `flush_interval` seconds and before reads.
+
+    WAL mode needs shared memory, so all processes must be on the same host;
+    replicas on other hosts need a networked database instead.
+    """
+
+    _journal_class = SharedSQLiteJournal
+
+    def __init__(self, path: str, changes_retained: int = 100_000, **kwargs):
+        self.origin = uuid.uuid4().hex
+        self.changes_retained = changes_retained
+        self._data_version = None
+        self._last_seq = 0
+        self._sync_lock = threading.Lock()
+        self.syncs = 0
+        self.remote_changes = 0
+        super().__init__(path, **kwargs)
+
+        self.journal.origin = self.origin
+        with self._db_lock:
+            self._conn.execute(_CHANGES_SCHEMA)
+            self._last_seq = self._conn.execute(_LAST_CHANGE).fetchone()[0]
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _stored_version(self, incident_id: str) -> int:
+        with self._db_lock:
+            row = self._conn.execute(_SELECT_VERSION, (incident_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _refresh(self, incident_id: str) -> None:
+        # Another process may have saved; read the incident from disk again
+        with self._lock:
+            self._cache.pop(incident_id)
+
+    def save_context(self, state: IncidentState, expected_version: Optional[int] = None) -> None:
+        """
+        Write an incident state through to the database
+
+        Args:
+            state: State to save
+            expected_version: When given, only save if the stored version still
+                matches; raises ConcurrentModificationError otherwise
+        """
+        logger.info(f"[Store] Saving incident state: {state.incident_id}")
+        with self.lock(state.incident_id):
+            state.attach_journal(self.journal)
+            while True:
+                current = self._stored_version(state.incident_id)
+                if expected_version is not None and expected_version != current:
+                    self.conflicts += 1
+                    raise ConcurrentModificationError(
+                        f"Incident {state.incident_id} is at version {current}, expected {expected_version}"
+                    )
+                # Serialize outside the write transaction, then confirm nobody saved meanwhile
+                state.version = current + 1
+                body = self.serializer.to_body(state, self.blobs)
+                summary = summarize_state(state)
+                row = (
+                    state.incident_id,
+                    state.last_updated.isoformat(),
+                    self.serializer.pack(body),
+                    json.dumps(summary),
+                    state.version,
+                    json.dumps(self.search.document(state))
+                )
+                if self._write(row, self.serializer.blob_digests(body), current):
+                    break
+                if expected_version is not None:
+                    self.conflicts += 1
+                    raise ConcurrentModificationError(f"Incident {state.incident_id} changed while saving")
+
+            self._versions[state.incident_id] = state.version
+            self.history.record(state)
+            # Saves are written through, so the version goes to disk now rather than with a batch
+            self._write_history()
+            self.index.add(state.incident_id, summary)
+            self.search.add_state(state)
+            with self._lock:
+                self._cache.put(state.incident_id, state)
+
+    def save_many(self, states: List[IncidentState]) -> None:
+        """
+        Write several states through to the database in one transaction
+
+        If another process saved any of them meanwhile, nothing is written
+        and the states are saved one at a time instead.
+        """
+        logger.info(f"[Store] Saving {len(states)} incident states")
+        writes = []
+        summaries = []
+        events = []
+        for state in states:
+            with self.lock(state.incident_id):
+                state.attach_journal(self.journal, events)
+                current = self._stored_version(state.incident_id)
+                state.version = current + 1
+                body = self.serializer.to_body(state, self.blobs)
+                summary = summarize_state(state)
+                summaries.append((state.incident_id, summary))
+                row = (
+                    state.incident_id,
+                    state.last_updated.isoformat(),
+                    self.serializer.pack(body),
+                    json.dumps(summary),
+                    state.version,
+                    json.dumps(self.search.document(state))
+                )
+                writes.append((row, self.serializer.blob_digests(body), current))
+        self.journal.append_many(events)
+        if not self._write_many(writes):
+            for state in states:
+                self.save_context(state)
+            return
+
+        for state in states:
+            self._versions[state.incident_id] = state.version
+            self.history.record(state)
+            with self._lock:
+                self._cache.put(state.incident_id, state)
+        self._write_history()
+        self.index.add_many(summaries)
+        self.search.add_states(states)
+
+    def _write_many(self, writes: List[Tuple[tuple, List[str], int]]) -> bool:
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for row, digests, expected in writes:
+                    stored = self._conn.execute(_SELECT_VERSION, (row[0],)).fetchone()
+                    if (stored[0] if stored else 0) != expected:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                blobs = self.blob_store.write_staged()
+                self._conn.executemany(_UPSERT, [row for row, _, _ in writes])
+                for row, digests, _ in writes:
+                    self.blob_store.link(row[0], digests)
+                self._conn.executemany(
+                    _INSERT_CHANGE, [(row[0], row[4], SAVED, self.origin) for row, _, _ in writes]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.blob_store.clear_staged(blobs)
+        self.writes += len(writes)
+        return True
+
+    def _write(self, row: tuple, digests: List[str], expected: int) -> bool:
+        incident_id, version = row[0], row[4]
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = self._conn.execute(_SELECT_VERSION, (incident_id,)).fetchone()
+                if (stored[0] if stored else 0) != expected:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                blobs = self.blob_store.write_staged()
+                self._conn.execute(_UPSERT, row)
+                self.blob_store.link(incident_id, digests)
+                self._conn.execute(_INSERT_CHANGE, (incident_id, version, SAVED, self.origin))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.blob_store.clear_staged(blobs)
+        self.writes += 1
+        return True
+
+    def flush(self) -> int:
+        """Nothing is pending; saves are written through"""
+        return 0
+
+    def get_context(self, incident_id: str) -> Optional[IncidentState]:
+        self.sync()
+        return super().get_context(incident_id)
+
+    def list_incidents(self) -> List[str]:
+        self.sync()
+        return super().list_incidents()
+
+    def query_incidents(self, query: IncidentQuery) -> IncidentPage:
+        self.sync()
+        return super().query_incidents(query)
+
+    def count_incidents(self, field: str, query: Optional[IncidentQuery] = None) -> Dict[str, int]:
+        self.sync()
+        return super().count_incidents(field, query)
+
+    def search_incidents(self, query: SearchQuery) -> SearchPage:
+        self.sync()
+        return super().search_incidents(query)
+
+    def _record_removed(self, incident_ids: List[str]) -> None:
+        with self._db_lock:
+            self._conn.executemany(
+                _INSERT_CHANGE, [(incident_id, 0, DELETED, self.origin) for incident_id in incident_ids]
+            )
+
+    def sync(self) -> int:
+        """
+        Apply changes other processes committed since the last call
+
+        Returns:
+            Number of remote changes applied
+        """
+        with self._sync_lock:
+            with self._db_lock:
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self._data_version:
+                    return 0
+                self._data_version = data_version
+                changes = self._conn.execute(_SELECT_CHANGES, (self._last_seq,)).fetchall()
+            if not changes:
+                return 0
+
+            if changes[0][0] > self._last_seq + 1 and self._last_seq:
+                # Entries were trimmed before this process read them; start over
+                logger.warning("[Store] Missed trimmed change-log entries, reloading indexes")
+                self._reload()
+                self._last_seq = changes[-1][0]
+                return len(changes)
+
+            self._last_seq = changes[-1][0]
+            latest: Dict[str, tuple] = {}
+            events = set()
+            for _, incident_id, version, kind, origin in changes:
+                if origin == self.origin:
+                    continue
+                if kind == EVENT:
+                    events.add(incident_id)
+                else:
+                    latest[incident_id] = (kind, version)
+
+            for incident_id, (kind, version) in latest.items():
+                self._apply_remote(incident_id, kind, version)
+            for incident_id in events - set(latest):
+                state = self._cache.get(incident_id)
+                if state is not None:
+                    state.forget_loaded_events()
+
+            applied = len(latest) + len(events)
+            self.syncs += 1
+            self.remote_changes += applied
+            return applied
+
+    def _apply_remote(self, incident_id: str, kind: str, version: int) -> None:
+        with self._lock:
+            self._cache.pop(incident_id)
+        trace_index_registry.discard(incident_id)
+        if kind == DELETED:
+            self.index.remove(incident_id)
+            self.search.remove(incident_id)
+            self._forget_version(incident_id)
+            return
+        with self._db_lock:
+            row = self._conn.execute(_SELECT_SUMMARY, (incident_id,)).fetchone()
+        if row is None:
+            return
+        self._versions[incident_id] = max(version, self._versions.get(incident_id, 0))
+        summary = json.loads(row[0])
+        self.index.add(incident_id, summary)
+        # Templates are re-read from the stored document, not this process's copy of the logs
+        self.search.remove(incident_id)
+        if row[1] is not None:
+            self.search.add(incident_id, json.loads(row[1]), summary["status"], summary["severity"])
+
+    def _reload(self) -> None:
+        with self._lock:
+            for incident_id in self._cache.keys():
+                self._cache.pop(incident_id)
+        self.index.clear()
+        self.search.clear()
+        self._versions.clear()
+        self._load_index()
+
+    def _flush_periodically(self) -> None:
+        trimmed_at = 0
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.sync()
+                if self._last_seq - trimmed_at > self.changes_retained:
+                    trimmed_at = self._last_seq
+                    with self._db_lock:
+                        self._conn.execute(_TRIM_CHANGES, (self._last_seq - self.changes_retained,))
+            except Exception as e:
+                logger.error(f"[Store] Failed to sync with other processes: {str(e)}")
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats.update({
+            "backend": "shared-sqlite",
+            "origin": self.origin,
+            "last_change": self._last_seq,
+            "syncs": self.syncs,
+            "remote_changes": self.remote_changes,
+        })
+        return stats
@@ -0,0 +1,519 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from contracts.incident import IncidentState
+from memory.blobs import RecordBlobs, SQLiteBlobStore
+from memory.cache import BoundedStateCache
+from memory.concurrency import VersionedStore
+from memory.index import IncidentIndex, IncidentPage, IncidentQuery, summarize_state
+from memory.journal import EVENT_KINDS
+from memory.search import SearchIndex, SearchPage, SearchQuery
+from memory.serialization import StateSerializer, _json_default
+from memory.versions import SQLiteStateHistory
+from monitoring.trace_index import trace_index_registry
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Lists on the incident that hold plain dicts whose 'timestamp' the UI reads as a datetime
+_INCIDENT_RECORD_LISTS = ("logs", "metrics")
+# History lists embedded in snapshots written before the event journal existed
+_LEGACY_EVENT_LISTS = {"conversation_history": "conversation", "analysis_steps": "analysis_step"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incident_states (
+    incident_id TEXT PRIMARY KEY,
+    last_updated TEXT NOT NULL,
+    state TEXT NOT NULL,
+    summary TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    search TEXT
+)
+"""
+_UPSERT = """
+INSERT INTO incident_states (incident_id, last_updated, state, summary, version, search) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(incident_id) DO UPDATE SET
+    last_updated = excluded.last_updated, state = excluded.state, summary = excluded.summary,
+    version = excluded.version, search = excluded.search
+"""
+_SELECT = "SELECT state FROM incident_states WHERE incident_id = ?"
+_SELECT_IDS = "SELECT incident_id FROM incident_states ORDER BY rowid"
+_SELECT_SUMMARIES = "SELECT incident_id, summary, state IS NOT NULL AND summary IS NULL, version, search FROM incident_states"
+_UPDATE_SUMMARY = "UPDATE incident_states SET summary = ? WHERE incident_id = ?"
+_UPDATE_SEARCH = "UPDATE incident_states SET search = ? WHERE incident_id = ?"
+_SELECT_OLDER = "SELECT incident_id FROM incident_states WHERE last_updated < ?"
+_DELETE_OLDER = "DELETE FROM incident_states WHERE last_updated < ?"
+
+_EVENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incident_events (
+    incident_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (incident_id, kind, seq)
+) WITHOUT ROWID
+"""
+_INSERT_EVENT = "INSERT INTO incident_events (incident_id, kind, seq, payload) VALUES (?, ?, ?, ?)"
+_SELECT_EVENTS = "SELECT payload FROM incident_events WHERE incident_id = ? AND kind = ? ORDER BY seq LIMIT ? OFFSET ?"
+_COUNT_EVENTS = "SELECT COALESCE(MAX(seq) + 1, 0) FROM incident_events WHERE incident_id = ? AND kind = ?"
+_DELETE_EVENTS = "DELETE FROM incident_events WHERE incident_id = ?"
+
+def _revive_timestamps(records: List) -> List:
+    for record in records:
+        if isinstance(record, dict) and isinstance(record.get('timestamp'), str):
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+    return records
+
+def encode_state(state: IncidentState) -> str:
+    """
+    Serialize an incident state to JSON
+
+    Incident logs and metrics are kept as the plain records they were stored
+    as; validating them back through the declared models would drop fields
+    such as log attributes.
+    """
+    incident = state.incident
+    data = state.model_dump(mode="json", exclude={"incident": set(_INCIDENT_RECORD_LISTS)}, warnings=False)
+    data["incident"].update({name: list(getattr(incident, name)) for name in _INCIDENT_RECORD_LISTS})
+    return json.dumps(data, default=_json_default)
+
+def decode_state(payload, journal=None) -> IncidentState:
+    """
+    Rebuild an incident state written by `encode_state`
+
+    History embedded by older snapshots is buffered for the journal, unless
+    the journal already holds that incident's events.
+    """
+    data = _json_loads(payload)
+    records = {name: _revive_timestamps(data["incident"].pop(name, [])) for name in _INCIDENT_RECORD_LISTS}
+    legacy = {kind: _revive_timestamps(data.pop(name, None) or []) for name, kind in _LEGACY_EVENT_LISTS.items()}
+
+    data["incident"].update({name: [] for name in _INCIDENT_RECORD_LISTS})
+    state = IncidentState.model_validate(data)
+    for name, values in records.items():
+        setattr(state.incident, name, values)
+    for kind, events in legacy.items():
+        if events and (journal is None or not journal.count(state.incident_id, kind)):
+            state.buffer_events(kind, events)
+    return state
+
+class SQLiteJournal:
+    """
+    Append-only event journal in the store's database
+
+    Each event is one small INSERT, so recording history no longer rewrites
+    the incident snapshot. Reads page through the (incident, kind, seq)
+    primary key.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+        self._conn.execute(_EVENTS_SCHEMA)
+        # (incident_id, kind) -> next sequence number
+        self._next_seq: Dict[tuple, int] = {}
+        self.appends = 0
+
+    def _seq(self, incident_id: str, kind: str) -> int:
+        key = (incident_id, kind)
+        if key not in self._next_seq:
+            self._next_seq[key] = self._conn.execute(_COUNT_EVENTS, key).fetchone()[0]
+        return self._next_seq[key]
+
+    def append(self, incident_id: str, kind: str, event: Dict) -> None:
+        payload = json.dumps(event, default=_json_default)
+        with self._lock:
+            seq = self._seq(incident_id, kind)
+            self._conn.execute(_INSERT_EVENT, (incident_id, kind, seq, payload))
+            self._next_seq[(incident_id, kind)] = seq + 1
+            self.appends += 1
+
+    def append_many(self, events: List[Tuple[str, str, Dict]]) -> None:
+        """Append (incident_id, kind, event) entries in one transaction"""
+        rows = [(incident_id, kind, json.dumps(event, default=_json_default)) for incident_id, kind, event in events]
+        with self._lock:
+            next_seq = dict(self._next_seq)
+            self._conn.execute("BEGIN")
+            try:
+                for incident_id, kind, payload in rows:
+                    seq = self._seq(incident_id, kind)
+                    self._conn.execute(_INSERT_EVENT, (incident_id, kind, seq, payload))
+                    self._next_seq[(incident_id, kind)] = seq + 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._next_seq = next_seq
+                raise
+            self.appends += len(rows)
+
+    def read(self, incident_id: str, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                _SELECT_EVENTS, (incident_id, kind, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return _revive_timestamps([_json_loads(row[0]) for row in rows])
+
+    def count(self, incident_id: str, kind: str) -> int:
+        with self._lock:
+            return self._seq(incident_id, kind)
+
+    def discard(self, incident_id: str) -> None:
+        with self._lock:
+            self._conn.execute(_DELETE_EVENTS, (incident_id,))
+            for kind in EVENT_KINDS:
+                self._next_seq.pop((incident_id, kind), None)
+
+class SQLiteContextStore(VersionedStore):
+    """
+    Persistent ContextStore backed by SQLite in WAL mode
+
+    Saved states go to an in-process read-through cache immediately and are
+    written to disk in batches: when `batch_size` incidents are pending, or
+    by a background flusher every `flush_interval` seconds. Repeated saves of
+    the same incident between flushes are coalesced into one write.
+    Logs and metrics are written as content-addressed chunk blobs, and states
+    read back from disk load them only when first used.
+    """
+
+    _journal_class = SQLiteJournal
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        cache: Optional[BoundedStateCache] = None,
+        lock_stripes: int = 64,
+        max_retries: int = 3,
+        serializer: Optional[StateSerializer] = None,
+        blob_chunk_records: int = 1000,
+        blob_cache_records: int = 200_000,
+        history_keyframe_interval: int = 50
+    ):
+        super().__init__(lock_stripes, max_retries)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._migrate()
+
+        # Evicting from the cache only drops the in-process copy; the row stays on disk
+        self._cache = cache if cache is not None else BoundedStateCache(1000, 256 * 1024 * 1024)
+        if self._cache.on_evict is None:
+            self._cache.on_evict = self._on_evict
+        self.serializer = serializer if serializer is not None else StateSerializer()
+        self._pending: Dict[str, IncidentState] = {}
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+
+        self.writes = 0
+        self.flushes = 0
+        self.serialize_failures = 0
+
+        self.journal = self._journal_class(self._conn, self._db_lock)
+        # Logs and metrics live out of line; states hold chunk references and load them lazily
+        self.blob_store = SQLiteBlobStore(self._conn, self._db_lock)
+        self.blobs = RecordBlobs(self.blob_store, self.serializer, blob_chunk_records, blob_cache_records)
+        self.history = SQLiteStateHistory(
+            self._conn, self._db_lock, self.blob_store,
+            serializer=self.serializer, keyframe_interval=history_keyframe_interval, blobs=self.blobs
+        )
+
+        # Indexes cover every stored incident, not just the cached ones
+        self.index = IncidentIndex()
+        self.search = SearchIndex()
+        self._load_index()
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="sqlite-store-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(incident_states)")}
+        if "summary" not in columns:
+            self._conn.execute("ALTER TABLE incident_states ADD COLUMN summary TEXT")
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE incident_states ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        if "search" not in columns:
+            self._conn.execute("ALTER TABLE incident_states ADD COLUMN search TEXT")
+
+    def _load_index(self) -> None:
+        backfill = []
+        backfill_search = []
+        summaries = []
+        for incident_id, summary, missing, version, search in self._conn.execute(_SELECT_SUMMARIES).fetchall():
+            self._versions[incident_id] = version
+            state = None
+            if missing:
+                # Written before summaries existed; decode once and store one
+                row = self._conn.execute(_SELECT, (incident_id,)).fetchone()
+                state = self._decode(row[0])
+                summary = json.dumps(summarize_state(state))
+                backfill.append((summary, incident_id))
+            summary = _json_loads(summary)
+            summaries.append((incident_id, summary))
+            if search is None:
+                # Written before full-text search existed
+                if state is None:
+                    state = self._decode(self._conn.execute(_SELECT, (incident_id,)).fetchone()[0])
+                search = json.dumps(self.search.document(state))
+                backfill_search.append((search, incident_id))
+            self.search.add(incident_id, _json_loads(search), summary["status"], summary["severity"])
+        self.index.bulk_load(summaries)
+        if backfill:
+            self._conn.executemany(_UPDATE_SUMMARY, backfill)
+        if backfill_search:
+            self._conn.executemany(_UPDATE_SEARCH, backfill_search)
+        logger.info(f"[Store] Indexed {len(self.index)} stored incidents")
+
+    def _on_evict(self, incident_id: str, state: IncidentState, reason: str) -> None:
+        # The next read decodes new log lists; the trace index is rebuilt for them then
+        trace_index_registry.discard(incident_id)
+
+    def _decode(self, payload) -> IncidentState:
+        # Rows written before binary envelopes hold JSON text
+        if self.serializer.is_envelope(payload):
+            return self.serializer.loads(payload, self.blobs)
+        return decode_state(payload, self.journal)
+
+    def save_context(self, state: IncidentState, expected_version: Optional[int] = None) -> None:
+        """
+        Save incident state
+
+        Args:
+            state: State to save
+            expected_version: When given, only save if the stored version still
+                matches; raises ConcurrentModificationError otherwise
+        """
+        logger.info(f"[Store] Saving incident state: {state.incident_id}")
+        with self.lock(state.incident_id):
+            self._claim_version(state, expected_version)
+            self.history.record(state)
+            state.attach_journal(self.journal)
+            self.index.add(state.incident_id, summarize_state(state))
+            self.search.add_state(state)
+            with self._lock:
+                self._cache.put(state.incident_id, state)
+                self._pending[state.incident_id] = state
+                flush_now = len(self._pending) >= self.batch_size
+        if flush_now:
+            self.flush()
+
+    def save_many(self, states: List[IncidentState]) -> None:
+        """Save several states and write them and their events in grouped transactions, updating the indexes once"""
+        logger.info(f"[Store] Saving {len(states)} incident states")
+        events = []
+        for state in states:
+            with self.lock(state.incident_id):
+                self._claim_version(state, None)
+                self.history.record(state)
+                state.attach_journal(self.journal, events)
+                with self._lock:
+                    self._cache.put(state.incident_id, state)
+                    self._pending[state.incident_id] = state
+        self.journal.append_many(events)
+        self.index.add_many([(state.incident_id, summarize_state(state)) for state in states])
+        self.search.add_states(states)
+        self.flush()
+
+    def get_context(self, incident_id: str) -> Optional[IncidentState]:
+        """Get incident state by ID"""
+        with self._lock:
+            state = self._cache.get(incident_id)
+            if state is None:
+                # Evicted from the cache before its batch was written
+                state = self._pending.get(incident_id)
+            if state is not None:
+                return state
+
+        with self._db_lock:
+            row = self._conn.execute(_SELECT, (incident_id,)).fetchone()
+        if row is None:
+            return None
+
+        state = self._decode(row[0])
+        state.attach_journal(self.journal)
+        with self._lock:
+            # A concurrent save wins over the copy just read from disk
+            return self._cache.setdefault(incident_id, state)
+
+    def list_incidents(self) -> List[str]:
+        """Get list of all incident IDs"""
+        with self._db_lock:
+            stored = [row[0] for row in self._conn.execute(_SELECT_IDS)]
+        known = set(stored)
+        with self._lock:
+            pending = [incident_id for incident_id in self._pending if incident_id not in known]
+        return stored + pending
+
+    def cleanup_old_incidents(self, max_age_days: int = 30) -> None:
+        """Remove old incidents"""
+        self.flush()
+        cutoff = (datetime.utcnow() - timedelta(days=max_age_days)).isoformat()
+        with self._db_lock:
+            removed = [row[0] for row in self._conn.execute(_SELECT_OLDER, (cutoff,))]
+            self._conn.execute(_DELETE_OLDER, (cutoff,))
+        for incident_id in removed:
+            self.journal.discard(incident_id)
+            self.history.discard(incident_id)
+            trace_index_registry.discard(incident_id)
+            self.blob_store.unlink(incident_id)
+        if removed:
+            self.blob_store.prune()
+        with self._lock:
+            for incident_id in removed:
+                self._cache.pop(incident_id)
+                self.index.remove(incident_id)
+                self.search.remove(incident_id)
+                self._forget_version(incident_id)
+        self._record_removed(removed)
+
+    def _record_removed(self, incident_ids: List[str]) -> None:
+        """Called after incidents are deleted; the shared store announces them to other processes"""
+
+    def query_incidents(self, query: IncidentQuery) -> IncidentPage:
+        """Get a page of incident IDs matching the query, newest first by default"""
+        return self.index.query(query)
+
+    def count_incidents(self, field: str, query: Optional[IncidentQuery] = None) -> Dict[str, int]:
+        """Count incidents per value of status, severity, application, environment or component"""
+        return self.index.count_by(field, query)
+
+    def search_incidents(self, query: SearchQuery) -> SearchPage:
+        """Full-text search over incident text, log templates and analyses, best match first"""
+        return self.search.search(query)
+
+    def flush(self) -> int:
+        """
+        Write pending states to disk in one transaction
+
+        Returns:
+            Number of incidents written
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+        rows = []
+        links = []
+        unwritten = {}
+        for incident_id, state in pending.items():
+            try:
+                body = self.serializer.to_body(state, self.blobs)
+                rows.append((
+                    incident_id,
+                    state.last_updated.isoformat(),
+                    self.serializer.pack(body),
+                    json.dumps(summarize_state(state)),
+                    state.version,
+                    json.dumps(self.search.document(state))
+                ))
+                links.append((incident_id, self.serializer.blob_digests(body)))
+            except Exception as e:
+                logger.error(f"[Store] Failed to serialize incident {incident_id}, keeping it pending: {str(e)}")
+                self.serialize_failures += 1
+                unwritten[incident_id] = state
+
+        if unwritten:
+            with self._lock:
+                # Retried on the next flush unless a newer save replaced it meanwhile
+                for incident_id, state in unwritten.items():
+                    self._pending.setdefault(incident_id, state)
+
+        try:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                blobs = self.blob_store.write_staged()
+                self._conn.executemany(_UPSERT, rows)
+                for incident_id, digests in links:
+                    self.blob_store.link(incident_id, digests)
+                versions = self.history.write_staged()
+                self._conn.execute("COMMIT")
+            self.blob_store.clear_staged(blobs)
+            self.history.clear_staged(versions)
+        except Exception as e:
+            logger.error(f"[Store] Failed to write {len(rows)} incidents: {str(e)}")
+            with self._db_lock:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            with self._lock:
+                # Keep newer saves, requeue the rest for the next flush
+                for incident_id, state in pending.items():
+                    self._pending.setdefault(incident_id, state)
+            return 0
+
+        self.writes += len(rows)
+        self.flushes += 1
+        return len(rows)
+
+    def _write_history(self) -> None:
+        """Write staged history versions, and the blobs their keyframes reference, in one transaction"""
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                blobs = self.blob_store.write_staged()
+                versions = self.history.write_staged()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.blob_store.clear_staged(blobs)
+        self.history.clear_staged(versions)
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Flush pending writes and close the database"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        # A periodic flush may be writing; let it finish before the last one
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "serialization": f"{self.serializer.codec}+{self.serializer.compression}",
+                "pending": len(self._pending),
+                "indexed": len(self.index),
+                "search": self.search.get_stats(),
+                "journal_appends": self.journal.appends,
+                "history": self.history.get_stats(),
+                "blobs": self.blobs.get_stats(),
+                "writes": self.writes,
+                "flushes": self.flushes,
+                "serialize_failures": self.serialize_failures,
+                "cache": self._cache.get_stats(),
+                "concurrency": self.get_concurrency_stats(),
+            }
@@ -2,21 +2,85 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from pydantic import BaseModel
 
+from contracts.base import IncidentStatus
 from contracts.incident import IncidentState
+from contracts.settings import StoreSettings, settings
+from memory.cache import BoundedStateCache
+from memory.concurrency import VersionedStore
+from memory.index import IncidentIndex, IncidentPage, IncidentQuery, summarize_state
+from memory.journal import MemoryJournal
+from memory.search import SearchIndex, SearchPage, SearchQuery
+from memory.serialization import StateSerializer
+from memory.shared_store import SharedSQLiteContextStore
+from memory.sqlite_store import SQLiteContextStore
+from memory.tiering import ColdStorage, RetentionTiering
+from memory.versions import StateHistory
+from monitoring.trace_index import trace_index_registry
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
-class ContextStore:
-    def __init__(self):
-        self.store: Dict[str, IncidentState] = {}
+class ContextStore(VersionedStore):
+    def __init__(
+        self,
+        max_entries: int = settings.store.cache_max_entries,
+        max_bytes: int = settings.store.cache_max_bytes,
+        ttl_seconds: float = settings.store.cache_ttl_seconds,
+        lock_stripes: int = settings.store.lock_stripes,
+        max_retries: int = settings.store.update_retries,
+        history_keyframe_interval: int = settings.store.history_keyframe_interval
+    ):
+        super().__init__(lock_stripes, max_retries)
+        self.history = StateHistory(keyframe_interval=history_keyframe_interval)
+        self.index = IncidentIndex()
+        self.search = SearchIndex()
+        self.journal = MemoryJournal()
+        self.store = BoundedStateCache(max_entries, max_bytes, ttl_seconds, on_evict=self._on_evict)
 
-    def save_context(self, state: IncidentState) -> None:
-        """Save incident state"""
-        logger.info(f"[Store] Saving incident state: {state}")
-        self.store[state.incident_id] = state
+    def _on_evict(self, incident_id: str, state: IncidentState, reason: str) -> None:
+        self.index.remove(incident_id)
+        self.search.remove(incident_id)
+        self.journal.discard(incident_id)
+        self.history.discard(incident_id)
+        trace_index_registry.discard(incident_id)
+        self._forget_version(incident_id)
+        logger.info(f"[Store] Evicted incident state {incident_id} ({reason})")
+
+    def save_context(self, state: IncidentState, expected_version: Optional[int] = None) -> None:
+        """
+        Save incident state
+
+        Args:
+            state: State to save
+            expected_version: When given, only save if the stored version still
+                matches; raises ConcurrentModificationError otherwise
+        """
+        logger.info(f"[Store] Saving incident state: {state.incident_id}")
+        with self.lock(state.incident_id):
+            self._claim_version(state, expected_version)
+            self.history.record(state)
+            state.attach_journal(self.journal)
+            self.index.add(state.incident_id, summarize_state(state))
+            self.search.add_state(state)
+            self.store.put(state.incident_id, state)
+
+    def save_many(self, states: List[IncidentState]) -> None:
+        """Save several states, appending their events and updating the indexes once for all of them"""
+        logger.info(f"[Store] Saving {len(states)} incident states")
+        events = []
+        for state in states:
+            with self.lock(state.incident_id):
+                self._claim_version(state, None)
+                self.history.record(state)
+                state.attach_journal(self.journal, events)
+                self.store.put(state.incident_id, state)
+        self.journal.append_many(events)
+        # A batch larger than the cache evicts some of its own states
+        states = [state for state in states if self.store.peek(state.incident_id) is state]
+        self.index.add_many([(state.incident_id, summarize_state(state)) for state in states])
+        self.search.add_states(states)
 
     def get_context(self, incident_id: str) -> Optional[IncidentState]:
         """Get incident state by ID"""
@@ -36,7 +100,105 @@ class ContextStore:
                 to_remove.append(incident_id)
                 
         for incident_id in to_remove:
-            del self.store[incident_id]
+            self.store.pop(incident_id)
+            self.index.remove(incident_id)
+            self.search.remove(incident_id)
+            self.journal.discard(incident_id)
+            self.history.discard(incident_id)
+            trace_index_registry.discard(incident_id)
+            self._forget_version(incident_id)
+
+    def query_incidents(self, query: IncidentQuery) -> IncidentPage:
+        """Get a page of incident IDs matching the query, newest first by default"""
+        self.store.expire()
+        return self.index.query(query)
+
+    def count_incidents(self, field: str, query: Optional[IncidentQuery] = None) -> Dict[str, int]:
+        """Count incidents per value of status, severity, application, environment or component"""
+        self.store.expire()
+        return self.index.count_by(field, query)
+
+    def search_incidents(self, query: SearchQuery) -> SearchPage:
+        """Full-text search over incident text, log templates and analyses, best match first"""
+        self.store.expire()
+        return self.search.search(query)
+
+    def flush(self) -> int:
+        """Nothing to flush; states live in memory only"""
+        return 0
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": "memory",
+            "indexed": len(self.index),
+            "search": self.search.get_stats(),
+            "cache": self.store.get_stats(),
+            "journal": self.journal.get_stats(),
+            "history": self.history.get_stats(),
+            "concurrency": self.get_concurrency_stats(),
+        }
+
+def create_context_store(config: StoreSettings):
+    """Build the context store selected by STORE_BACKEND"""
+    if config.backend in ("sqlite", "shared-sqlite"):
+        options = dict(
+            batch_size=config.batch_size,
+            flush_interval=config.flush_interval_seconds,
+            cache=BoundedStateCache(config.cache_max_entries, config.cache_max_bytes, config.cache_ttl_seconds),
+            lock_stripes=config.lock_stripes,
+            max_retries=config.update_retries,
+            serializer=StateSerializer(config.serialization_codec, config.serialization_compression),
+            blob_chunk_records=config.blob_chunk_records,
+            blob_cache_records=config.blob_cache_records,
+            history_keyframe_interval=config.history_keyframe_interval
+        )
+        if config.backend == "shared-sqlite":
+            logger.info(f"[Store] Using shared SQLite store at {config.sqlite_path}")
+            return SharedSQLiteContextStore(config.sqlite_path, **options)
+        logger.info(f"[Store] Using SQLite store at {config.sqlite_path}")
+        return SQLiteContextStore(config.sqlite_path, **options)
+    if config.backend == "wal":
+        # Imported here; the WAL store builds on ContextStore
+        from memory.wal_store import WALContextStore
+        logger.info(f"[Store] Using write-ahead logged store at {config.wal_dir}")
+        return WALContextStore(
+            config.wal_dir,
+            sync=config.wal_sync,
+            commit_delay=config.wal_commit_delay_seconds,
+            snapshot_bytes=config.wal_snapshot_bytes,
+            serializer=StateSerializer(config.serialization_codec, config.serialization_compression),
+            max_entries=config.cache_max_entries,
+            max_bytes=config.cache_max_bytes,
+            ttl_seconds=config.cache_ttl_seconds,
+            lock_stripes=config.lock_stripes,
+            max_retries=config.update_retries,
+            history_keyframe_interval=config.history_keyframe_interval
+        )
+    return ContextStore(
+        config.cache_max_entries,
+        config.cache_max_bytes,
+        config.cache_ttl_seconds,
+        lock_stripes=config.lock_stripes,
+        max_retries=config.update_retries,
+        history_keyframe_interval=config.history_keyframe_interval
+    )
+
+def create_tiering_job(store, config: StoreSettings) -> RetentionTiering:
+    """Build the retention tiering job for a store; started unless STORE_TIERING_INTERVAL_SECONDS is 0"""
+    job = RetentionTiering(
+        store,
+        ColdStorage(config.tiering_cold_dir, StateSerializer(config.serialization_codec, config.serialization_compression)),
+        ages={
+            IncidentStatus.RESOLVED: config.tiering_resolved_after_hours * 3600,
+            IncidentStatus.CLOSED: config.tiering_closed_after_hours * 3600,
+        },
+        rollup_seconds=config.tiering_rollup_seconds,
+        interval=config.tiering_interval_seconds
+    )
+    if config.tiering_interval_seconds > 0:
+        job.start()
+    return job
 
-# Create singleton instance
-context_store = ContextStore()
\ No newline at end of file
+# Create singleton instances
+context_store = create_context_store(settings.store)
+tiering_job = create_tiering_job(context_store, settings.store)
\ No newline at end of file
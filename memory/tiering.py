@@ -0,0 +1,347 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from contracts.base import IncidentStatus
+from contracts.incident import CompactionInfo, IncidentState
+from memory.cache import _epoch, estimate_state_bytes
+from memory.concurrency import ConcurrentModificationError
+from memory.index import IncidentQuery
+from memory.serialization import StateSerializer
+from memory.wal import fsync_directory
+from monitoring.log_templates import log_template
+from monitoring.trace_index import trace_index_registry
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+_RECORD_LISTS = ("logs", "metrics")
+
+def _field(record, name: str) -> Any:
+    return record.get(name) if isinstance(record, dict) else getattr(record, name, None)
+
+def _timestamp(value) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+def compact_logs(logs: Iterable, previous: Iterable[Dict] = ()) -> List[Dict]:
+    """
+    Reduce log records to one entry per template
+
+    Each entry holds the template, how many records it covers per level, and
+    the first and last timestamps (ISO strings). Entries from an earlier
+    compaction of the same incident are merged in.
+    """
+    entries: Dict[str, Dict] = {}
+    for entry in previous:
+        entries[entry["template"]] = dict(entry, levels=dict(entry["levels"]))
+    for record in logs:
+        template = log_template(_field(record, "message") or "")
+        level = _field(record, "level") or "unknown"
+        at = _timestamp(_field(record, "timestamp")).isoformat()
+        entry = entries.get(template)
+        if entry is None:
+            entries[template] = {"template": template, "count": 1, "levels": {level: 1}, "first": at, "last": at}
+            continue
+        entry["count"] += 1
+        entry["levels"][level] = entry["levels"].get(level, 0) + 1
+        entry["first"] = min(entry["first"], at)
+        entry["last"] = max(entry["last"], at)
+    return sorted(entries.values(), key=lambda entry: -entry["count"])
+
+def rollup_metrics(metrics: Iterable, bucket_seconds: int, previous: Iterable[Dict] = ()) -> List[Dict]:
+    """
+    Downsample metric points into fixed time buckets per series
+
+    A series is a metric name, type and label set. Each rollup holds the
+    bucket start, point count, sum, min, max and last value; entries from an
+    earlier compaction of the same incident are merged in.
+    """
+    rollups: Dict[tuple, Dict] = {}
+    for rollup in previous:
+        key = (rollup["name"], rollup["type"], tuple(sorted(rollup["labels"].items())), rollup["start"])
+        rollups[key] = dict(rollup)
+    for point in metrics:
+        at = _timestamp(_field(point, "timestamp"))
+        epoch = _epoch(at)
+        start = datetime.utcfromtimestamp(epoch - epoch % bucket_seconds).isoformat()
+        labels = _field(point, "labels") or {}
+        kind = _field(point, "type")
+        kind = getattr(kind, "value", kind)
+        name = _field(point, "name")
+        value = float(_field(point, "value"))
+        key = (name, kind, tuple(sorted(labels.items())), start)
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollups[key] = {
+                "name": name, "type": kind, "labels": dict(labels), "start": start, "seconds": bucket_seconds,
+                "count": 1, "sum": value, "min": value, "max": value, "last": value, "last_at": at.isoformat(),
+            }
+            continue
+        rollup["count"] += 1
+        rollup["sum"] += value
+        rollup["min"] = min(rollup["min"], value)
+        rollup["max"] = max(rollup["max"], value)
+        if at.isoformat() >= rollup["last_at"]:
+            rollup["last"] = value
+            rollup["last_at"] = at.isoformat()
+    return sorted(rollups.values(), key=lambda rollup: (rollup["name"], rollup["start"]))
+
+class ColdStorage:
+    """
+    Compacted incidents as one compressed file each
+
+    Files are written to a temporary name, fsynced and renamed, so a reader
+    sees either the previous copy or the new one.
+    """
+
+    def __init__(self, directory: str, serializer: Optional[StateSerializer] = None):
+        self.directory = directory
+        self.serializer = serializer if serializer is not None else StateSerializer()
+        self.writes = 0
+        self.bytes_written = 0
+
+    def _path(self, incident_id: str) -> str:
+        return os.path.join(self.directory, quote(incident_id, safe="") + ".cold")
+
+    def put(self, incident_id: str, compacted: Dict) -> int:
+        """Write a compacted incident; returns its size in bytes"""
+        os.makedirs(self.directory, exist_ok=True)
+        payload = self.serializer.pack(compacted)
+        path = self._path(incident_id)
+        partial = path + ".tmp"
+        with open(partial, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(partial, path)
+        fsync_directory(self.directory)
+        self.writes += 1
+        self.bytes_written += len(payload)
+        return len(payload)
+
+    def get(self, incident_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(incident_id), "rb") as handle:
+                return self.serializer.unpack(handle.read())
+        except FileNotFoundError:
+            return None
+
+    def delete(self, incident_id: str) -> None:
+        try:
+            os.remove(self._path(incident_id))
+        except FileNotFoundError:
+            pass
+
+    def get_stats(self) -> Dict:
+        return {"directory": self.directory, "writes": self.writes, "bytes_written": self.bytes_written}
+
+class RetentionTiering:
+    """
+    Background job compacting resolved and closed incidents
+
+    `ages` maps each status to how long, in seconds since the incident was
+    last updated, it stays at full fidelity; each status is a tier. Once an
+    incident is older, its raw logs are replaced by templates with counts and
+    its metrics by rollups of `rollup_seconds`, and that compacted copy goes
+    to cold storage with the rest of the state. The store keeps a stub: the
+    incident and its analysis without logs or metrics, plus the log templates
+    so it stays searchable. Version history keeps every version without its
+    logs and metrics, so it still shows how the incident and its analysis
+    changed.
+
+    A compacted incident that is reopened and gains records is compacted
+    again later, merged with its earlier cold copy.
+    """
+
+    def __init__(
+        self,
+        store,
+        cold: ColdStorage,
+        ages: Dict[IncidentStatus, float],
+        rollup_seconds: int = 300,
+        interval: float = 3600.0,
+        batch_size: int = 500
+    ):
+        self.store = store
+        self.cold = cold
+        self.ages = {getattr(status, "value", status): seconds for status, seconds in ages.items()}
+        self.rollup_seconds = max(1, rollup_seconds)
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        # incident_id -> version saved by the last compaction, to skip stubs without loading them
+        self._compacted: Dict[str, int] = {}
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.runs = 0
+        self.failures = 0
+        self.pruned_blobs = 0
+        self.last_run_seconds = 0.0
+        self.tiers = {
+            tier: {"incidents": 0, "logs": 0, "metrics": 0, "bytes_before": 0, "bytes_after": 0,
+                   "bytes_reclaimed": 0, "cold_bytes": 0}
+            for tier in self.ages
+        }
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_periodically, name="retention-tiering", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def _run_periodically(self) -> None:
+        while not self._closed.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"[Tiering] Run failed: {str(e)}")
+
+    def _candidates(self, tier: str, cutoff: datetime) -> List[str]:
+        ids: List[str] = []
+        while True:
+            page = self.store.query_incidents(IncidentQuery(
+                status=[tier], updated_to=cutoff, sort_by="updated_at", descending=False,
+                offset=len(ids), limit=self.batch_size
+            ))
+            ids.extend(page.incident_ids)
+            if not page.incident_ids or len(ids) >= page.total:
+                return ids
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        Compact every incident old enough for its tier
+
+        Returns:
+            Number of incidents compacted
+        """
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        compacted = 0
+        for tier, seconds in self.ages.items():
+            for incident_id in self._candidates(tier, now - timedelta(seconds=seconds)):
+                if self._compacted.get(incident_id) == self.store.stored_version(incident_id):
+                    continue
+                if self.compact(incident_id, tier):
+                    compacted += 1
+        blob_store = getattr(self.store, "blob_store", None)
+        if compacted and blob_store is not None:
+            # Stubs no longer reference their record chunks once written
+            self.store.flush()
+            self.pruned_blobs += blob_store.prune()
+        self.runs += 1
+        self.last_run_seconds = time.perf_counter() - started
+        if compacted:
+            logger.info(f"[Tiering] Compacted {compacted} incidents in {self.last_run_seconds:.1f}s")
+        return compacted
+
+    def _compacted_copy(self, state: IncidentState, tier: str, previous: Optional[Dict]) -> Dict:
+        incident = state.incident
+        previous = previous or {}
+        return {
+            "incident_id": state.incident_id,
+            "tier": tier,
+            "compacted_at": datetime.utcnow().isoformat(),
+            "state": state.model_dump(mode="json", exclude={"incident": set(_RECORD_LISTS)}, warnings=False),
+            "log_count": previous.get("log_count", 0) + len(incident.logs),
+            "metric_count": previous.get("metric_count", 0) + len(incident.metrics),
+            "log_templates": compact_logs(incident.logs, previous.get("log_templates", ())),
+            "metric_rollups": rollup_metrics(incident.metrics, self.rollup_seconds, previous.get("metric_rollups", ())),
+        }
+
+    def compact(self, incident_id: str, tier: str) -> bool:
+        """
+        Move an incident's raw records to cold storage and leave a stub
+
+        Returns:
+            False if the incident is gone, no longer in the tier, already
+            compacted, or was saved by another writer meanwhile
+        """
+        state = self.store.get_context(incident_id)
+        if state is None:
+            return False
+        with self.store.lock(incident_id):
+            incident = state.incident
+            if state.version != self.store.stored_version(incident_id):
+                return False
+            if getattr(incident.status, "value", incident.status) != tier:
+                return False
+            if state.compaction is not None and not incident.logs and not incident.metrics:
+                self._compacted[incident_id] = state.version
+                return False
+
+            incident.load_records()
+            before = estimate_state_bytes(state)
+            previous = self.cold.get(incident_id) if state.compaction is not None else None
+            copy = self._compacted_copy(state, tier, previous)
+            cold_bytes = self.cold.put(incident_id, copy)
+
+            # Built on a copy: the cached state is shared and keeps its records until the stub is saved
+            tail = None
+            if state.live_tail is not None:
+                tail = state.live_tail.model_copy(deep=True)
+                tail.reseed([], [])
+            stub = state.model_copy(update={
+                "incident": incident.model_copy(update={"logs": [], "metrics": []}),
+                "live_tail": tail,
+                "compaction": CompactionInfo(
+                    tier=tier,
+                    compacted_at=datetime.utcnow(),
+                    log_templates=[entry["template"] for entry in copy["log_templates"]],
+                    log_count=copy["log_count"],
+                    metric_count=copy["metric_count"],
+                ),
+            })
+            after = estimate_state_bytes(stub)
+            stub.compaction.bytes_reclaimed = max(0, before - after)
+            try:
+                self.store.save_context(stub, expected_version=state.version)
+            except ConcurrentModificationError:
+                # Another process saved first; restore the cold copy, drop the stale state and retry on the next run
+                if previous is not None:
+                    self.cold.put(incident_id, previous)
+                else:
+                    self.cold.delete(incident_id)
+                self.store.refresh(incident_id)
+                return False
+            # Older versions still hold the raw records
+            self.store.history.drop_records(incident_id)
+            trace_index_registry.discard(incident_id)
+            self._compacted[incident_id] = stub.version
+
+        with self._lock:
+            totals = self.tiers[tier]
+            totals["incidents"] += 1
+            totals["logs"] += copy["log_count"] - (previous or {}).get("log_count", 0)
+            totals["metrics"] += copy["metric_count"] - (previous or {}).get("metric_count", 0)
+            totals["bytes_before"] += before
+            totals["bytes_after"] += after
+            totals["bytes_reclaimed"] += max(0, before - after)
+            totals["cold_bytes"] += cold_bytes
+        return True
+
+    def load_compacted(self, incident_id: str) -> Optional[Dict]:
+        """The cold copy of a compacted incident: state, log templates and metric rollups"""
+        return self.cold.get(incident_id)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "failures": self.failures,
+                "pruned_blobs": self.pruned_blobs,
+                "last_run_seconds": self.last_run_seconds,
+                "ages": dict(self.ages),
+                "tiers": {tier: dict(totals) for tier, totals in self.tiers.items()},
+                "cold": self.cold.get_stats(),
+            }
@@ -0,0 +1,520 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+
+from contracts.incident import IncidentState
+from memory.blobs import BlobRef
+from memory.serialization import StateSerializer, decode_records, encode_records
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+# Lists on the incident versioned as appended rows rather than compared value by value
+_RECORD_LISTS = ("logs", "metrics")
+
+_VERSIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incident_versions (
+    incident_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    saved_at TEXT NOT NULL,
+    keyframe INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (incident_id, version)
+) WITHOUT ROWID
+"""
+_INSERT_VERSION = """
+INSERT OR REPLACE INTO incident_versions (incident_id, version, saved_at, keyframe, payload) VALUES (?, ?, ?, ?, ?)
+"""
+# Entries from the last keyframe at or before a version up to that version
+_SELECT_CHAIN = """
+SELECT version, saved_at, keyframe, payload FROM incident_versions
+WHERE incident_id = ? AND version <= ? AND version >= (
+    SELECT MAX(version) FROM incident_versions WHERE incident_id = ? AND version <= ? AND keyframe = 1
+)
+ORDER BY version
+"""
+_SELECT_VERSIONS = "SELECT version, saved_at, keyframe, LENGTH(payload) FROM incident_versions WHERE incident_id = ? ORDER BY version"
+_SELECT_ENTRIES = "SELECT version, saved_at, keyframe, payload FROM incident_versions WHERE incident_id = ? ORDER BY version"
+_DELETE_VERSIONS = "DELETE FROM incident_versions WHERE incident_id = ?"
+_VERSION_TOTALS = "SELECT COUNT(*), SUM(keyframe), SUM(LENGTH(payload)) FROM incident_versions"
+
+def _referenced_bytes(records: Dict) -> int:
+    """Size of the record blobs a keyframe references, which rebuilding it decodes too"""
+    return sum(ref["size"] for encoded in records.values() for ref in encoded.get("refs", ()))
+
+class StateVersion(BaseModel):
+    """One saved version of an incident"""
+    version: int
+    saved_at: str
+    keyframe: bool
+    bytes: int
+
+class StateChange(BaseModel):
+    """
+    One difference between two versions
+
+    `op` is "added", "removed", "changed", or "appended" for lists that only
+    grew, in which case `new` holds the appended items.
+    """
+    path: str
+    op: str
+    old: Any = None
+    new: Any = None
+
+def delta(old: Any, new: Any) -> Optional[Dict]:
+    """
+    Structural delta turning `old` into `new`, or None if they are equal
+
+    Dicts are diffed key by key, lists that only grew store the appended
+    items, and anything else is replaced.
+    """
+    if old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes: Dict[str, Any] = {}
+        added = {key: value for key, value in new.items() if key not in old}
+        removed = [key for key in old if key not in new]
+        nested = {}
+        for key, value in new.items():
+            if key in old:
+                change = delta(old[key], value)
+                if change is not None:
+                    nested[key] = change
+        if added:
+            changes["set"] = added
+        if removed:
+            changes["del"] = removed
+        if nested:
+            changes["sub"] = nested
+        return {"~": changes}
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        return {"+": new[len(old):]}
+    return {"=": new}
+
+def apply_delta(value: Any, change: Optional[Dict]) -> Any:
+    """Apply a delta from `delta`; the input may be modified"""
+    if change is None:
+        return value
+    if "=" in change:
+        return change["="]
+    if "+" in change:
+        return value + change["+"]
+    changes = change["~"]
+    for key in changes.get("del", ()):
+        value.pop(key, None)
+    value.update(changes.get("set", {}))
+    for key, nested in changes.get("sub", {}).items():
+        value[key] = apply_delta(value[key], nested)
+    return value
+
+def _changes(old: Any, new: Any, path: str, out: List[StateChange]) -> None:
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            child = f"{path}.{key}" if path else str(key)
+            if key not in old:
+                out.append(StateChange(path=child, op="added", new=value))
+            else:
+                _changes(old[key], value, child, out)
+        for key in old:
+            if key not in new:
+                out.append(StateChange(path=f"{path}.{key}" if path else str(key), op="removed", old=old[key]))
+        return
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        out.append(StateChange(path=path, op="appended", new=new[len(old):]))
+        return
+    out.append(StateChange(path=path, op="changed", old=old, new=new))
+
+class StateHistory:
+    """
+    Version history of incident states kept as structural deltas
+
+    Each save stores the delta from the previous version: changed keys of the
+    state, and only the log and metric records appended since. A log or
+    metric list that was replaced by another list object, as an analysis
+    does when it merges monitoring data, or that shrank, is stored whole. A
+    full keyframe is stored instead once
+    `keyframe_interval` deltas follow the last one, or once they add up to
+    its size, so rebuilding any version decodes one keyframe and a
+    bounded chain of deltas. Conversation history and analysis steps are
+    already append-only in the journal and are not versioned here.
+
+    The latest version of recently saved incidents is kept decoded, so
+    computing the next delta does not read the history back. Given the
+    store's RecordBlobs, keyframes reference the record chunks the store
+    already holds instead of copying the records.
+    """
+
+    def __init__(
+        self,
+        serializer: Optional[StateSerializer] = None,
+        keyframe_interval: int = 50,
+        cached: int = 1000,
+        blobs=None
+    ):
+        self.serializer = serializer if serializer is not None else StateSerializer()
+        self.blobs = blobs
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.cached = cached
+        self._lock = threading.RLock()
+        # incident_id -> [version, state body, record counts, deltas since keyframe, their bytes,
+        #                 keyframe bytes including the record blobs it references,
+        #                 record lists saved, to tell appends from replaced lists]
+        self._latest: "OrderedDict[str, List]" = OrderedDict()
+        # incident_id -> (version, saved_at, keyframe, payload)
+        self._entries: Dict[str, List[Tuple[int, str, bool, bytes]]] = {}
+        self.keyframe_bytes = 0
+        self.delta_bytes = 0
+        # What a full copy per version would have taken: the last keyframe plus the deltas since
+        self.full_copy_bytes = 0
+
+    # Storage; the SQLite history overrides these
+
+    def _put(
+        self, incident_id: str, version: int, saved_at: str, keyframe: bool, payload: bytes, digests: Sequence[str] = ()
+    ) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(incident_id, [])
+            while entries and entries[-1][0] >= version:
+                entries.pop()
+            entries.append((version, saved_at, keyframe, payload))
+
+    def _chain(self, incident_id: str, version: int) -> List[Tuple[int, str, bool, bytes]]:
+        with self._lock:
+            entries = [entry for entry in self._entries.get(incident_id, []) if entry[0] <= version]
+        for position in range(len(entries) - 1, -1, -1):
+            if entries[position][2]:
+                return entries[position:]
+        return []
+
+    def _list(self, incident_id: str) -> List[Tuple[int, str, bool, int]]:
+        with self._lock:
+            return [(version, saved_at, keyframe, len(payload))
+                    for version, saved_at, keyframe, payload in self._entries.get(incident_id, [])]
+
+    def _all(self, incident_id: str) -> List[Tuple[int, str, bool, bytes]]:
+        with self._lock:
+            return list(self._entries.get(incident_id, []))
+
+    def _replace(self, incident_id: str, entries: List[Tuple[int, str, bool, bytes]]) -> None:
+        with self._lock:
+            self._entries[incident_id] = entries
+
+    def _delete(self, incident_id: str) -> None:
+        with self._lock:
+            self._entries.pop(incident_id, None)
+
+    # Recording
+
+    def record(self, state: IncidentState) -> None:
+        """Store the version just assigned to a state; call with the incident lock held"""
+        body = state.model_dump(mode="json", exclude={"incident": set(_RECORD_LISTS)}, warnings=False)
+        records = {name: getattr(state.incident, name) for name in _RECORD_LISTS}
+        counts = {name: len(values) for name, values in records.items()}
+
+        with self._lock:
+            latest = self._latest.get(state.incident_id)
+        if latest is None or latest[0] != state.version - 1:
+            latest = self._load_latest(state.incident_id, state.version - 1)
+
+        keyframe = latest is None or latest[3] + 1 >= self.keyframe_interval or latest[4] >= latest[5]
+        if not keyframe:
+            appended = {}
+            for name, values in records.items():
+                start = latest[2].get(name, 0)
+                if values is not latest[6].get(name) or len(values) < start:
+                    # The list was replaced or records were removed; store it whole
+                    start = 0
+                if len(values) > start or start == 0 and latest[2].get(name):
+                    appended[name] = [start, encode_records(values[start:])]
+            payload = self.serializer.pack({"state": delta(latest[1], body), "records": appended, "counts": counts})
+            digests: List[str] = []
+        else:
+            encoded, digests = self._encode_keyframe_records(records)
+            payload = self.serializer.pack({"state": body, "records": encoded, "counts": counts})
+            size = len(payload) + _referenced_bytes(encoded)
+
+        saved_at = state.last_updated.isoformat()
+        self._put(state.incident_id, state.version, saved_at, keyframe, payload, digests)
+        with self._lock:
+            if keyframe:
+                self.keyframe_bytes += len(payload)
+                entry = [state.version, body, counts, 0, 0, size, records]
+            else:
+                self.delta_bytes += len(payload)
+                entry = [state.version, body, counts, latest[3] + 1, latest[4] + len(payload), latest[5], records]
+            self.full_copy_bytes += entry[5] + entry[4]
+            self._latest[state.incident_id] = entry
+            self._latest.move_to_end(state.incident_id)
+            while len(self._latest) > self.cached:
+                self._latest.popitem(last=False)
+
+    def _encode_keyframe_records(self, records: Dict[str, List]) -> Tuple[Dict, List[str]]:
+        """Records of a keyframe, as chunk references when there is a blob store, and the digests referenced"""
+        if self.blobs is None:
+            return {name: encode_records(values) for name, values in records.items()}, []
+        encoded, digests = {}, []
+        for name, values in records.items():
+            refs = self.blobs.write(values)
+            encoded[name] = {"refs": [ref.model_dump() for ref in refs]}
+            digests.extend(ref.digest for ref in refs)
+        return encoded, digests
+
+    def _decode_keyframe_records(self, encoded: Dict) -> List:
+        if "refs" not in encoded:
+            return decode_records(encoded)
+        if self.blobs is None:
+            raise ValueError("History keyframe references record blobs but no blob store was given")
+        return self.blobs.read([BlobRef(**ref) for ref in encoded["refs"]])
+
+    def _load_latest(self, incident_id: str, version: int) -> Optional[List]:
+        chain = self._chain(incident_id, version)
+        if not chain or chain[-1][0] != version:
+            return None
+        body, counts = None, {}
+        deltas, delta_bytes, size = 0, 0, 0
+        for _, _, keyframe, payload in chain:
+            entry = self.serializer.unpack(payload)
+            body = entry["state"] if keyframe else apply_delta(body, entry["state"])
+            counts = entry["counts"]
+            if keyframe:
+                size = len(payload) + _referenced_bytes(entry["records"])
+            else:
+                deltas += 1
+                delta_bytes += len(payload)
+        # The saved list objects are unknown, so the next delta stores the lists whole
+        return [version, body, counts, deltas, delta_bytes, size, {}]
+
+    # Reading
+
+    def versions(self, incident_id: str) -> List[StateVersion]:
+        """Saved versions of an incident, oldest first"""
+        return [
+            StateVersion(version=version, saved_at=saved_at, keyframe=bool(keyframe), bytes=size)
+            for version, saved_at, keyframe, size in self._list(incident_id)
+        ]
+
+    def body(self, incident_id: str, version: int) -> Optional[Dict]:
+        """
+        Plain-data form of a saved version, with logs and metrics as records
+
+        Returns:
+            None if the version is not in the history
+        """
+        chain = self._chain(incident_id, version)
+        if not chain or chain[-1][0] != version:
+            return None
+        body, records = None, {}
+        for _, _, keyframe, payload in chain:
+            entry = self.serializer.unpack(payload)
+            if keyframe:
+                body = entry["state"]
+                records = {name: self._decode_keyframe_records(encoded) for name, encoded in entry["records"].items()}
+                continue
+            body = apply_delta(body, entry["state"])
+            for name, (start, encoded) in entry["records"].items():
+                del records[name][start:]
+                records[name].extend(decode_records(encoded))
+        body["incident"].update(records)
+        return body
+
+    def get(self, incident_id: str, version: int) -> Optional[IncidentState]:
+        """Rebuild an incident state as it was saved at a version"""
+        body = self.body(incident_id, version)
+        if body is None:
+            return None
+        records = {name: body["incident"].pop(name, []) for name in _RECORD_LISTS}
+        body["incident"].update({name: [] for name in _RECORD_LISTS})
+        state = IncidentState.model_validate(body)
+        for name, values in records.items():
+            setattr(state.incident, name, values)
+        return state
+
+    def diff(self, incident_id: str, from_version: int, to_version: int) -> List[StateChange]:
+        """
+        Changes between two saved versions of an incident
+
+        Raises:
+            ValueError: If either version is not in the history
+        """
+        old = self.body(incident_id, from_version)
+        new = self.body(incident_id, to_version)
+        if old is None or new is None:
+            missing = from_version if old is None else to_version
+            raise ValueError(f"Version {missing} of incident {incident_id} is not in the history")
+        changes: List[StateChange] = []
+        _changes(old, new, "", changes)
+        return changes
+
+    def drop_records(self, incident_id: str) -> None:
+        """
+        Remove the logs and metrics from every saved version of an incident
+
+        The rest of each version is kept, so the history still shows how the
+        incident and its analysis changed; for incidents whose records were
+        moved to cold storage. Call with the incident lock held.
+        """
+        with self._lock:
+            self._latest.pop(incident_id, None)
+        entries = []
+        for version, saved_at, keyframe, payload in self._all(incident_id):
+            entry = self.serializer.unpack(payload)
+            if entry["records"]:
+                payload = self.serializer.pack({"state": entry["state"], "records": {}, "counts": {}})
+            entries.append((version, saved_at, keyframe, payload))
+        if entries:
+            self._replace(incident_id, entries)
+
+    def discard(self, incident_id: str) -> None:
+        with self._lock:
+            self._latest.pop(incident_id, None)
+        self._delete(incident_id)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stored = self.keyframe_bytes + self.delta_bytes
+            return {
+                "incidents": len(self._entries),
+                "versions": sum(len(entries) for entries in self._entries.values()),
+                "keyframe_bytes": self.keyframe_bytes,
+                "delta_bytes": self.delta_bytes,
+                "full_copy_bytes": self.full_copy_bytes,
+                "overhead_ratio": stored / self.full_copy_bytes if self.full_copy_bytes else 0.0,
+            }
+
+class SQLiteStateHistory(StateHistory):
+    """
+    State history kept in the store's database, one row per version
+
+    Rows are staged in memory and written by `write_staged` inside the
+    store's flush transaction, so recording a version costs no write of its
+    own; reads see staged rows too. Keyframes reference the store's record
+    blobs, and those digests are linked to the incident's history so pruning
+    keeps them.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock, blob_store=None, **kwargs):
+        super().__init__(**kwargs)
+        self._conn = conn
+        self._db_lock = lock
+        self._blob_store = blob_store
+        self._conn.execute(_VERSIONS_SCHEMA)
+        # incident_id -> version -> (saved_at, keyframe, payload, blob digests), until written
+        self._staged: Dict[str, Dict[int, Tuple[str, bool, bytes, Sequence[str]]]] = {}
+        self._staged_lock = threading.Lock()
+
+    def _put(
+        self, incident_id: str, version: int, saved_at: str, keyframe: bool, payload: bytes, digests: Sequence[str] = ()
+    ) -> None:
+        with self._staged_lock:
+            self._staged.setdefault(incident_id, {})[version] = (saved_at, keyframe, payload, digests)
+
+    def _staged_rows(self, incident_id: str, version: Optional[int] = None) -> Dict[int, Tuple[int, str, bool, bytes]]:
+        with self._staged_lock:
+            rows = self._staged.get(incident_id, {})
+            return {
+                staged: (staged, saved_at, keyframe, payload)
+                for staged, (saved_at, keyframe, payload, _) in rows.items()
+                if version is None or staged <= version
+            }
+
+    def write_staged(self) -> Dict[str, Dict]:
+        """Insert staged versions; call inside the flush transaction and `clear_staged` after it commits"""
+        with self._staged_lock:
+            staged = {incident_id: dict(rows) for incident_id, rows in self._staged.items()}
+        self._conn.executemany(_INSERT_VERSION, [
+            (incident_id, version, saved_at, int(keyframe), payload)
+            for incident_id, rows in staged.items()
+            for version, (saved_at, keyframe, payload, _) in rows.items()
+        ])
+        if self._blob_store is not None:
+            for incident_id, rows in staged.items():
+                digests = [digest for row in rows.values() for digest in row[3]]
+                if digests:
+                    self._blob_store.link_history(incident_id, digests)
+        return staged
+
+    def clear_staged(self, written: Dict[str, Dict]) -> None:
+        with self._staged_lock:
+            for incident_id, rows in written.items():
+                current = self._staged.get(incident_id)
+                if current is None:
+                    continue
+                for version, row in rows.items():
+                    # Unless the version was recorded again meanwhile
+                    if current.get(version) is row:
+                        del current[version]
+                if not current:
+                    del self._staged[incident_id]
+
+    def _chain(self, incident_id: str, version: int) -> List[Tuple[int, str, bool, bytes]]:
+        staged = self._staged_rows(incident_id, version)
+        keyframes = [staged_version for staged_version, row in staged.items() if row[2]]
+        if keyframes:
+            start = max(keyframes)
+            return [staged[staged_version] for staged_version in sorted(staged) if staged_version >= start]
+
+        with self._db_lock:
+            rows = self._conn.execute(_SELECT_CHAIN, (incident_id, version, incident_id, version)).fetchall()
+        chain = {version: (version, saved_at, bool(keyframe), bytes(payload)) for version, saved_at, keyframe, payload in rows}
+        if not chain:
+            return []
+        start = min(chain)
+        chain.update((staged_version, row) for staged_version, row in staged.items() if staged_version > start)
+        return [chain[chain_version] for chain_version in sorted(chain)]
+
+    def _list(self, incident_id: str) -> List[Tuple[int, str, bool, int]]:
+        with self._db_lock:
+            rows = {row[0]: tuple(row) for row in self._conn.execute(_SELECT_VERSIONS, (incident_id,)).fetchall()}
+        for version, saved_at, keyframe, payload in self._staged_rows(incident_id).values():
+            rows[version] = (version, saved_at, keyframe, len(payload))
+        return [rows[version] for version in sorted(rows)]
+
+    def _all(self, incident_id: str) -> List[Tuple[int, str, bool, bytes]]:
+        with self._db_lock:
+            rows = self._conn.execute(_SELECT_ENTRIES, (incident_id,)).fetchall()
+        entries = {version: (version, saved_at, bool(keyframe), bytes(payload)) for version, saved_at, keyframe, payload in rows}
+        entries.update(self._staged_rows(incident_id))
+        return [entries[version] for version in sorted(entries)]
+
+    def _replace(self, incident_id: str, entries: List[Tuple[int, str, bool, bytes]]) -> None:
+        # Only used to strip records, so the new entries reference no blobs
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(_DELETE_VERSIONS, (incident_id,))
+                if self._blob_store is not None:
+                    self._blob_store.unlink_history(incident_id)
+                self._conn.executemany(_INSERT_VERSION, [
+                    (incident_id, version, saved_at, int(keyframe), payload)
+                    for version, saved_at, keyframe, payload in entries
+                ])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            with self._staged_lock:
+                self._staged.pop(incident_id, None)
+
+    def _delete(self, incident_id: str) -> None:
+        with self._db_lock:
+            self._conn.execute(_DELETE_VERSIONS, (incident_id,))
+            if self._blob_store is not None:
+                self._blob_store.unlink_history(incident_id)
+            with self._staged_lock:
+                self._staged.pop(incident_id, None)
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        with self._db_lock:
+            versions, keyframes, stored = self._conn.execute(_VERSION_TOTALS).fetchone()
+        with self._staged_lock:
+            staged = sum(len(rows) for rows in self._staged.values())
+        stats.update({"versions": versions, "keyframes": keyframes or 0, "stored_bytes": stored or 0, "staged": staged})
+        stats.pop("incidents")
+        return stats
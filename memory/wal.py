@@ -0,0 +1,285 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+# Frame: payload length, crc32 of the payload, payload
+_FRAME = struct.Struct(">II")
+_SEGMENT_SUFFIX = ".log"
+
+def segment_name(number: int) -> str:
+    return f"wal-{number:08d}{_SEGMENT_SUFFIX}"
+
+def write_frame(handle, payload: bytes) -> int:
+    handle.write(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+    return _FRAME.size + len(payload)
+
+def read_frames(path: str) -> Iterator[Tuple[bytes, int]]:
+    """
+    Payloads of the intact frames in a file, with the offset after each
+
+    Stops at the first truncated or corrupt frame, which is where a crash
+    interrupted the last write.
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        offset = start + length
+        yield payload, offset
+
+def segment_numbers(directory: str) -> List[int]:
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith("wal-") and name.endswith(_SEGMENT_SUFFIX):
+            numbers.append(int(name[4:-len(_SEGMENT_SUFFIX)]))
+    return sorted(numbers)
+
+def fsync_directory(directory: str) -> None:
+    # Makes renames and new files durable; not supported on every platform
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+class WriteAheadLog:
+    """
+    Segmented append-only log with group commit
+
+    Records are queued with `submit`, which numbers them. A writer thread
+    takes everything queued, encodes it as one checksummed frame of
+    [seq, record] pairs and fsyncs once per batch, so concurrent writers share
+    the cost of a sync. `wait` blocks until a submitted record is durable.
+
+    In "group" mode callers are expected to wait before reporting success.
+    In "async" mode they do not, and up to one batch (plus `commit_delay`)
+    can be lost on a crash.
+
+    A batch that fails to write is cut off the segment again, so later
+    batches follow the last intact frame, and `wait` raises the error for
+    the records of that batch only. If the segment cannot be cut back, no
+    further batches are written.
+    """
+
+    def __init__(self, directory: str, encode: Callable[[List], bytes], commit_delay: float = 0.002, start_seq: int = 0):
+        self.directory = directory
+        self.commit_delay = commit_delay
+        self._encode = encode
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._queue: List = []
+        self._submitted = start_seq
+        # Every record up to here is durable
+        self._durable = start_seq
+        # Every batch up to here was written or failed
+        self._done = start_seq
+        self._writing = False
+        self._closed = False
+        # (first seq, last seq, error) of recent batches that failed to write
+        self._failed: Deque[Tuple[int, int, Exception]] = deque(maxlen=1000)
+        # Set when a failed write could not be cut off the segment
+        self._broken: Optional[Exception] = None
+
+        self.segment = max(segment_numbers(directory), default=0)
+        self._handle = open(os.path.join(directory, segment_name(self.segment)), "ab")
+        self.segment_bytes = self._handle.tell()
+
+        self.commits = 0
+        self.records = 0
+        self.bytes = 0
+
+        self._writer = threading.Thread(target=self._write_batches, name="wal-writer", daemon=True)
+        self._writer.start()
+
+    def submit(self, record) -> int:
+        """Queue a record; returns its sequence number for `wait`"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-ahead log is closed")
+            self._submitted += 1
+            self._queue.append([self._submitted, record])
+            self._cond.notify_all()
+            return self._submitted
+
+    def wait(self, seq: Optional[int] = None) -> None:
+        """
+        Block until the record with this sequence number (default: everything queued) is durable
+
+        Raises:
+            Exception: The write error, if the record's batch failed to write
+        """
+        with self._cond:
+            first = seq if seq is not None else self._done + 1
+            target = self._submitted if seq is None else seq
+            while self._done < target:
+                self._cond.wait()
+            for failed_first, failed_last, error in self._failed:
+                if failed_first <= target and first <= failed_last:
+                    raise error
+
+    def _write_batches(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+            if self.commit_delay:
+                # Let concurrent writers join the batch
+                time.sleep(self.commit_delay)
+            with self._cond:
+                batch, self._queue = self._queue, []
+                self._writing = True
+                target = batch[-1][0]
+            offset = self.segment_bytes
+            try:
+                if self._broken is not None:
+                    raise self._broken
+                written = write_frame(self._handle, self._encode(batch))
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+            except Exception as e:
+                logger.error(f"[WAL] Failed to write {len(batch)} records: {str(e)}")
+                if self._broken is None:
+                    self._cut_back(offset)
+                with self._cond:
+                    self._failed.append((batch[0][0], target, e))
+                    self._done = target
+                    self._writing = False
+                    self._cond.notify_all()
+                continue
+            with self._cond:
+                if self._durable == batch[0][0] - 1:
+                    self._durable = target
+                self._done = target
+                self._writing = False
+                self.commits += 1
+                self.records += len(batch)
+                self.bytes += written
+                self.segment_bytes += written
+                self._cond.notify_all()
+
+    def _cut_back(self, offset: int) -> None:
+        """Remove a partly written frame, so the next batch does not follow a torn one"""
+        path = os.path.join(self.directory, segment_name(self.segment))
+        try:
+            self._handle.close()
+        except Exception:
+            # Closing flushes what is left of the failed write; it is cut off below
+            pass
+        try:
+            os.truncate(path, offset)
+            self._handle = open(path, "ab")
+            os.fsync(self._handle.fileno())
+        except Exception as e:
+            logger.error(f"[WAL] Could not cut a failed write off {segment_name(self.segment)}; no further writes: {str(e)}")
+            self._broken = e
+
+    def rotate(self) -> int:
+        """
+        Start a new segment once everything queued so far is written
+
+        Returns:
+            Number of the new segment; earlier segments are complete
+        """
+        with self._cond:
+            while self._queue or self._writing:
+                self._cond.wait()
+            self._handle.close()
+            self.segment += 1
+            self._handle = open(os.path.join(self.directory, segment_name(self.segment)), "ab")
+            self.segment_bytes = 0
+        fsync_directory(self.directory)
+        return self.segment
+
+    def remove_segments_before(self, number: int) -> None:
+        for segment in segment_numbers(self.directory):
+            if segment < number:
+                os.remove(os.path.join(self.directory, segment_name(segment)))
+
+    @property
+    def last_seq(self) -> int:
+        with self._cond:
+            return self._submitted
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._handle.close()
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {
+                "segment": self.segment,
+                "segment_bytes": self.segment_bytes,
+                "records": self.records,
+                "commits": self.commits,
+                "records_per_commit": self.records / self.commits if self.commits else 0.0,
+                "bytes": self.bytes,
+                "queued": len(self._queue),
+                "durable_seq": self._durable,
+                "failed_batches": len(self._failed),
+                "broken": self._broken is not None,
+            }
+
+def truncate_torn_tail(path: str) -> int:
+    """Cut a segment back to its last intact frame; returns the bytes removed"""
+    size = os.path.getsize(path)
+    end = 0
+    for _, offset in read_frames(path):
+        end = offset
+    if end < size:
+        with open(path, "r+b") as handle:
+            handle.truncate(end)
+            handle.flush()
+            os.fsync(handle.fileno())
+    return size - end
+
+def replay(directory: str, decode: Callable[[bytes], List], from_segment: int = 0) -> Iterator[Tuple[int, object]]:
+    """
+    (seq, record) pairs from segments numbered `from_segment` and later, in order
+
+    A torn frame at the end of the newest segment is cut off so appends can
+    continue after it. Corruption anywhere else stops the replay there.
+    """
+    numbers = [number for number in segment_numbers(directory) if number >= from_segment]
+    for position, number in enumerate(numbers):
+        path = os.path.join(directory, segment_name(number))
+        end = 0
+        for payload, end in read_frames(path):
+            for seq, record in decode(payload):
+                yield seq, record
+        size = os.path.getsize(path)
+        if end == size:
+            continue
+        if position == len(numbers) - 1:
+            logger.warning(f"[WAL] Dropping {size - end} bytes of an interrupted write in {segment_name(number)}")
+            truncate_torn_tail(path)
+        else:
+            logger.error(f"[WAL] {segment_name(number)} is corrupt at byte {end}; later changes were not replayed")
+            return
@@ -0,0 +1,483 @@
+import atexit
+import base64
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from contracts.incident import IncidentState
+from contracts.settings import settings
+from memory.index import summarize_state
+from memory.journal import EVENT_KINDS, MemoryJournal
+from memory.serialization import StateSerializer, decode_records, encode_records
+from memory.sqlite_store import _revive_timestamps
+from memory.store import ContextStore
+from memory.versions import StateHistory
+from memory.wal import WriteAheadLog, fsync_directory, read_frames, replay, write_frame
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+# Lists on the incident logged as appended rows instead of rewritten on every save
+_RECORD_LISTS = ("logs", "metrics")
+_SNAPSHOT_PREFIX = "snapshot-"
+_SNAPSHOT_SUFFIX = ".snap"
+
+# Log record kinds
+STATE = "state"
+EVENT = "event"
+VERSION = "version"
+DELETE = "delete"
+# Every saved version of an incident, replacing what came before; also written to snapshots
+HISTORY = "history"
+# Snapshot-only record kinds
+EVENTS = "events"
+END = "end"
+
+def _snapshot_name(segment: int) -> str:
+    return f"{_SNAPSHOT_PREFIX}{segment:08d}{_SNAPSHOT_SUFFIX}"
+
+def _encode_entries(entries: Sequence[Tuple[int, str, bool, bytes]]) -> List[List]:
+    # History payloads are already packed; base64 keeps them loggable with the text codecs
+    return [[version, saved_at, keyframe, base64.b64encode(payload).decode()]
+            for version, saved_at, keyframe, payload in entries]
+
+def _decode_entries(entries: List[List]) -> List[Tuple[int, str, bool, bytes]]:
+    return [(version, saved_at, keyframe, base64.b64decode(payload)) for version, saved_at, keyframe, payload in entries]
+
+def _snapshot_numbers(directory: str) -> List[int]:
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(_SNAPSHOT_PREFIX) and name.endswith(_SNAPSHOT_SUFFIX):
+            numbers.append(int(name[len(_SNAPSHOT_PREFIX):-len(_SNAPSHOT_SUFFIX)]))
+    return sorted(numbers)
+
+class WALJournal(MemoryJournal):
+    """
+    In-memory event journal whose appends are also written to the store's log
+
+    Each incident remembers the sequence number of its last logged event, so
+    recovery can tell which logged events a snapshot already holds.
+    """
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None, wait_durable: bool = True):
+        super().__init__()
+        self.wal = wal
+        self.wait_durable = wait_durable
+        self._seqs: Dict[str, int] = {}
+
+    def append(self, incident_id: str, kind: str, event: Dict) -> None:
+        with self._lock:
+            seq = self.wal.submit({"op": EVENT, "id": incident_id, "kind": kind, "event": event})
+            self._events.setdefault((incident_id, kind), []).append(event)
+            self._seqs[incident_id] = seq
+            self.appends += 1
+        if self.wait_durable:
+            self.wal.wait(seq)
+
+    def append_many(self, events: List[Tuple[str, str, Dict]]) -> None:
+        """Append and log (incident_id, kind, event) entries, waiting once for the last to be durable"""
+        seq = None
+        with self._lock:
+            for incident_id, kind, event in events:
+                seq = self.wal.submit({"op": EVENT, "id": incident_id, "kind": kind, "event": event})
+                self._events.setdefault((incident_id, kind), []).append(event)
+                self._seqs[incident_id] = seq
+            self.appends += len(events)
+        if self.wait_durable and seq is not None:
+            self.wal.wait(seq)
+
+    def discard(self, incident_id: str) -> None:
+        # Every removal path ends here; log it so recovery does not bring the incident back
+        with self._lock:
+            for kind in EVENT_KINDS:
+                self._events.pop((incident_id, kind), None)
+            self._seqs.pop(incident_id, None)
+            self.wal.submit({"op": DELETE, "id": incident_id})
+
+    def restore(self, incident_id: str, kind: str, events: List[Dict], seq: int) -> None:
+        with self._lock:
+            self._events[(incident_id, kind)] = events
+            self._seqs[incident_id] = max(seq, self._seqs.get(incident_id, 0))
+
+    def snapshot(self, incident_id: str) -> Tuple[int, Dict[str, List[Dict]]]:
+        """Last logged sequence number and a copy of each event stream"""
+        with self._lock:
+            streams = {kind: list(self._events.get((incident_id, kind), [])) for kind in EVENT_KINDS}
+            return self._seqs.get(incident_id, 0), streams
+
+class WALStateHistory(StateHistory):
+    """
+    In-memory state history whose versions are also written to the store's log
+
+    Like the journal, each incident remembers the sequence number of its
+    last logged change, so recovery can tell which logged versions a
+    snapshot already holds. Discarded histories need no record of their own:
+    the journal logs the incident's removal.
+    """
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.wal = wal
+        self._seqs: Dict[str, int] = {}
+
+    def _put(
+        self, incident_id: str, version: int, saved_at: str, keyframe: bool, payload: bytes, digests: Sequence[str] = ()
+    ) -> None:
+        with self._lock:
+            super()._put(incident_id, version, saved_at, keyframe, payload, digests)
+            self._seqs[incident_id] = self.wal.submit({
+                "op": VERSION, "id": incident_id, "entry": _encode_entries([(version, saved_at, keyframe, payload)])[0]
+            })
+
+    def _replace(self, incident_id: str, entries: List[Tuple[int, str, bool, bytes]]) -> None:
+        with self._lock:
+            super()._replace(incident_id, entries)
+            self._seqs[incident_id] = self.wal.submit({"op": HISTORY, "id": incident_id, "entries": _encode_entries(entries)})
+
+    def _delete(self, incident_id: str) -> None:
+        with self._lock:
+            super()._delete(incident_id)
+            self._seqs.pop(incident_id, None)
+
+    def restore(self, incident_id: str, entries: List[Tuple[int, str, bool, bytes]], seq: int) -> None:
+        with self._lock:
+            self._entries[incident_id] = entries
+            self._seqs[incident_id] = seq
+
+    def snapshot(self, incident_id: str) -> Tuple[int, List[Tuple[int, str, bool, bytes]]]:
+        """Last logged sequence number and the saved versions; call with the incident lock held"""
+        with self._lock:
+            return self._seqs.get(incident_id, 0), self._all(incident_id)
+
+class WALContextStore(ContextStore):
+    """
+    In-memory context store made crash-safe by a write-ahead log
+
+    Saves and journal appends are applied in memory and appended to the log.
+    A save logs the state without its logs and metrics, plus only the records
+    appended since the incident was last logged. The log writer fsyncs in
+    groups: with `sync="group"` a save returns once its batch is on disk; with
+    `sync="async"` it returns straight away and a crash can lose the last
+    batch.
+
+    Once `snapshot_bytes` of log have been written since the last snapshot, a
+    background thread starts a new log segment, writes every state and event
+    stream to a snapshot file, then deletes the segments and snapshots it
+    replaces. On start-up the newest complete snapshot is loaded and the log
+    written after it is replayed. Every logged change carries its sequence
+    number and the snapshot records, per incident, the last one it holds, so
+    replay skips changes the snapshot already has.
+
+    Versions recorded in the history are logged and snapshotted too, so
+    `list_versions` and `get_version` survive a restart.
+
+    Records are assumed to be appended only; edits to earlier log or metric
+    records are not logged unless the list is replaced.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.store.wal_dir,
+        sync: str = settings.store.wal_sync,
+        commit_delay: float = settings.store.wal_commit_delay_seconds,
+        snapshot_bytes: int = settings.store.wal_snapshot_bytes,
+        serializer: Optional[StateSerializer] = None,
+        **kwargs
+    ):
+        if sync not in ("group", "async"):
+            raise ValueError(f"Unknown WAL sync mode {sync}; expected group or async")
+        super().__init__(**kwargs)
+        self.journal = WALJournal(wait_durable=sync == "group")
+        self.history = WALStateHistory(keyframe_interval=self.history.keyframe_interval)
+        self.directory = directory
+        self.sync = sync
+        self.snapshot_bytes = snapshot_bytes
+        self.serializer = serializer or StateSerializer()
+        os.makedirs(directory, exist_ok=True)
+
+        # incident_id -> sequence number of its last logged save
+        self._seqs: Dict[str, int] = {}
+        # incident_id -> list name -> (list object, length) as last logged
+        self._logged: Dict[str, Dict[str, Tuple[List, int]]] = {}
+        self._snapshot_lock = threading.Lock()
+        self.snapshots = 0
+        self.last_snapshot_seconds = 0.0
+
+        started = time.perf_counter()
+        last_seq, states, events, histories = self._recover()
+        # Open the log before restoring, so evictions while restoring are logged
+        self.wal = WriteAheadLog(directory, self._encode_batch, commit_delay, start_seq=last_seq)
+        self.journal.wal = self.wal
+        self.history.wal = self.wal
+        self._restore(states, events, histories)
+        self.recovery_seconds = time.perf_counter() - started
+        self._bytes_at_snapshot = 0
+        logger.info(
+            f"[Store] Recovered {len(self.store)} incidents from {directory} "
+            f"({self.replayed} logged changes replayed in {self.recovery_seconds:.2f}s)"
+        )
+
+        self._closed = threading.Event()
+        self._snapshotter = threading.Thread(target=self._snapshot_periodically, daemon=True)
+        self._snapshotter.start()
+        atexit.register(self.close)
+
+    def _encode_batch(self, batch: List) -> bytes:
+        return self.serializer.pack(batch)
+
+    def _forget_version(self, incident_id: str) -> None:
+        super()._forget_version(incident_id)
+        self._seqs.pop(incident_id, None)
+        self._logged.pop(incident_id, None)
+
+    def save_context(self, state: IncidentState, expected_version: Optional[int] = None) -> None:
+        """
+        Save incident state and log the change
+
+        Args:
+            state: State to save
+            expected_version: When given, only save if the stored version still
+                matches; raises ConcurrentModificationError otherwise
+        """
+        logger.info(f"[Store] Saving incident state: {state.incident_id}")
+        with self.lock(state.incident_id):
+            self._claim_version(state, expected_version)
+            self.history.record(state)
+            state.attach_journal(self.journal)
+            seq = self.wal.submit(self._state_record(state))
+            self._seqs[state.incident_id] = seq
+            self.index.add(state.incident_id, summarize_state(state))
+            self.search.add_state(state)
+            self.store.put(state.incident_id, state)
+        if self.sync == "group":
+            self.wal.wait(seq)
+
+    def save_many(self, states: List[IncidentState]) -> None:
+        """Save and log several states and their events, waiting once for the whole group to be durable"""
+        logger.info(f"[Store] Saving {len(states)} incident states")
+        seq = None
+        events = []
+        for state in states:
+            with self.lock(state.incident_id):
+                self._claim_version(state, None)
+                self.history.record(state)
+                state.attach_journal(self.journal, events)
+                seq = self._seqs[state.incident_id] = self.wal.submit(self._state_record(state))
+                self.store.put(state.incident_id, state)
+        # Waits for the events, logged after every state, when saves wait for the disk
+        self.journal.append_many(events)
+        states = [state for state in states if self.store.peek(state.incident_id) is state]
+        self.index.add_many([(state.incident_id, summarize_state(state)) for state in states])
+        self.search.add_states(states)
+        if self.sync == "group" and seq is not None:
+            self.wal.wait(seq)
+
+    def _state_record(self, state: IncidentState) -> Dict:
+        incident = state.incident
+        body = state.model_dump(mode="json", exclude={"incident": set(_RECORD_LISTS)}, warnings=False)
+        logged = self._logged.setdefault(state.incident_id, {})
+        appended = {}
+        for name in _RECORD_LISTS:
+            records = getattr(incident, name)
+            previous, length = logged.get(name, (None, 0))
+            start = length if records is previous and len(records) >= length else 0
+            appended[name] = [start, encode_records(records[start:])]
+            logged[name] = (records, len(records))
+        return {"op": STATE, "id": state.incident_id, "body": body, "records": appended}
+
+    def snapshot(self) -> str:
+        """
+        Write every incident to a snapshot file and drop the log it replaces
+
+        Returns:
+            Path of the new snapshot
+        """
+        with self._snapshot_lock:
+            started = time.perf_counter()
+            bytes_written = self.wal.bytes
+            segment = self.wal.rotate()
+            path = os.path.join(self.directory, _snapshot_name(segment))
+            partial = path + ".tmp"
+            with open(partial, "wb") as handle:
+                for incident_id in self.store.keys():
+                    with self.lock(incident_id):
+                        state = self.store.peek(incident_id)
+                        if state is None:
+                            continue
+                        record = {
+                            "op": STATE,
+                            "id": incident_id,
+                            "seq": self._seqs.get(incident_id, 0),
+                            "body": self.serializer.to_body(state),
+                        }
+                        history_seq, entries = self.history.snapshot(incident_id)
+                    write_frame(handle, self.serializer.pack(record))
+                    write_frame(handle, self.serializer.pack(
+                        {"op": HISTORY, "id": incident_id, "seq": history_seq, "entries": _encode_entries(entries)}
+                    ))
+                    seq, streams = self.journal.snapshot(incident_id)
+                    write_frame(handle, self.serializer.pack(
+                        {"op": EVENTS, "id": incident_id, "seq": seq, "streams": streams}
+                    ))
+                # Only a snapshot ending in this marker is used
+                write_frame(handle, self.serializer.pack({"op": END, "segment": segment}))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(partial, path)
+            fsync_directory(self.directory)
+
+            self.wal.remove_segments_before(segment)
+            for number in _snapshot_numbers(self.directory):
+                if number < segment:
+                    os.remove(os.path.join(self.directory, _snapshot_name(number)))
+            self._bytes_at_snapshot = bytes_written
+            self.snapshots += 1
+            self.last_snapshot_seconds = time.perf_counter() - started
+            logger.info(f"[Store] Wrote snapshot {path} in {self.last_snapshot_seconds:.2f}s")
+            return path
+
+    def _snapshot_periodically(self) -> None:
+        while not self._closed.wait(1.0):
+            if self.wal.bytes - self._bytes_at_snapshot < self.snapshot_bytes:
+                continue
+            try:
+                self.snapshot()
+            except Exception as e:
+                logger.error(f"[Store] Failed to write snapshot: {str(e)}")
+
+    def _load_snapshot(self) -> Tuple[int, Dict, Dict, Dict]:
+        """Segment to replay from, plus the states, event streams and histories of the newest complete snapshot"""
+        for number in reversed(_snapshot_numbers(self.directory)):
+            path = os.path.join(self.directory, _snapshot_name(number))
+            states, events, histories = {}, {}, {}
+            complete = False
+            for payload, _ in read_frames(path):
+                record = self.serializer.unpack(payload)
+                if record["op"] == STATE:
+                    body = record["body"]
+                    records = {name: decode_records(body["incident"].pop(name)) for name in _RECORD_LISTS}
+                    states[record["id"]] = [record["seq"], body, records]
+                elif record["op"] == EVENTS:
+                    events[record["id"]] = [record["seq"], record["streams"]]
+                elif record["op"] == HISTORY:
+                    histories[record["id"]] = [record["seq"], _decode_entries(record["entries"])]
+                elif record["op"] == END:
+                    complete = True
+            if complete:
+                return number, states, events, histories
+            logger.warning(f"[Store] Ignoring incomplete snapshot {path}")
+        return 0, {}, {}, {}
+
+    def _recover(self) -> Tuple[int, Dict, Dict, Dict]:
+        """
+        Read the newest snapshot and apply the log written after it
+
+        Returns:
+            Last sequence number seen, then [seq, body, records] per incident,
+            [seq, streams] per incident with events and [seq, entries] per
+            incident with saved versions
+        """
+        segment, states, events, histories = self._load_snapshot()
+        last_seq = max(
+            [seq for seq, _, _ in states.values()] + [seq for seq, _ in events.values()]
+            + [seq for seq, _ in histories.values()], default=0
+        )
+        replayed = 0
+        for seq, record in replay(self.directory, self.serializer.unpack, segment):
+            last_seq = max(last_seq, seq)
+            incident_id = record["id"]
+            state = states.get(incident_id)
+            stream = events.get(incident_id)
+            history = histories.get(incident_id)
+            if record["op"] == STATE:
+                if state is not None and seq <= state[0]:
+                    continue
+                records = state[2] if state is not None else {name: [] for name in _RECORD_LISTS}
+                for name, (start, appended) in record["records"].items():
+                    if start > len(records[name]):
+                        logger.warning(f"[Store] Missing {name} before offset {start} for {incident_id}")
+                    del records[name][start:]
+                    records[name].extend(decode_records(appended))
+                states[incident_id] = [seq, record["body"], records]
+            elif record["op"] == EVENT:
+                if stream is not None and seq <= stream[0]:
+                    continue
+                if stream is None:
+                    stream = events[incident_id] = [0, {kind: [] for kind in EVENT_KINDS}]
+                stream[0] = seq
+                stream[1][record["kind"]].append(record["event"])
+            elif record["op"] in (VERSION, HISTORY):
+                if history is not None and seq <= history[0]:
+                    continue
+                if history is None:
+                    history = histories[incident_id] = [0, []]
+                history[0] = seq
+                if record["op"] == HISTORY:
+                    history[1] = _decode_entries(record["entries"])
+                else:
+                    entry = _decode_entries([record["entry"]])[0]
+                    # A version recorded again replaces it and anything after it, as in StateHistory._put
+                    while history[1] and history[1][-1][0] >= entry[0]:
+                        history[1].pop()
+                    history[1].append(entry)
+            elif record["op"] == DELETE:
+                if state is not None and seq > state[0]:
+                    del states[incident_id]
+                if stream is not None and seq > stream[0]:
+                    del events[incident_id]
+                if history is not None and seq > history[0]:
+                    del histories[incident_id]
+            replayed += 1
+        self.replayed = replayed
+        return last_seq, states, events, histories
+
+    def _restore(self, states: Dict, events: Dict, histories: Dict) -> None:
+        for incident_id, (seq, body, records) in states.items():
+            body["incident"].update({name: [] for name in _RECORD_LISTS})
+            state = IncidentState.model_validate(body)
+            for name, values in records.items():
+                setattr(state.incident, name, values)
+                self._logged.setdefault(incident_id, {})[name] = (values, len(values))
+            self._seqs[incident_id] = seq
+            self._versions[incident_id] = state.version
+            self.index.add(incident_id, summarize_state(state))
+            self.search.add_state(state)
+            self.store.put(incident_id, state)
+            state.attach_journal(self.journal)
+        for incident_id, (seq, streams) in events.items():
+            if incident_id not in states:
+                continue
+            for kind, stream in streams.items():
+                self.journal.restore(incident_id, kind, _revive_timestamps(stream), seq)
+        for incident_id, (seq, entries) in histories.items():
+            if self.store.peek(incident_id) is not None:
+                self.history.restore(incident_id, entries, seq)
+
+    def close(self) -> None:
+        """Stop the snapshot thread and write out everything still queued"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._snapshotter.join(timeout=5)
+        self.wal.close()
+
+    def flush(self) -> int:
+        """Wait until every logged change is on disk"""
+        self.wal.wait()
+        return 0
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats.update({
+            "backend": "wal",
+            "sync": self.sync,
+            "wal": self.wal.get_stats(),
+            "snapshots": self.snapshots,
+            "last_snapshot_seconds": self.last_snapshot_seconds,
+            "recovery_seconds": self.recovery_seconds,
+            "replayed": self.replayed,
+        })
+        return stats
@@ -0,0 +1,232 @@
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from contracts.settings import settings
+
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+class SeriesAnomaly(BaseModel):
+    """Anomaly score and summary statistics for one metric series"""
+    name: str
+    labels: Dict[str, str] = {}
+    score: float
+    robust_z: float
+    ewma_deviation: float
+    seasonal_deviation: float
+    points: int
+    last: float
+    median: float
+    min: float
+    max: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+def _field(record, name: str):
+    return record.get(name) if isinstance(record, dict) else getattr(record, name)
+
+def series_key(name: str, labels: Optional[Dict[str, str]]) -> SeriesKey:
+    return name, tuple(sorted((labels or {}).items()))
+
+def group_series(metrics: Sequence) -> Tuple[List[SeriesKey], np.ndarray]:
+    """
+    Group metric points into series and pack them into a matrix
+
+    One pass reads each point's fields and looks its series up by name and
+    the repr of its labels, which allocates no tuples per point; label sets
+    are only sorted into a series key the first time they are seen. Ordering
+    by time and packing the rows is done in numpy.
+
+    Args:
+        metrics: Metric objects or dicts
+
+    Returns:
+        Series keys and a (series x points) float matrix, right-aligned so the
+        latest point of every series is in the last column, padded with NaN
+    """
+    keys: List[SeriesKey] = []
+    rows: Dict[SeriesKey, int] = {}
+    # name -> repr of labels as given -> row
+    seen: Dict[str, Dict[str, int]] = {}
+    codes: List[int] = []
+    values: List[float] = []
+    timestamps: List = []
+    for metric in metrics:
+        if isinstance(metric, dict):
+            name, labels = metric['name'], metric.get('labels')
+            timestamps.append(metric['timestamp'])
+            values.append(metric['value'])
+        else:
+            name, labels = metric.name, metric.labels
+            timestamps.append(metric.timestamp)
+            values.append(metric.value)
+        by_labels = seen.get(name)
+        if by_labels is None:
+            by_labels = seen[name] = {}
+        text = repr(labels) if labels else ""
+        row = by_labels.get(text)
+        if row is None:
+            key = series_key(name, labels)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = len(keys)
+                keys.append(key)
+            by_labels[text] = row
+        codes.append(row)
+
+    codes = np.array(codes, dtype=np.intp)
+    values = np.array(values, dtype=float)
+    by_time = np.empty(len(timestamps), dtype=object)
+    by_time[:] = timestamps
+    counts = np.bincount(codes, minlength=len(keys))
+    width = int(counts.max()) if len(keys) else 0
+    matrix = np.full((len(keys), width), np.nan)
+    if not len(keys):
+        return keys, matrix
+    # Stable sorts: by time, then by series, so points with equal timestamps keep their input order
+    order = np.argsort(by_time, kind="stable")
+    order = order[np.argsort(codes[order], kind="stable")]
+    series = codes[order]
+    starts = np.cumsum(counts) - counts
+    columns = width - counts[series] + np.arange(len(order)) - starts[series]
+    matrix[series, columns] = values[order]
+    return keys, matrix
+
+class AnomalyEngine:
+    """Vectorised scoring of metric series: robust z-score, EWMA deviation and seasonal comparison"""
+
+    def __init__(self, ewma_alpha: float = 0.3, season_length: int = 0, min_points: int = 3, min_score: float = 0.0):
+        self.ewma_alpha = ewma_alpha
+        self.season_length = season_length
+        self.min_points = min_points
+        # Series scoring at or below this are not anomalous and are left out of rankings
+        self.min_score = min_score
+
+    def score_matrix(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score every row of a (series x points) matrix
+
+        Args:
+            values: Float matrix with NaN for missing points
+
+        Returns:
+            Dict of per-series arrays: score, robust_z, ewma_deviation,
+            seasonal_deviation, median, plus point counts
+        """
+        n_series = values.shape[0]
+        with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+            warnings.simplefilter("ignore", RuntimeWarning)
+
+            counts = np.sum(~np.isnan(values), axis=1)
+            median = np.nanmedian(values, axis=1) if values.size else np.zeros(n_series)
+            abs_dev = np.abs(values - median[:, None])
+            mad = np.nanmedian(abs_dev, axis=1) if values.size else np.zeros(n_series)
+            mean_abs_dev = np.nanmean(abs_dev, axis=1) if values.size else np.zeros(n_series)
+
+            # Robust scale: MAD, falling back to mean absolute deviation when MAD is 0
+            scale = np.where(mad > 0, 1.4826 * mad, 1.2533 * mean_abs_dev)
+            scale = np.where(scale > 0, scale, np.nan)
+
+            robust_z = np.nanmax(abs_dev / scale[:, None], axis=1) if values.size else np.zeros(n_series)
+
+            ewma_deviation = self._ewma_deviation(values, scale)
+            seasonal_deviation = self._seasonal_deviation(values, scale)
+
+            components = np.vstack([robust_z, ewma_deviation, seasonal_deviation])
+            components = np.nan_to_num(components, nan=0.0, posinf=0.0)
+            score = components.max(axis=0)
+            score[counts < self.min_points] = 0.0
+
+        return {
+            "score": score,
+            "robust_z": components[0],
+            "ewma_deviation": components[1],
+            "seasonal_deviation": components[2],
+            "median": median,
+            "points": counts,
+        }
+
+    def _ewma_deviation(self, values: np.ndarray, scale: np.ndarray) -> np.ndarray:
+        """
+        Largest deviation of a point from the EWMA of the points before it,
+        in EWMA std units floored at the series' robust scale
+        """
+        n_series, width = values.shape
+        alpha = self.ewma_alpha
+        mean = np.full(n_series, np.nan)
+        var = np.zeros(n_series)
+        seen = np.zeros(n_series, dtype=np.int64)
+        worst = np.zeros(n_series)
+
+        for t in range(width):
+            x = values[:, t]
+            present = ~np.isnan(x)
+            started = present & ~np.isnan(mean)
+
+            # Only score once the variance estimate has warmed up
+            std = np.fmax(np.sqrt(var), scale)
+            deviation = np.where(std > 0, np.abs(x - mean) / std, 0.0)
+            scored = started & (seen >= self.min_points)
+            worst = np.where(scored, np.maximum(worst, deviation), worst)
+            seen += present
+
+            diff = x - mean
+            new_mean = np.where(started, mean + alpha * diff, mean)
+            var = np.where(started, (1 - alpha) * (var + alpha * diff * diff), var)
+            mean = np.where(present & np.isnan(mean), x, new_mean)
+
+        return worst
+
+    def _seasonal_deviation(self, values: np.ndarray, scale: np.ndarray) -> np.ndarray:
+        """Largest change against the same point one season earlier, in robust scale units"""
+        season = self.season_length
+        if season <= 0 or values.shape[1] <= season:
+            return np.zeros(values.shape[0])
+        change = np.abs(values[:, season:] - values[:, :-season]) / scale[:, None]
+        return np.nanmax(change, axis=1)
+
+    def rank(self, metrics: Sequence, top_k: int) -> List[SeriesAnomaly]:
+        """
+        Score all series in a metric list and return the top-K most anomalous
+
+        Args:
+            metrics: Metric objects or dicts
+            top_k: Maximum number of series to return
+
+        Returns:
+            Series scoring above `min_score`, ordered by descending anomaly score
+        """
+        keys, values = group_series(metrics)
+        if not keys:
+            return []
+
+        scores = self.score_matrix(values)
+        # Stable descending order so equally scored series keep their input order
+        order = np.argsort(-scores["score"], kind="stable")
+        order = order[scores["score"][order] > self.min_score][:top_k]
+
+        results = []
+        for row in order:
+            name, labels = keys[row]
+            series = values[row][~np.isnan(values[row])]
+            results.append(SeriesAnomaly(
+                name=name,
+                labels=dict(labels),
+                score=float(scores["score"][row]),
+                robust_z=float(scores["robust_z"][row]),
+                ewma_deviation=float(scores["ewma_deviation"][row]),
+                seasonal_deviation=float(scores["seasonal_deviation"][row]),
+                points=int(scores["points"][row]),
+                last=float(series[-1]),
+                median=float(scores["median"][row]),
+                min=float(series.min()),
+                max=float(series.max())
+            ))
+        return results
+
+# Create singleton instance
+anomaly_engine = AnomalyEngine(
+    ewma_alpha=settings.monitoring.anomaly_ewma_alpha,
+    season_length=settings.monitoring.anomaly_season_length,
+    min_score=settings.monitoring.anomaly_min_score
+)
@@ -1,15 +1,23 @@
 import json
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional, Union
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import AzureChatOpenAI
 from contracts.settings import settings
 from contracts.monitoring import LogMessage, MonitoringQuery
+from utils.gc_pause import gc_paused
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 class CoralogixClient:
     def __init__(self):
         self.base_url = settings.coralogix.api_url
@@ -44,7 +52,13 @@ class CoralogixClient:
         """)
 
     async def query_logs(self, query: MonitoringQuery) -> List[LogMessage]:
-        """Query logs using the new LangChain syntax"""
+        """
+        Query logs using the new LangChain syntax
+
+        Errors are raised, not turned into an empty result, so the resilience
+        wrapper counts them against the backend's circuit breaker; it returns
+        the empty fallback to the caller.
+        """
         try:
             query_params = {
                 "query": f"severity:{query.log_level}" if query.log_level else "*",
@@ -62,7 +76,7 @@ class CoralogixClient:
             # Run the chain
             #logs_json = await chain.ainvoke({"query": query_string})
 
-            logs_json = parse_logs(mock_logs_json)
+            logs_json = parse_logs_bulk(mock_logs_json)
 
             logger.info(f"[Coralogix Client] Retrieved logs: {logs_json}")
             
@@ -85,7 +99,7 @@ class CoralogixClient:
             return logs_json
         except Exception as e:
             logger.error(f"Error querying Coralogix logs: {str(e)}")
-            return []
+            raise
         
 # Function to parse logs
 def parse_logs(logs_json: str) -> List[LogMessage]:
@@ -107,6 +121,65 @@ def parse_logs(logs_json: str) -> List[LogMessage]:
     except Exception as e:
         logger.error(f"Error parsing logs: {str(e)}")
         return []
+
+def _stringify_attributes(attributes: Optional[Dict]) -> Optional[Dict[str, str]]:
+    if not attributes:
+        return attributes
+    return {
+        k: v if isinstance(v, str) else str(v)
+        for k, v in attributes.items()
+    }
+
+def _parse_timestamps(values: List[str]) -> List[datetime]:
+    """Parse each distinct timestamp string once and map the batch onto the results"""
+    parsed = {
+        value: datetime.fromisoformat(value.replace('Z', '+00:00'))
+        for value in set(values)
+    }
+    return [parsed[value] for value in values]
+
+def parse_logs_bulk(logs_json: Union[str, bytes]) -> List[LogMessage]:
+    """
+    Parse a batch of logs without per-record pydantic validation
+
+    Every record is checked against the LogMessage schema with plain type
+    checks: timestamps must parse, level and message must be strings and
+    attributes a mapping, whose values are stringified as parse_logs does.
+    Records are then built with model_construct under `gc_paused`, since
+    collections triggered by the allocation burst dominate otherwise. Falls
+    back to parse_logs, which validates each record with pydantic, if any
+    record does not match.
+
+    Args:
+        logs_json: JSON array of log records
+
+    Returns:
+        List of LogMessage objects
+    """
+    try:
+        with gc_paused():
+            logs_data = _json_loads(logs_json)
+            if not logs_data:
+                return []
+
+            timestamps = _parse_timestamps([log['timestamp'] for log in logs_data])
+
+            construct = LogMessage.model_construct
+            logs = []
+            for timestamp, log in zip(timestamps, logs_data):
+                level, message = log['level'], log['message']
+                if type(level) is not str or type(message) is not str:
+                    raise ValueError(f"Log record {len(logs)} has a non-string level or message")
+                logs.append(construct(
+                    timestamp=timestamp,
+                    level=level,
+                    message=message,
+                    attributes=_stringify_attributes(log.get('attributes'))
+                ))
+            return logs
+    except Exception as e:
+        logger.warning(f"Bulk log parsing failed, falling back to validated parsing: {str(e)}")
+        return parse_logs(logs_json)
         
 # Mock data for testing
 mock_logs_json = """[
@@ -0,0 +1,236 @@
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import BaseModel
+from contracts.settings import settings
+from monitoring.anomaly import SeriesKey, _field, series_key
+from monitoring.log_templates import log_template
+
+DEFAULT_LOG_LEVELS = ("error", "warn", "warning")
+
+class LogMetricCorrelation(BaseModel):
+    """Lagged correlation between one log pattern and one metric series"""
+    pattern: str
+    metric: str
+    labels: Dict[str, str] = {}
+    correlation: float
+    lag_bins: int
+    lag_seconds: float
+    log_count: int
+
+def _epoch_seconds(value) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _zscore_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normalise each row to zero mean and unit variance; constant rows become zeros"""
+    centered = matrix - matrix.mean(axis=1, keepdims=True)
+    std = centered.std(axis=1, keepdims=True)
+    return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0)
+
+class CorrelationEngine:
+    """Ranks (log pattern, metric series) pairs by lagged correlation on a shared time grid"""
+
+    def __init__(
+        self,
+        bins: int = 60,
+        max_lag_bins: int = 5,
+        min_log_count: int = 2,
+        log_levels: Sequence[str] = DEFAULT_LOG_LEVELS
+    ):
+        self.bins = bins
+        self.max_lag_bins = max_lag_bins
+        self.min_log_count = min_log_count
+        self.log_levels = frozenset(level.lower() for level in log_levels)
+
+    def time_grid(self, logs: Sequence, metrics: Sequence) -> Optional[Tuple[float, float]]:
+        """
+        Shared grid covering all log and metric timestamps
+
+        Returns:
+            Tuple of (start epoch seconds, bin width in seconds), or None when
+            the data does not span any time
+        """
+        times = [_epoch_seconds(_field(record, 'timestamp')) for record in (*logs, *metrics)]
+        if not times:
+            return None
+        start, end = min(times), max(times)
+        if end <= start:
+            return None
+        # Widen slightly so the latest timestamp falls inside the last bin
+        return start, (end - start) * (1 + 1e-9) / self.bins
+
+    def _bin_index(self, timestamps: List[float], start: float, width: float) -> np.ndarray:
+        index = ((np.asarray(timestamps, dtype=float) - start) / width).astype(np.int64)
+        return np.clip(index, 0, self.bins - 1)
+
+    def bin_logs(self, logs: Sequence, start: float, width: float) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Count error and warning logs per template and time bin
+
+        Returns:
+            Pattern keys, a (patterns x bins) count matrix and total counts per pattern
+        """
+        patterns: Dict[str, int] = {}
+        rows: List[int] = []
+        timestamps: List[float] = []
+        for log in logs:
+            level = str(_field(log, 'level')).lower()
+            if level not in self.log_levels:
+                continue
+            key = f"{level.upper()}: {log_template(_field(log, 'message'))}"
+            rows.append(patterns.setdefault(key, len(patterns)))
+            timestamps.append(_epoch_seconds(_field(log, 'timestamp')))
+
+        counts = np.zeros((len(patterns), self.bins))
+        if rows:
+            np.add.at(counts, (np.asarray(rows), self._bin_index(timestamps, start, width)), 1.0)
+        return list(patterns.keys()), counts, counts.sum(axis=1)
+
+    def bin_metrics(self, metrics: Sequence, start: float, width: float) -> Tuple[List[SeriesKey], np.ndarray]:
+        """
+        Average metric points per series and time bin
+
+        Empty bins are carried forward from the previous value (backward for
+        leading gaps) so sparse scrapes do not read as drops to zero.
+
+        Returns:
+            Series keys and a (series x bins) value matrix
+        """
+        series: Dict[SeriesKey, int] = {}
+        rows: List[int] = []
+        timestamps: List[float] = []
+        values: List[float] = []
+        for metric in metrics:
+            key = series_key(_field(metric, 'name'), _field(metric, 'labels'))
+            rows.append(series.setdefault(key, len(series)))
+            timestamps.append(_epoch_seconds(_field(metric, 'timestamp')))
+            values.append(float(_field(metric, 'value')))
+
+        shape = (len(series), self.bins)
+        sums = np.zeros(shape)
+        counts = np.zeros(shape)
+        if rows:
+            index = (np.asarray(rows), self._bin_index(timestamps, start, width))
+            np.add.at(sums, index, np.asarray(values))
+            np.add.at(counts, index, 1.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            matrix = sums / counts
+        return list(series.keys()), self._fill_gaps(matrix)
+
+    @staticmethod
+    def _fill_gaps(matrix: np.ndarray) -> np.ndarray:
+        if not matrix.size:
+            return matrix
+        present = ~np.isnan(matrix)
+        columns = np.arange(matrix.shape[1])
+        # Forward fill: index of the last present column at or before each column
+        last = np.maximum.accumulate(np.where(present, columns, -1), axis=1)
+        # Backward fill leading gaps from the first present column
+        first = present.argmax(axis=1)
+        last = np.where(last < 0, first[:, None], last)
+        return np.take_along_axis(matrix, last, axis=1)
+
+    def correlate(self, log_counts: np.ndarray, metric_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best lagged Pearson correlation for every (pattern, series) pair
+
+        A positive lag means the metric moves `lag` bins after the log pattern.
+
+        Args:
+            log_counts: (patterns x bins) matrix
+            metric_values: (series x bins) matrix
+
+        Returns:
+            Tuple of (patterns x series) correlation and lag matrices
+        """
+        n_bins = log_counts.shape[1]
+        best = np.zeros((log_counts.shape[0], metric_values.shape[0]))
+        best_lag = np.zeros(best.shape, dtype=np.int64)
+        max_lag = min(self.max_lag_bins, n_bins - 2)
+
+        # Try lag 0 first so ties resolve to the simultaneous explanation
+        lags = sorted(range(-max_lag, max_lag + 1), key=abs)
+        for lag in lags:
+            if lag >= 0:
+                logs_part = log_counts[:, :n_bins - lag]
+                metrics_part = metric_values[:, lag:]
+            else:
+                logs_part = log_counts[:, -lag:]
+                metrics_part = metric_values[:, :n_bins + lag]
+
+            overlap = logs_part.shape[1]
+            corr = (_zscore_rows(logs_part) @ _zscore_rows(metrics_part).T) / overlap
+            better = np.abs(corr) > np.abs(best) + 1e-12
+            best = np.where(better, corr, best)
+            best_lag = np.where(better, lag, best_lag)
+        return best, best_lag
+
+    def rank(
+        self,
+        logs: Sequence,
+        metrics: Sequence,
+        top_k: int,
+        min_strength: float = 0.0
+    ) -> List[LogMetricCorrelation]:
+        """
+        Rank (log pattern, metric series) pairs by absolute lagged correlation
+
+        Args:
+            logs: LogMessage objects or dicts
+            metrics: Metric objects or dicts
+            top_k: Number of pairs to return
+            min_strength: Minimum absolute correlation for a pair to be reported
+
+        Returns:
+            Pairs ordered by descending absolute correlation
+        """
+        grid = self.time_grid(logs, metrics)
+        if grid is None:
+            return []
+        start, width = grid
+
+        patterns, counts, totals = self.bin_logs(logs, start, width)
+        keep = totals >= self.min_log_count
+        patterns = [pattern for pattern, kept in zip(patterns, keep) if kept]
+        counts, totals = counts[keep], totals[keep]
+
+        keys, values = self.bin_metrics(metrics, start, width)
+        if not patterns or not keys:
+            return []
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            corr, lag = self.correlate(counts, values)
+
+        strength = np.abs(corr).ravel()
+        candidates = np.flatnonzero(strength >= max(min_strength, 1e-9))
+        if candidates.size > top_k:
+            candidates = candidates[np.argpartition(-strength[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-strength[candidates], kind="stable")]
+
+        results = []
+        for flat in candidates:
+            row, column = divmod(int(flat), len(keys))
+            name, labels = keys[column]
+            results.append(LogMetricCorrelation(
+                pattern=patterns[row],
+                metric=name,
+                labels=dict(labels),
+                correlation=float(corr[row, column]),
+                lag_bins=int(lag[row, column]),
+                lag_seconds=float(lag[row, column] * width),
+                log_count=int(totals[row])
+            ))
+        return results
+
+# Create singleton instance
+correlation_engine = CorrelationEngine(
+    bins=settings.monitoring.correlation_bins,
+    max_lag_bins=settings.monitoring.correlation_max_lag_bins
+)
@@ -0,0 +1,24 @@
+import re
+from typing import Dict, Iterable
+
+_MASKS = [
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<uuid>"),
+    (re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{6,}\b"), "<hex>"),
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "<str>"),
+    (re.compile(r"\b\d+(?:\.\d+)?(?:ms|s|%|mb|kb|gb)?\b", re.IGNORECASE), "<num>"),
+]
+
+def log_template(message: str) -> str:
+    """Reduce a log message to its template by masking variable tokens"""
+    for pattern, replacement in _MASKS:
+        message = pattern.sub(replacement, message)
+    return message
+
+def template_counts(messages: Iterable[str]) -> Dict[str, int]:
+    """Count messages per template"""
+    counts: Dict[str, int] = {}
+    for message in messages:
+        template = log_template(message)
+        counts[template] = counts.get(template, 0) + 1
+    return counts
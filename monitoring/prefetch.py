@@ -0,0 +1,147 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from contracts.base import DateTimeRange
+from contracts.monitoring import MonitoringData, MonitoringQuery
+from contracts.settings import settings
+from monitoring.system import MonitoringSystem
+from utils.background import background_loop
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+def build_incident_query(incident_time: datetime, window: timedelta = timedelta(hours=1)) -> MonitoringQuery:
+    """Monitoring query covering the window around an incident"""
+    if isinstance(incident_time, str):
+        incident_time = datetime.fromisoformat(incident_time.replace('Z', '+00:00'))
+
+    return MonitoringQuery(
+        metric_name="*",
+        log_level="error",
+        date_range=DateTimeRange(
+            start=incident_time - window,
+            end=incident_time + window
+        )
+    )
+
+class MonitoringPrefetcher:
+    """
+    Starts monitoring queries in the background so analysis can reuse the result
+
+    Results not claimed within `max_age_seconds`, e.g. for incidents nobody
+    analyzes, are cancelled and dropped whenever another prefetch starts.
+    """
+
+    def __init__(self, max_concurrency: int, max_age_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_age_seconds = max_age_seconds
+
+        # incident_id -> (query key, started at, future), oldest first
+        self._pending: Dict[str, Tuple[str, float, concurrent.futures.Future]] = {}
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._monitoring_system: Optional[MonitoringSystem] = None
+
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def prefetch(self, incident_id: str, query: MonitoringQuery) -> concurrent.futures.Future:
+        """
+        Start fetching monitoring data for an incident
+
+        Args:
+            incident_id: ID of the incident the data belongs to
+            query: Monitoring query the later analysis will issue
+
+        Returns:
+            Future resolving to MonitoringData
+        """
+        future = background_loop.submit(self._fetch(query))
+        with self._lock:
+            self._sweep()
+            previous = self._pending.pop(incident_id, None)
+            if previous is not None:
+                previous[2].cancel()
+            self._pending[incident_id] = (query.model_dump_json(), time.monotonic(), future)
+            self.started += 1
+        logger.info(f"[Prefetcher] Prefetching monitoring data for incident: {incident_id}")
+        return future
+
+    def _sweep(self) -> None:
+        # Entries are in start order, so expired ones are at the front
+        cutoff = time.monotonic() - self.max_age_seconds
+        while self._pending:
+            incident_id, (_, started_at, future) = next(iter(self._pending.items()))
+            if started_at >= cutoff:
+                return
+            del self._pending[incident_id]
+            future.cancel()
+            self.expired += 1
+
+    async def _fetch(self, query: MonitoringQuery) -> MonitoringData:
+        # Created lazily so the semaphore binds to the background loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._monitoring_system = MonitoringSystem()
+
+        async with self._semaphore:
+            return await self._monitoring_system.query_monitoring_data(query)
+
+    def take(self, incident_id: str, query: MonitoringQuery) -> Optional[concurrent.futures.Future]:
+        """
+        Claim a prefetched result matching the query, if one exists
+
+        The entry is removed, so later analyses fetch fresh data.
+        """
+        with self._lock:
+            entry = self._pending.pop(incident_id, None)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            query_key, started_at, future = entry
+            if query_key != query.model_dump_json():
+                self.misses += 1
+                future.cancel()
+                return None
+            if time.monotonic() - started_at > self.max_age_seconds:
+                self.expired += 1
+                future.cancel()
+                return None
+
+            self.hits += 1
+            return future
+
+    def close(self) -> None:
+        """Cancel every prefetch not yet claimed; runs at exit"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for _, _, future in pending.values():
+            future.cancel()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._sweep()
+            return {
+                "pending": len(self._pending),
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "max_concurrency": self.max_concurrency,
+            }
+
+# Create singleton instance
+monitoring_prefetcher = MonitoringPrefetcher(
+    max_concurrency=settings.monitoring.prefetch_max_concurrency,
+    max_age_seconds=settings.monitoring.prefetch_max_age_seconds
+)
+atexit.register(monitoring_prefetcher.close)
@@ -45,7 +45,13 @@ class PrometheusClient:
         """)
 
     async def query_metrics(self, query: MonitoringQuery) -> List[Metric]:
-        """Query metrics using the new LangChain syntax"""
+        """
+        Query metrics using the new LangChain syntax
+
+        Errors are raised, not turned into an empty result, so the resilience
+        wrapper counts them against the backend's circuit breaker; it returns
+        the empty fallback to the caller.
+        """
         try:
             # Prepare query parameters
             query_params = {
@@ -77,10 +83,8 @@ class PrometheusClient:
             return [Metric.model_validate(metric) for metric in metrics_data]
             
         except Exception as e:
-            # Add proper error handling
             logger.error(f"Error querying Prometheus metrics: {str(e)}")
-            # Return empty list instead of failing
-            return []
+            raise
 
 # Mock Prometheus metrics data for testing
 mock_metrics_json = """
@@ -0,0 +1,275 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from contracts.settings import settings
+from utils.limits import ConcurrencyLimit
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Caps queries in flight across all backends, e.g. when a batch analyzes many incidents
+backend_limit = ConcurrencyLimit("monitoring", settings.monitoring.backend_max_concurrency)
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Per-backend circuit breaker with a single half-open probe"""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.successes = 0
+        self.failures = 0
+        self.rejections = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> BreakerState:
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go through to the backend"""
+        with self._lock:
+            if self._state == BreakerState.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejections += 1
+                    return False
+                # Reset timeout elapsed, let exactly one probe through
+                self._state = BreakerState.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == BreakerState.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejections += 1
+                    return False
+                self._probe_in_flight = True
+
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            if self._state != BreakerState.CLOSED:
+                logger.info(f"[Circuit Breaker] {self.name} closed after successful probe")
+            self._state = BreakerState.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if (
+                self._state == BreakerState.HALF_OPEN
+                or self._consecutive_failures >= self.failure_threshold
+            ):
+                if self._state != BreakerState.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"[Circuit Breaker] {self.name} opened after {self._consecutive_failures} failures")
+                self._state = BreakerState.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._state.value,
+                "consecutive_failures": self._consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejections": self.rejections,
+                "times_opened": self.times_opened,
+            }
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+class ResilientBackend:
+    """Wraps calls to one monitoring backend with a timeout, breaker and optional hedging"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        breaker: CircuitBreaker,
+        latency: LatencyTracker,
+        hedge_enabled: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker
+        self.latency = latency
+        self.hedge_enabled = hedge_enabled
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+
+        self.calls = 0
+        self.timeouts = 0
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+
+    async def call(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        fallback: T,
+        timeout: Optional[float] = None
+    ) -> T:
+        """
+        Run a backend operation, returning the fallback when the breaker is open
+        or the call fails or times out
+
+        Args:
+            operation: Zero-argument callable returning a fresh awaitable per attempt
+            fallback: Value returned instead of raising
+            timeout: Overrides the backend's default timeout for this call
+
+        Returns:
+            Result of the first successful attempt, or the fallback
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self.calls += 1
+        if not self.breaker.allow_request():
+            logger.warning(f"[Resilience] {self.name} circuit open, skipping call")
+            return fallback
+
+        try:
+            # The timeout starts once a slot is free, so queueing is not counted as a slow backend
+            async with backend_limit:
+                result = await asyncio.wait_for(self._run(operation), timeout=timeout)
+            self.breaker.record_success()
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"[Resilience] {self.name} timed out after {timeout}s")
+        except Exception as e:
+            logger.error(f"[Resilience] {self.name} call failed: {str(e)}")
+
+        self.breaker.record_failure()
+        return fallback
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_enabled or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.quantile(self.hedge_quantile)
+
+    async def _timed(self, operation: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        result = await operation()
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    async def _run(self, operation: Callable[[], Awaitable[T]]) -> T:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._timed(operation)
+
+        primary = asyncio.ensure_future(self._timed(operation))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            # Primary is slower than the tail estimate, race a duplicate
+            self.hedges_fired += 1
+            hedge = asyncio.ensure_future(self._timed(operation))
+            tasks.add(hedge)
+
+            last_error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def snapshot(self) -> Dict:
+        p95 = self.latency.quantile(0.95)
+        return {
+            "breaker": self.breaker.snapshot(),
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "latency_samples": len(self.latency),
+            "p95_latency_seconds": p95,
+            "hedge_enabled": self.hedge_enabled,
+            "hedges_fired": self.hedges_fired,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": self.hedge_wins / self.hedges_fired if self.hedges_fired else 0.0,
+        }
+
+# Backends are shared process-wide so breaker state survives Streamlit reruns
+_backends: Dict[str, ResilientBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name: str) -> ResilientBackend:
+    """Get or create the shared resilience wrapper for a backend"""
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            config = settings.monitoring
+            backend = ResilientBackend(
+                name=name,
+                timeout=config.backend_timeout_seconds,
+                breaker=CircuitBreaker(
+                    name,
+                    failure_threshold=config.breaker_failure_threshold,
+                    reset_timeout=config.breaker_reset_timeout_seconds
+                ),
+                latency=LatencyTracker(config.latency_window),
+                hedge_enabled=config.hedge_enabled,
+                hedge_quantile=config.hedge_quantile,
+                hedge_min_samples=config.hedge_min_samples
+            )
+            _backends[name] = backend
+        return backend
+
+def get_backend_stats() -> Dict[str, Dict]:
+    """Breaker state, latency and hedge statistics for every backend"""
+    with _backends_lock:
+        backends = list(_backends.values())
+    return {backend.name: backend.snapshot() for backend in backends}
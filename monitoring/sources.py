@@ -0,0 +1,195 @@
+import asyncio
+import random
+import threading
+from datetime import timedelta
+from enum import Enum
+from typing import Callable, Dict, FrozenSet, List, Optional
+from contracts.monitoring import LogMessage, Metric, MetricType, MonitoringQuery
+from contracts.settings import settings
+from monitoring.coralogix.client import CoralogixClient
+from monitoring.prometheus.client import PrometheusClient
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+class SourceCapability(str, Enum):
+    LOGS = "logs"
+    METRICS = "metrics"
+    TRACES = "traces"
+
+class MonitoringSource:
+    """
+    Base class for pluggable monitoring sources
+
+    Subclasses declare the data they provide in `capabilities` and implement
+    the matching query methods. The monitoring system currently fans out
+    logs and metrics queries; TRACES is declared for sources that can serve
+    trace lookups. Query methods raise on backend errors rather than return
+    an empty result, so the circuit breaker sees them.
+    """
+    name: str = "source"
+    capabilities: FrozenSet[SourceCapability] = frozenset()
+
+    async def query_logs(self, query: MonitoringQuery) -> List[LogMessage]:
+        raise NotImplementedError(f"{self.name} does not provide logs")
+
+    async def query_metrics(self, query: MonitoringQuery) -> List[Metric]:
+        raise NotImplementedError(f"{self.name} does not provide metrics")
+
+class CoralogixSource(MonitoringSource):
+    name = "coralogix"
+    capabilities = frozenset({SourceCapability.LOGS})
+
+    def __init__(self):
+        self.client = CoralogixClient()
+
+    async def query_logs(self, query: MonitoringQuery) -> List[LogMessage]:
+        return await self.client.query_logs(query)
+
+class PrometheusSource(MonitoringSource):
+    name = "prometheus"
+    capabilities = frozenset({SourceCapability.METRICS})
+
+    def __init__(self):
+        self.client = PrometheusClient()
+
+    async def query_metrics(self, query: MonitoringQuery) -> List[Metric]:
+        return await self.client.query_metrics(query)
+
+class FaultInjectingSource(MonitoringSource):
+    """Synthetic source with configurable latency, failures and hangs for scale tests"""
+
+    def __init__(
+        self,
+        name: str,
+        capabilities: FrozenSet[SourceCapability] = frozenset({SourceCapability.LOGS, SourceCapability.METRICS}),
+        records: int = 50,
+        latency: float = 0.05,
+        jitter: float = 0.05,
+        failure_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.name = name
+        self.capabilities = frozenset(capabilities)
+        self.records = records
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self._random = random.Random(seed)
+
+    async def _inject_faults(self) -> None:
+        roll = self._random.random()
+        if roll < self.hang_rate:
+            # Simulate a backend that never answers; the per-source budget cuts it off
+            await asyncio.sleep(3600)
+        await asyncio.sleep(self.latency + self._random.random() * self.jitter)
+        if self._random.random() < self.failure_rate:
+            raise ConnectionError(f"{self.name}: injected failure")
+
+    def _timestamps(self, query: MonitoringQuery):
+        start = query.date_range.start
+        span = (query.date_range.end - start).total_seconds()
+        step = span / max(self.records, 1)
+        return [start + timedelta(seconds=i * step) for i in range(self.records)]
+
+    async def query_logs(self, query: MonitoringQuery) -> List[LogMessage]:
+        await self._inject_faults()
+        return [
+            LogMessage.model_construct(
+                timestamp=timestamp,
+                level="error" if i % 3 == 0 else "warn",
+                message=f"{self.name} synthetic event {i % 7}",
+                attributes={"service": self.name, "trace_id": f"{self.name}-{i:08x}"}
+            )
+            for i, timestamp in enumerate(self._timestamps(query))
+        ]
+
+    async def query_metrics(self, query: MonitoringQuery) -> List[Metric]:
+        await self._inject_faults()
+        return [
+            Metric.model_construct(
+                name=f"{self.name}_synthetic_gauge",
+                value=float(self._random.gauss(100, 10)),
+                timestamp=timestamp,
+                type=MetricType.GAUGE,
+                labels={"service": self.name}
+            )
+            for timestamp in self._timestamps(query)
+        ]
+
+class RegisteredSource:
+    def __init__(self, name: str, factory: Callable[[], MonitoringSource], budget_seconds: float):
+        self.name = name
+        self.factory = factory
+        self.budget_seconds = budget_seconds
+        self._instance: Optional[MonitoringSource] = None
+        self._lock = threading.Lock()
+
+    @property
+    def source(self) -> MonitoringSource:
+        """Source instance, created on first use and shared afterwards"""
+        with self._lock:
+            if self._instance is None:
+                self._instance = self.factory()
+            return self._instance
+
+class SourceRegistry:
+    """Registry of monitoring sources keyed by name"""
+
+    def __init__(self):
+        self._sources: Dict[str, RegisteredSource] = {}
+        self._capabilities: Dict[str, FrozenSet[SourceCapability]] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], MonitoringSource],
+        capabilities: FrozenSet[SourceCapability],
+        budget_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Register a monitoring source
+
+        Args:
+            name: Unique source name, also used for its circuit breaker
+            factory: Builds the source on first use
+            capabilities: Data types the source provides
+            budget_seconds: Time budget per query; defaults to the backend timeout
+        """
+        if budget_seconds is None:
+            budget_seconds = settings.monitoring.backend_timeout_seconds
+        with self._lock:
+            self._sources[name] = RegisteredSource(name, factory, budget_seconds)
+            self._capabilities[name] = frozenset(capabilities)
+        logger.info(f"[Source Registry] Registered source {name} ({', '.join(sorted(c.value for c in capabilities))})")
+
+    def register_source(self, source: MonitoringSource, budget_seconds: Optional[float] = None) -> None:
+        """Register an already constructed source"""
+        self.register(source.name, lambda: source, source.capabilities, budget_seconds)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._sources.pop(name, None)
+            self._capabilities.pop(name, None)
+
+    def sources_for(self, capability: SourceCapability) -> List[RegisteredSource]:
+        with self._lock:
+            return [
+                self._sources[name]
+                for name, capabilities in self._capabilities.items()
+                if capability in capabilities
+            ]
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._sources.keys())
+
+# Create singleton instance with the built-in sources
+source_registry = SourceRegistry()
+source_registry.register("coralogix", CoralogixSource, CoralogixSource.capabilities)
+source_registry.register("prometheus", PrometheusSource, PrometheusSource.capabilities)
@@ -1,7 +1,9 @@
-from typing import Dict, List
-from contracts.monitoring import MonitoringQuery, MonitoringData
-from monitoring.coralogix.client import CoralogixClient
-from monitoring.prometheus.client import PrometheusClient
+import asyncio
+from typing import Dict, List, Optional
+from contracts.monitoring import LogMessage, Metric, MonitoringQuery, MonitoringData
+from monitoring.resilience import get_backend, get_backend_stats
+from monitoring.sources import RegisteredSource, SourceCapability, SourceRegistry, source_registry
+from utils.replay import recorded
 
 import logging
 
@@ -9,14 +11,17 @@ logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
+def _dump_models(models: List) -> List[Dict]:
+    return [model.model_dump(mode="json") for model in models]
+
 class MonitoringSystem:
-    def __init__(self):
-        self.coralogix_client = CoralogixClient()
-        self.prometheus_client = PrometheusClient()
+    def __init__(self, registry: Optional[SourceRegistry] = None):
+        self.registry = registry or source_registry
 
     async def query_monitoring_data(self, query: MonitoringQuery) -> MonitoringData:
         """
-        Query both metrics and logs data and return combined monitoring data
+        Query every registered source for logs and metrics concurrently and
+        return the combined monitoring data
         
         Args:
             query: MonitoringQuery object containing query parameters
@@ -25,13 +30,22 @@ class MonitoringSystem:
             MonitoringData object containing both metrics and logs
         """
         try:
-            metrics_data = await self.prometheus_client.query_metrics(query)
+            request = query.model_dump(mode="json")
+            log_sources = self.registry.sources_for(SourceCapability.LOGS)
+            metric_sources = self.registry.sources_for(SourceCapability.METRICS)
 
-            logger.info(f"[Monitoring System] Retrieved metrics data: {metrics_data}")
+            results = await asyncio.gather(
+                *(self._query_logs(source, query, request) for source in log_sources),
+                *(self._query_metrics(source, query, request) for source in metric_sources)
+            )
 
-            logs_data = await self.coralogix_client.query_logs(query)
+            logs_data = [log for result in results[:len(log_sources)] for log in result]
+            metrics_data = [metric for result in results[len(log_sources):] for metric in result]
 
-            logger.info(f"[Monitoring System] Retrieved logs data: {logs_data}")  
+            logger.info(
+                f"[Monitoring System] Retrieved {len(logs_data)} logs from {len(log_sources)} sources "
+                f"and {len(metrics_data)} metrics from {len(metric_sources)} sources"
+            )
 
             # Return combined data as MonitoringData object
             return MonitoringData(
@@ -41,4 +55,34 @@ class MonitoringSystem:
         except Exception as e:
                 logger.info(f"[Monitoring System] Error querying monitoring data: {str(e)}")
                 # Return empty monitoring data on error
-                return MonitoringData(metrics=[], logs=[])
\ No newline at end of file
+                return MonitoringData(metrics=[], logs=[])
+
+    async def _query_logs(self, registered: RegisteredSource, query: MonitoringQuery, request: Dict) -> List[LogMessage]:
+        return await get_backend(registered.name).call(
+            lambda: recorded(
+                f"{registered.name}.query_logs",
+                request,
+                lambda: registered.source.query_logs(query),
+                encode=_dump_models,
+                decode=lambda rows: [LogMessage.model_validate(row) for row in rows]
+            ),
+            fallback=[],
+            timeout=registered.budget_seconds
+        )
+
+    async def _query_metrics(self, registered: RegisteredSource, query: MonitoringQuery, request: Dict) -> List[Metric]:
+        return await get_backend(registered.name).call(
+            lambda: recorded(
+                f"{registered.name}.query_metrics",
+                request,
+                lambda: registered.source.query_metrics(query),
+                encode=_dump_models,
+                decode=lambda rows: [Metric.model_validate(row) for row in rows]
+            ),
+            fallback=[],
+            timeout=registered.budget_seconds
+        )
+
+    def get_backend_stats(self) -> Dict[str, Dict]:
+        """Circuit breaker state and hedge win rates per backend"""
+        return get_backend_stats()
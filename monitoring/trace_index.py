@@ -0,0 +1,285 @@
+import hashlib
+import math
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+from pydantic import BaseModel
+from contracts.settings import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+def _field(record, name: str):
+    return record.get(name) if isinstance(record, dict) else getattr(record, name, None)
+
+def _timestamp(record) -> datetime:
+    value = _field(record, 'timestamp')
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def _trace_id(record) -> Optional[str]:
+    attributes = _field(record, 'attributes')
+    if not attributes:
+        return None
+    trace_id = attributes.get('trace_id')
+    return str(trace_id) if trace_id is not None else None
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=16).digest(), "little")
+        h1, h2 = digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+class TraceStep(BaseModel):
+    """One log line of a trace with its timing relative to the trace"""
+    timestamp: datetime
+    level: str
+    message: str
+    service: Optional[str] = None
+    offset_seconds: float
+    gap_seconds: float
+
+class ServiceTiming(BaseModel):
+    """Time attributed to one service within a trace"""
+    service: str
+    log_count: int
+    error_count: int
+    seconds: float
+
+class TraceBreakdown(BaseModel):
+    """Ordered log lines and per-service latency for one trace"""
+    trace_id: str
+    start: datetime
+    end: datetime
+    duration_seconds: float
+    log_count: int
+    error_count: int
+    steps: List[TraceStep]
+    services: List[ServiceTiming]
+
+class TraceIndex:
+    """
+    Index from trace_id to log offsets, with one Bloom filter per time chunk
+
+    Offsets point into the log list the index was built from and are kept in
+    ingest order. `extend` only indexes records past the last indexed offset,
+    so appending logs is incremental.
+    """
+
+    def __init__(self, chunk_seconds: float, bloom_capacity: int, bloom_error_rate: float):
+        self.chunk_seconds = chunk_seconds
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self._offsets: Dict[str, List[int]] = {}
+        self._chunks: Dict[int, BloomFilter] = {}
+        self._last_chunk: Dict[str, int] = {}
+        self.indexed = 0
+
+    def _chunk(self, timestamp: datetime) -> int:
+        return int(timestamp.timestamp() // self.chunk_seconds)
+
+    def extend(self, logs: Sequence) -> int:
+        """
+        Index logs appended since the last call
+
+        Returns:
+            Number of newly indexed records
+        """
+        start = self.indexed
+        for offset in range(start, len(logs)):
+            record = logs[offset]
+            trace_id = _trace_id(record)
+            if trace_id is None:
+                continue
+            offsets = self._offsets.get(trace_id)
+            if offsets is None:
+                self._offsets[trace_id] = [offset]
+            else:
+                offsets.append(offset)
+
+            chunk = self._chunk(_timestamp(record))
+            # Spans of one trace usually share a chunk; hash each trace once per chunk
+            if self._last_chunk.get(trace_id) == chunk:
+                continue
+            self._last_chunk[trace_id] = chunk
+            bloom = self._chunks.get(chunk)
+            if bloom is None:
+                bloom = self._chunks[chunk] = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+            bloom.add(trace_id)
+        self.indexed = len(logs)
+        return self.indexed - start
+
+    def offsets(self, trace_id: str) -> List[int]:
+        return self._offsets.get(trace_id, [])
+
+    def __contains__(self, trace_id: str) -> bool:
+        return trace_id in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def might_contain(
+        self,
+        trace_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> bool:
+        """
+        Bloom check of whether a trace may have logs in a time range
+
+        False is definite; True may be a false positive. Without a range every
+        chunk is checked.
+        """
+        first = self._chunk(start) if start else None
+        last = self._chunk(end) if end else None
+        for chunk, bloom in self._chunks.items():
+            if (first is not None and chunk < first) or (last is not None and chunk > last):
+                continue
+            if trace_id in bloom:
+                return True
+        return False
+
+    def trace_ids(self) -> List[str]:
+        return list(self._offsets.keys())
+
+    def records(self, logs: Sequence, trace_id: str) -> List:
+        """Log records of a trace ordered by timestamp"""
+        return sorted((logs[offset] for offset in self.offsets(trace_id)), key=_timestamp)
+
+    def breakdown(self, logs: Sequence, trace_id: str) -> Optional[TraceBreakdown]:
+        """
+        Reconstruct a trace and attribute the time between consecutive log lines
+        to the service that logged the later line
+
+        Returns:
+            TraceBreakdown, or None if the trace is not indexed
+        """
+        records = self.records(logs, trace_id)
+        if not records:
+            return None
+
+        start = _timestamp(records[0])
+        previous = start
+        steps: List[TraceStep] = []
+        services: Dict[str, ServiceTiming] = {}
+        for record in records:
+            timestamp = _timestamp(record)
+            level = str(_field(record, 'level'))
+            service = (_field(record, 'attributes') or {}).get('service')
+            gap = (timestamp - previous).total_seconds()
+            steps.append(TraceStep(
+                timestamp=timestamp,
+                level=level,
+                message=_field(record, 'message'),
+                service=service,
+                offset_seconds=(timestamp - start).total_seconds(),
+                gap_seconds=gap
+            ))
+
+            timing = services.get(service or "unknown")
+            if timing is None:
+                timing = services[service or "unknown"] = ServiceTiming(
+                    service=service or "unknown", log_count=0, error_count=0, seconds=0.0
+                )
+            timing.log_count += 1
+            timing.error_count += level.lower() == "error"
+            timing.seconds += gap
+            previous = timestamp
+
+        end = _timestamp(records[-1])
+        return TraceBreakdown(
+            trace_id=trace_id,
+            start=start,
+            end=end,
+            duration_seconds=(end - start).total_seconds(),
+            log_count=len(steps),
+            error_count=sum(timing.error_count for timing in services.values()),
+            steps=steps,
+            services=sorted(services.values(), key=lambda timing: timing.seconds, reverse=True)
+        )
+
+    def get_stats(self) -> Dict:
+        return {
+            "indexed_logs": self.indexed,
+            "traces": len(self._offsets),
+            "chunks": len(self._chunks),
+            "bloom_bytes": sum(bloom.nbytes for bloom in self._chunks.values()),
+        }
+
+class TraceIndexRegistry:
+    """
+    Trace indexes keyed by incident, rebuilt when an incident's log list is replaced
+
+    Each entry holds the log list it indexed and compares it by identity, so
+    a new list is never mistaken for the old one. That keeps the list alive;
+    stores discard the entry when the incident leaves them or is compacted.
+    """
+
+    def __init__(self, chunk_seconds: float, bloom_capacity: int, bloom_error_rate: float):
+        self.chunk_seconds = chunk_seconds
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        # incident_id -> (indexed log list, index)
+        self._indexes: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def index_incident(self, incident) -> TraceIndex:
+        """
+        Bring an incident's trace index up to date with its logs
+
+        Appended logs are indexed incrementally; a replaced or shrunk log list
+        triggers a rebuild.
+        """
+        logs = incident.logs
+        with self._lock:
+            entry = self._indexes.get(incident.id)
+            if entry is None or entry[0] is not logs or entry[1].indexed > len(logs):
+                index = TraceIndex(self.chunk_seconds, self.bloom_capacity, self.bloom_error_rate)
+                self._indexes[incident.id] = (logs, index)
+            else:
+                index = entry[1]
+            added = index.extend(logs)
+
+        if added:
+            logger.info(f"[Trace Index] Indexed {added} logs for incident: {incident.id}")
+        return index
+
+    def discard(self, incident_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(incident_id, None)
+
+    def __contains__(self, incident_id: str) -> bool:
+        with self._lock:
+            return incident_id in self._indexes
+
+# Create singleton instance
+trace_index_registry = TraceIndexRegistry(
+    chunk_seconds=settings.monitoring.trace_chunk_seconds,
+    bloom_capacity=settings.monitoring.trace_bloom_capacity,
+    bloom_error_rate=settings.monitoring.trace_bloom_error_rate
+)
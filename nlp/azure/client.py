@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional
 from langchain_openai import AzureChatOpenAI
 from contracts.settings import settings
+from utils.limits import ConcurrencyLimit
 
 class AzureOpenAIClient:
     def __init__(self):
@@ -22,4 +23,7 @@ class AzureOpenAIClient:
 
 
 # Create a singleton instance
-azure_openai_client = AzureOpenAIClient()
\ No newline at end of file
+azure_openai_client = AzureOpenAIClient()
+
+# Caps chain calls in flight across the process, e.g. when a batch analyzes many incidents
+llm_limit = ConcurrencyLimit("llm", settings.azure_openai.max_concurrency)
\ No newline at end of file
@@ -1,16 +1,26 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from contracts.base import DateTimeRange
 from contracts.incident import CodeReference, IncidentState, Incident
-from nlp.azure.client import azure_openai_client
+from nlp.azure.client import azure_openai_client, llm_limit
 from nlp.prompts.root_cause import root_cause_prompt
 from nlp.prompts.code import code_analysis_prompt
 from nlp.prompts.perf import performance_analysis_prompt
+from nlp.usage import TokenUsage, record_token_usage
 from monitoring.system import MonitoringSystem
+from monitoring.prefetch import build_incident_query, monitoring_prefetcher
+from monitoring.anomaly import anomaly_engine
+from monitoring.correlation import correlation_engine
+from monitoring.trace_index import trace_index_registry
+from contracts.settings import settings
 from contracts.monitoring import LogMessage, Metric, MonitoringQuery, MonitoringData
 from memory.store import context_store
+from utils.replay import active_cassette, recorded, use_cassette
+from utils.singleflight import share_current_flight
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -57,6 +67,35 @@ class NLPProcessor:
         Returns:
             Dictionary containing analysis results and metadata
         """
+        # Record or replay backend and LLM calls per incident when enabled
+        cassette = active_cassette()
+        if cassette is not None:
+            self._record_incident(cassette, incident)
+            return await self._analyze_incident(incident)
+
+        with use_cassette(incident.id) as cassette:
+            if cassette is not None:
+                self._record_incident(cassette, incident)
+            return await self._analyze_incident(incident)
+
+    def _record_incident(self, cassette, incident: Incident) -> None:
+        """Store the incident on a recording cassette so it can be replayed offline"""
+        if "incident" not in cassette.metadata:
+            cassette.metadata["incident"] = incident.model_dump(mode="json", warnings=False)
+
+    async def _invoke_chain(self, name: str, chain, inputs: Dict) -> str:
+        """Invoke an analysis chain through the active cassette"""
+        return await recorded(f"chain.{name}", inputs, lambda: self._call_chain(chain, inputs))
+
+    async def _call_chain(self, chain, inputs: Dict) -> str:
+        """Call the LLM under the process-wide concurrency limit, counting the tokens spent"""
+        handler = UsageMetadataCallbackHandler()
+        async with llm_limit:
+            result = await chain.ainvoke(inputs, config={"callbacks": [handler]})
+        record_token_usage(TokenUsage.from_metadata(handler.usage_metadata))
+        return result
+
+    async def _analyze_incident(self, incident: Incident) -> Dict:
         try:
             logger.info(f"[NLP Processor] Analyzing incident: {incident.id}")
 
@@ -89,20 +128,31 @@ class NLPProcessor:
             
             # Update incident with monitoring data
             updated_incident = self._update_incident_with_monitoring(incident, monitoring_data)
+            trace_index_registry.index_incident(updated_incident)
 
             logger.info(f"[NLP Processor] Updated incident with monitoring data")
             # Prepare analysis inputs
             analysis_inputs = self._prepare_analysis_inputs(updated_incident, monitoring_data)
 
             logger.info(f"[NLP Processor] setting updated incident in incident state")
-            incident_state.incident = updated_incident
-            context_store.save_context(incident_state)
+
+            def set_incident(state: IncidentState) -> IncidentState:
+                state.incident = updated_incident
+                if state.live_tail is not None:
+                    # The logs and metrics were replaced, so the running counts start over
+                    state.live_tail.reseed(updated_incident.logs, updated_incident.metrics)
+                return state
+
+            incident_state = context_store.update_context(incident.id, set_incident)
+            # Requests made from here on see the enriched version; they join this analysis too
+            share_current_flight((incident.id, incident_state.version))
             logger.info(f"[NLP Processor] updated incident in incident state")
             # Run analyses concurrently
             try:
-                root_cause_result = await self.root_cause_chain.ainvoke({
+                root_cause_result = await self._invoke_chain("root_cause", self.root_cause_chain, {
                     "incident_details": analysis_inputs["incident_details"],
                     "logs": analysis_inputs["logs"],
+                    "correlations": analysis_inputs["correlations"],
                     "code_references": analysis_inputs["code_references"]
                 })
 
@@ -117,7 +167,7 @@ class NLPProcessor:
                     confidence_score=0.8  # You might want to calculate this based on the result
                 )
 
-                code_analysis_result = await self.code_analysis_chain.ainvoke({
+                code_analysis_result = await self._invoke_chain("code_analysis", self.code_analysis_chain, {
                     "code_references": analysis_inputs["code_references"]
                 })
 
@@ -130,7 +180,7 @@ class NLPProcessor:
                     confidence_score=0.8
                 )
 
-                performance_analysis_result = await self.performance_analysis_chain.ainvoke({
+                performance_analysis_result = await self._invoke_chain("performance_analysis", self.performance_analysis_chain, {
                     "incident_details": analysis_inputs["incident_details"],
                     "metrics": analysis_inputs["metrics"],
                     "logs": analysis_inputs["logs"]
@@ -145,9 +195,6 @@ class NLPProcessor:
                     output_result={"analysis": performance_analysis_result},
                     confidence_score=0.8
                 )
-                
-                # Save updated incident state
-                context_store.save_context(incident_state)
 
                 # Store final analysis results
                 analysis_results = {
@@ -161,17 +208,18 @@ class NLPProcessor:
                     }
                 }
                 
-                incident_state.analysis_results = analysis_results
-                
-                # Add a summary message to conversation history
-                incident_state.add_conversation_message(
-                    role="system",
-                    content="Analysis completed successfully",
-                    analysis_type="summary"
-                )
+                def record_results(state: IncidentState) -> None:
+                    state.analysis_results = analysis_results
 
-                # Save incident state
-                context_store.save_context(incident_state)
+                    # Add a summary message to conversation history
+                    state.add_conversation_message(
+                        role="system",
+                        content="Analysis completed successfully",
+                        analysis_type="summary"
+                    )
+
+                # Save incident state; retried on top of any concurrent save
+                context_store.update_context(incident.id, record_results)
 
                 return analysis_results
 
@@ -237,25 +285,18 @@ class NLPProcessor:
         try:
             logger.info(f"[NLP Processor] Getting monitoring data for incident: {incident.id}")
 
-            # Create a time window from incident creation time
-            # Default to 1 hour before incident creation
-            incident_time = incident.created_at
-            if isinstance(incident_time, str):
-                incident_time = datetime.fromisoformat(incident_time.replace('Z', '+00:00'))
-            
-            start_time = incident_time - timedelta(hours=1)
-            end_time = incident_time + timedelta(hours=1)
-            
-            query = MonitoringQuery(
-                metric_name="*",
-                log_level="error",
-                date_range=DateTimeRange(
-                    start=start_time,
-                    end=end_time
-                )
-            )
+            # Create a time window of 1 hour around incident creation time
+            query = build_incident_query(incident.created_at)
 
             logger.info(f"[NLP Processor] Monitoring query: {query}")
+
+            # Reuse data prefetched at incident creation, unless calls are being recorded
+            if active_cassette() is None:
+                prefetched = monitoring_prefetcher.take(incident.id, query)
+                if prefetched is not None:
+                    logger.info(f"[NLP Processor] Using prefetched monitoring data for incident: {incident.id}")
+                    return await asyncio.wrap_future(prefetched)
+
             return await self.monitoring_system.query_monitoring_data(query)
         except Exception as e:
             logger.error(f"[NLP Processor] Error retrieving monitoring data: {str(e)}")
@@ -299,7 +340,8 @@ class NLPProcessor:
             "incident_details": incident.description,
             "logs": self._format_logs(monitoring_data.logs),
             "code_references": self._format_code_references(incident.code_references),
-            "metrics": self._format_metrics(monitoring_data.metrics)
+            "metrics": self._format_metrics(monitoring_data.metrics),
+            "correlations": self._format_correlations(monitoring_data.logs, monitoring_data.metrics)
         }
 
     def _format_logs(self, logs: List[LogMessage]) -> str:
@@ -325,14 +367,43 @@ class NLPProcessor:
         )
 
     def _format_metrics(self, metrics: List[Metric]) -> str:
-        """Format metrics for analysis"""
+        """Format the most anomalous metric series for analysis"""
         if not metrics:
             return "No metrics available"
-            
+
+        ranked = anomaly_engine.rank(metrics, settings.monitoring.anomaly_top_k)
+        if not ranked:
+            return "No anomalous metrics"
         return "\n".join(
-            f"{metric.name} = {metric.value}" +
-            (f" | Labels: {metric.labels}" if metric.labels else "")
-            for metric in metrics
+            f"{series.name} = {series.last}" +
+            (f" | Labels: {series.labels}" if series.labels else "") +
+            f" | anomaly_score={series.score:.2f} median={series.median:.4g} "
+            f"min={series.min:.4g} max={series.max:.4g} points={series.points}"
+            for series in ranked
+        )
+
+    def _format_correlations(self, logs: List[LogMessage], metrics: List[Metric]) -> str:
+        """Format the strongest log pattern / metric correlations for analysis"""
+        pairs = correlation_engine.rank(
+            logs,
+            metrics,
+            settings.monitoring.correlation_top_k,
+            min_strength=settings.monitoring.correlation_min_strength
+        )
+        if not pairs:
+            return "No correlated log patterns and metrics found"
+
+        def describe_lag(pair) -> str:
+            if pair.lag_bins == 0:
+                return "together"
+            direction = "after" if pair.lag_bins > 0 else "before"
+            return f"metric moves {abs(pair.lag_seconds):.0f}s {direction} logs"
+
+        return "\n".join(
+            f"{pair.pattern} (x{pair.log_count}) <-> {pair.metric}" +
+            (f" {pair.labels}" if pair.labels else "") +
+            f" | corr={pair.correlation:+.2f} | {describe_lag(pair)}"
+            for pair in pairs
         )
 
     def _calculate_analysis_coverage(self, monitoring_data: MonitoringData) -> Dict:
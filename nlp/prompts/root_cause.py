@@ -9,6 +9,9 @@ Incident Details:
 Logs:
 {logs}
 
+Log Patterns and Metrics That Moved Together:
+{correlations}
+
 Code References:
 {code_references}
 
@@ -16,6 +19,6 @@ Root Cause:
 """
 
 root_cause_prompt = PromptTemplate(
-    input_variables=["incident_details", "logs", "code_references"],
+    input_variables=["incident_details", "logs", "correlations", "code_references"],
     template=root_cause_template,
 )
\ No newline at end of file
@@ -0,0 +1,58 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Tuple
+from pydantic import BaseModel
+
+class TokenUsage(BaseModel):
+    """LLM calls and tokens spent"""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+
+    @classmethod
+    def from_metadata(cls, usage_metadata: Dict[str, Dict]) -> "TokenUsage":
+        """Usage from a langchain UsageMetadataCallbackHandler's per-model metadata"""
+        usage = cls(calls=1)
+        for metadata in usage_metadata.values():
+            usage.prompt_tokens += metadata.get("input_tokens", 0)
+            usage.completion_tokens += metadata.get("output_tokens", 0)
+            usage.total_tokens += metadata.get("total_tokens", 0)
+        return usage
+
+# Accumulators of the enclosing track_token_usage blocks; each asyncio task sees its own
+_tracking: ContextVar[Tuple[TokenUsage, ...]] = ContextVar("token_usage", default=())
+
+# Process-wide total
+token_usage = TokenUsage()
+_total_lock = threading.Lock()
+
+def record_token_usage(usage: TokenUsage) -> None:
+    """Add one call's usage to the process total and every enclosing tracking block"""
+    with _total_lock:
+        token_usage.add(usage)
+    for accumulator in _tracking.get():
+        accumulator.add(usage)
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsage]:
+    """
+    Collect the tokens spent by LLM calls made inside the block
+
+    Tracking follows the asyncio task, so concurrent analyses started with
+    asyncio.gather each count only their own calls. Replayed calls spend
+    nothing and are not counted.
+    """
+    usage = TokenUsage()
+    token = _tracking.set(_tracking.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _tracking.reset(token)
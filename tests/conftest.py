@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional, Sequence
+
+import pytest
+
+from contracts.incident import EnvironmentContext, Incident, IncidentState
+
+
+@pytest.fixture
+def make_state():
+    """Factory for the checkout latency incident the store tests share"""
+
+    def make(
+        incident_id: str = "INC-1",
+        logs: Sequence = (),
+        status: str = "new",
+        now: Optional[datetime] = None
+    ) -> IncidentState:
+        now = now or datetime.utcnow()
+        incident = Incident(
+            id=incident_id,
+            title="checkout latency spike",
+            description="p99 latency on checkout above SLO",
+            severity="high",
+            status=status,
+            context=EnvironmentContext(application="shop", environment="prod", component="checkout"),
+            logs=list(logs),
+            metrics=[],
+            code_references=[],
+            created_at=now,
+            updated_at=now,
+        )
+        return IncidentState(incident_id=incident_id, incident=incident, last_updated=now)
+
+    return make
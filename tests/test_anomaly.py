@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from contracts.monitoring import Metric
+from monitoring.anomaly import AnomalyEngine, group_series
+
+START = datetime(2024, 1, 1)
+
+
+def point(value: float, seconds: int, labels):
+    return {"name": "latency", "value": value, "timestamp": START + timedelta(seconds=seconds), "type": "gauge",
+            "labels": labels}
+
+
+def test_group_series_orders_points_and_merges_label_orders():
+    metrics = [
+        point(3.0, 30, {"pod": "a", "region": "eu"}),
+        Metric(**point(1.0, 10, {"region": "eu", "pod": "a"})),
+        point(7.0, 5, {"pod": "b", "region": "eu"}),
+        Metric(**point(2.0, 20, {"pod": "a", "region": "eu"})),
+    ]
+    keys, matrix = group_series(metrics)
+
+    assert keys == [("latency", (("pod", "a"), ("region", "eu"))), ("latency", (("pod", "b"), ("region", "eu")))]
+    np.testing.assert_array_equal(matrix, [[1.0, 2.0, 3.0], [np.nan, np.nan, 7.0]])
+
+
+def test_group_series_of_nothing():
+    keys, matrix = group_series([])
+    assert keys == [] and matrix.shape == (0, 0)
+
+
+def test_rank_leaves_out_series_that_never_moved():
+    flat = [point(5.0, 10 * i, {"pod": "flat"}) for i in range(10)]
+    spiky = [point(100.0 + (i % 2), 10 * i, {"pod": "spiky"}) for i in range(9)] + [point(400.0, 90, {"pod": "spiky"})]
+
+    ranked = AnomalyEngine().rank(flat + spiky, top_k=10)
+
+    assert [series.labels["pod"] for series in ranked] == ["spiky"]
+    assert ranked[0].score > 0
+    assert AnomalyEngine(min_score=1e9).rank(flat + spiky, top_k=10) == []
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+
+# The manager's analyzer builds Azure OpenAI clients on import; no calls are made
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test")
+
+import core.batch
+from core.batch import BatchAnalysisRunner, BatchCheckpoint
+from memory.index import IncidentQuery
+from memory.store import ContextStore
+
+
+class FakeManager:
+    """Stands in for IncidentManager.analyze_incident; fails the incidents in `failing`"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def analyze_incident(self, incident_id: str):
+        self.calls.append(incident_id)
+        if incident_id in self.failing:
+            return {"error": "model timed out"}
+        return {"analysis": "ok"}
+
+
+def run(runner, batch_id, query=None):
+    return asyncio.run(runner.run(query, batch_id))
+
+
+def test_resume_skips_done_incidents_and_retries_failed_and_torn_ones(tmp_path, monkeypatch, make_state):
+    store = ContextStore(ttl_seconds=0)
+    store.save_many([make_state(f"INC-{number}") for number in range(4)])
+    monkeypatch.setattr(core.batch, "context_store", store)
+    directory = str(tmp_path / "batches")
+
+    manager = FakeManager(failing={"INC-1"})
+    summary = run(BatchAnalysisRunner(manager, concurrency=1, checkpoint_dir=directory), "review", IncidentQuery())
+    assert (summary.total, summary.succeeded, summary.failed) == (4, 3, 1)
+    assert summary.errors == {"INC-1": "model timed out"}
+
+    # Crash while writing the last entry: it is cut short and has no newline
+    path = BatchCheckpoint(directory, "review").path
+    with open(path) as handle:
+        lines = handle.read().splitlines()
+    torn = json.loads(lines[-1])["incident_id"]
+    with open(path, "w") as handle:
+        handle.write("\n".join(lines[:-1]) + "\n" + lines[-1][:12])
+
+    manager = FakeManager()
+    summary = run(BatchAnalysisRunner(manager, concurrency=1, checkpoint_dir=directory), "review")
+    assert sorted(manager.calls) == sorted({"INC-1", torn})
+    assert summary.resumed == 4 - len(manager.calls)
+    assert summary.failed == 0
+
+    # Entries written after the torn line are kept, so a further resume has nothing left to do
+    incident_ids, done = BatchCheckpoint(directory, "review").load()
+    assert len(incident_ids) == 4 and done == set(incident_ids)
+    manager = FakeManager()
+    summary = run(BatchAnalysisRunner(manager, concurrency=1, checkpoint_dir=directory), "review")
+    assert manager.calls == [] and summary.resumed == 4
+
+
+def test_resume_works_through_the_incidents_resolved_at_the_start(tmp_path, monkeypatch, make_state):
+    store = ContextStore(ttl_seconds=0)
+    store.save_many([make_state(f"INC-{number}") for number in range(2)])
+    monkeypatch.setattr(core.batch, "context_store", store)
+    directory = str(tmp_path / "batches")
+
+    run(BatchAnalysisRunner(FakeManager(failing={"INC-0", "INC-1"}), checkpoint_dir=directory), "review", IncidentQuery())
+    # Incidents created after the batch started are not part of it
+    store.save_context(make_state("INC-2"))
+
+    manager = FakeManager()
+    run(BatchAnalysisRunner(manager, checkpoint_dir=directory), "review", IncidentQuery())
+    assert sorted(manager.calls) == ["INC-0", "INC-1"]
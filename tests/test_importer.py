@@ -0,0 +1,56 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+
+# The manager's analyzer builds Azure OpenAI clients on import; no calls are made
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test")
+
+import core.manager
+from core.importer import IncidentImporter
+from core.manager import IncidentManager
+from memory.store import ContextStore
+
+
+def make_record(incident_id: str, title: str):
+    now = datetime.utcnow().isoformat()
+    return {
+        "id": incident_id,
+        "title": title,
+        "description": "p99 latency on checkout above SLO",
+        "severity": "high",
+        "status": "resolved",
+        "context": {"application": "shop", "environment": "prod", "component": "checkout"},
+        "logs": [], "metrics": [], "code_references": [],
+        "created_at": now, "updated_at": now,
+    }
+
+
+def write_export(path, records) -> str:
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+def test_reimport_keeps_existing_incidents_unless_overwriting(tmp_path, monkeypatch):
+    store = ContextStore(ttl_seconds=0)
+    monkeypatch.setattr(core.manager, "context_store", store)
+    manager = IncidentManager()
+
+    first = write_export(tmp_path / "first.ndjson", [make_record("TRK-1", "first"), make_record("TRK-2", "first")])
+    report = asyncio.run(IncidentImporter(manager).import_file(first))
+    assert (report.imported, report.skipped) == (2, 0)
+    store.update_context("TRK-1", lambda state: setattr(state, "analysis_results", {"root_cause": "pool"}))
+
+    again = write_export(tmp_path / "again.ndjson", [
+        make_record("TRK-1", "again"), make_record("TRK-3", "again"), make_record("TRK-3", "duplicate"),
+    ])
+    report = asyncio.run(IncidentImporter(manager).import_file(again))
+    assert (report.imported, report.skipped) == (1, 2)
+    assert store.get_context("TRK-1").analysis_results == {"root_cause": "pool"}
+    assert store.get_context("TRK-3").incident.title == "again"
+
+    report = asyncio.run(IncidentImporter(manager, overwrite=True).import_file(again))
+    assert store.get_context("TRK-1").incident.title == "again"
+    assert store.get_context("TRK-1").analysis_results is None
@@ -0,0 +1,34 @@
+import gc
+import json
+
+from monitoring.coralogix.client import mock_logs_json, parse_logs, parse_logs_bulk
+from utils.gc_pause import gc_paused
+
+
+def test_bulk_parsing_checks_every_record():
+    logs = json.loads(mock_logs_json)
+    logs[-1]["message"] = {"text": "not a string"}
+    payload = json.dumps(logs)
+
+    assert parse_logs_bulk(payload) == parse_logs(payload)
+
+
+def test_bulk_parsing_matches_validated_parsing():
+    assert parse_logs_bulk(mock_logs_json) == parse_logs(mock_logs_json)
+
+
+def test_gc_pause_is_shared_and_restores_the_collector():
+    assert gc.isenabled()
+    with gc_paused():
+        with gc_paused():
+            assert not gc.isenabled()
+        assert not gc.isenabled()
+    assert gc.isenabled()
+
+    gc.disable()
+    try:
+        with gc_paused():
+            pass
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
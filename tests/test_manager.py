@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+# The manager's analyzer builds Azure OpenAI clients on import; no calls are made
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test")
+
+import core.manager
+from core.manager import IncidentManager
+from memory.store import ContextStore
+
+
+def test_patch_journals_one_update_message_with_the_save(monkeypatch, make_state):
+    store = ContextStore(ttl_seconds=0)
+    store.save_context(make_state())
+    monkeypatch.setattr(core.manager, "context_store", store)
+
+    save_context = store.save_context
+    attempts = []
+
+    def interleaved(state, expected_version=None):
+        attempts.append(expected_version)
+        if len(attempts) == 1:
+            # Another writer saves its own copy between the read and the compare-and-set
+            other = make_state()
+            other.incident.title = "checkout outage"
+            save_context(other)
+        save_context(state, expected_version=expected_version)
+
+    monkeypatch.setattr(store, "save_context", interleaved)
+    previous = asyncio.run(IncidentManager().patch_incident("INC-1", {"severity": "critical"}))
+
+    assert previous == {"severity": "high"}
+    assert attempts == [1, 2]
+    current = store.get_context("INC-1")
+    assert (current.incident.title, current.incident.severity) == ("checkout outage", "critical")
+    messages = store.journal.read("INC-1", "conversation")
+    assert [message["content"] for message in messages] == ["Incident updated: severity"]
+
+
+def test_patch_does_not_reread_the_incident_after_saving(monkeypatch, make_state):
+    store = ContextStore(ttl_seconds=0)
+    store.save_context(make_state())
+    monkeypatch.setattr(core.manager, "context_store", store)
+
+    save_context = store.save_context
+
+    def save_then_remove(state, expected_version=None):
+        save_context(state, expected_version=expected_version)
+        # Cleaned up or evicted right after the save
+        store.cleanup_old_incidents(max_age_days=-1)
+
+    monkeypatch.setattr(store, "save_context", save_then_remove)
+    previous = asyncio.run(IncidentManager().patch_incident("INC-1", {"status": "resolved"}))
+
+    assert previous == {"status": "new"}
+    assert store.get_context("INC-1") is None
@@ -0,0 +1,28 @@
+import asyncio
+import time
+from datetime import datetime
+
+from monitoring.prefetch import MonitoringPrefetcher, build_incident_query
+
+
+async def never_answers(query):
+    await asyncio.sleep(3600)
+
+
+def test_unclaimed_prefetches_expire_when_the_next_one_starts():
+    prefetcher = MonitoringPrefetcher(max_concurrency=2, max_age_seconds=0.05)
+    prefetcher._fetch = never_answers
+    query = build_incident_query(datetime(2024, 1, 1))
+
+    stale = [prefetcher.prefetch(f"INC-{i}", query) for i in range(3)]
+    time.sleep(0.1)
+    fresh = prefetcher.prefetch("INC-new", query)
+
+    stats = prefetcher.get_stats()
+    assert stats["pending"] == 1
+    assert stats["expired"] == 3
+    assert all(future.cancelled() for future in stale)
+
+    prefetcher.close()
+    assert fresh.cancelled()
+    assert prefetcher.get_stats()["pending"] == 0
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from langchain_core.runnables import RunnableLambda
+
+import monitoring.coralogix.client
+from contracts.base import DateTimeRange
+from contracts.monitoring import MonitoringQuery
+from monitoring.coralogix.client import CoralogixClient
+from monitoring.resilience import BreakerState, get_backend
+from monitoring.sources import CoralogixSource, SourceRegistry
+from monitoring.system import MonitoringSystem
+
+
+class OfflineCoralogixClient(CoralogixClient):
+    def __init__(self):
+        self.query_logs_prompt = RunnableLambda(lambda inputs: inputs)
+        self.llm = RunnableLambda(lambda inputs: inputs)
+
+
+class DownSource(CoralogixSource):
+    name = "down-backend"
+
+    def __init__(self):
+        self.client = OfflineCoralogixClient()
+
+
+def test_backend_errors_open_the_breaker(monkeypatch):
+    def unreachable(_):
+        raise ConnectionError("backend down")
+
+    monkeypatch.setattr(monitoring.coralogix.client, "parse_logs_bulk", unreachable)
+    registry = SourceRegistry()
+    registry.register("down-backend", DownSource, DownSource.capabilities, budget_seconds=1.0)
+    system = MonitoringSystem(registry)
+    now = datetime(2024, 1, 1)
+    query = MonitoringQuery(date_range=DateTimeRange(start=now - timedelta(hours=1), end=now))
+
+    backend = get_backend("down-backend")
+    for _ in range(backend.breaker.failure_threshold):
+        # The caller still gets an empty result
+        assert asyncio.run(system.query_monitoring_data(query)).logs == []
+
+    assert backend.breaker.state == BreakerState.OPEN
+    # Fast failures stay out of the latency window that sets the hedge delay
+    assert len(backend.latency) == 0
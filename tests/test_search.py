@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from memory.search import SearchIndex, SearchQuery
+from memory.store import ContextStore
+
+
+def hits(store, text: str, **kwargs):
+    return [hit.incident_id for hit in store.search_incidents(SearchQuery(text=text, **kwargs)).hits]
+
+
+def test_bm25_ranks_title_matches_and_rare_terms_first(make_state):
+    store = ContextStore(ttl_seconds=0)
+    in_title = make_state("INC-1")
+    in_title.incident.title = "redis timeout on checkout"
+    in_description = make_state("INC-2")
+    in_description.incident.description = "checkout waits on a redis timeout"
+    unrelated = make_state("INC-3")
+    store.save_many([in_title, in_description, unrelated])
+
+    # Title terms weigh more than description terms
+    assert hits(store, "redis timeout") == ["INC-1", "INC-2"]
+    # A term every incident has adds little; the rare one decides the order
+    scores = store.search_incidents(SearchQuery(text="checkout redis")).hits
+    assert [hit.incident_id for hit in scores] == ["INC-1", "INC-2"]
+    assert scores[0].score > scores[1].score > 0
+    assert hits(store, "redis nonexistent") == []
+
+
+def test_log_templates_and_prefixes_are_searchable(make_state):
+    store = ContextStore(ttl_seconds=0)
+    state = make_state(logs=[
+        {"timestamp": datetime.utcnow(), "level": "error", "message": "connection pool exhausted after 30s"}
+    ])
+    store.save_context(state)
+
+    assert hits(store, "exhausted") == ["INC-1"]
+    assert hits(store, "exhau*") == ["INC-1"]
+    assert hits(store, "checkout exhau", prefix=True) == ["INC-1"]
+    assert hits(store, "exhausted", status=["resolved"]) == []
+
+
+def test_saves_reindex_and_removals_unindex(make_state):
+    store = ContextStore(ttl_seconds=0)
+    state = make_state()
+    store.save_context(state)
+    assert hits(store, "latency") == ["INC-1"]
+
+    state.incident.title = "payment gateway errors"
+    state.analysis_results = {"root_cause": "expired TLS certificate"}
+    store.save_context(state, expected_version=1)
+    assert hits(store, "spike") == []
+    assert hits(store, "gateway certificate") == ["INC-1"]
+
+    store.cleanup_old_incidents(max_age_days=-1)
+    assert hits(store, "gateway") == []
+    assert len(store.search) == 0
+
+
+def test_evicted_incidents_leave_the_index(make_state):
+    store = ContextStore(max_entries=1, ttl_seconds=0)
+    store.save_context(make_state("INC-1"))
+    store.save_context(make_state("INC-2"))
+
+    assert store.get_context("INC-1") is None
+    assert hits(store, "checkout") == ["INC-2"]
+
+
+def test_removed_incidents_stay_out_after_the_index_compacts():
+    index = SearchIndex()
+    for number in range(1100):
+        index.add(f"INC-{number}", {"title": f"disk full on node{number}"}, "new", "high")
+    for number in range(1000):
+        index.remove(f"INC-{number}")
+    # Re-indexing retires the old document, and past twice the live count the index renumbers
+    for number in range(1000, 1100):
+        index.add(f"INC-{number}", {"title": f"disk full on node{number}"}, "new", "high")
+    index.add("INC-new", {"title": "disk full on node-new"}, "new", "high")
+
+    assert index.get_stats()["compactions"] >= 1
+    page = index.search(SearchQuery(text="disk", limit=200))
+    assert page.total == 101
+    assert index.search(SearchQuery(text="node5")).total == 0
+    assert [hit.incident_id for hit in index.search(SearchQuery(text="node1050")).hits] == ["INC-1050"]
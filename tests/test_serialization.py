@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import memory.serialization
+from memory.serialization import CODECS, COMPRESSORS, MAGIC, StateSerializer, _HEADER, decode_records, encode_records
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.mark.parametrize("compression", list(COMPRESSORS))
+@pytest.mark.parametrize("codec", list(CODECS))
+def test_state_round_trips_in_every_codec_and_compression(codec, compression, make_state):
+    if not CODECS[codec][1] or not COMPRESSORS[compression][1]:
+        pytest.skip(f"{codec}/{compression} is not installed")
+    state = make_state(logs=[{"timestamp": START, "level": "error", "message": "timeout"}], now=START)
+    state.analysis_results = {"root_cause": "connection pool exhaustion"}
+
+    serializer = StateSerializer(codec=codec, compression=compression)
+    payload = serializer.dumps(state)
+
+    _, version, codec_id, compressor_id = _HEADER.unpack_from(payload)
+    assert payload[:len(MAGIC)] == MAGIC
+    assert (codec_id, compressor_id) == (CODECS[codec][0], COMPRESSORS[compression][0])
+    # The header names the codec, so any serializer reads it back
+    loaded = StateSerializer(codec="json", compression="none").loads(payload)
+    assert loaded.incident.title == state.incident.title
+    assert loaded.analysis_results == state.analysis_results
+    assert loaded.incident.logs == [{"timestamp": START, "level": "error", "message": "timeout"}]
+
+
+def test_uniform_records_round_trip_with_integer_timestamps():
+    eastern = timezone(timedelta(hours=-5))
+    records = [
+        {"timestamp": datetime(2024, 1, 1, 12, 0, i, tzinfo=eastern), "level": "error", "message": f"timeout {i}"}
+        for i in range(3)
+    ]
+    encoded = encode_records(records)
+
+    assert encoded["count"] == 3
+    assert encoded["columns"]["timestamp"]["tz"] == -5 * 3600
+    assert encoded["columns"]["level"] == {"values": ["error"] * 3}
+    assert decode_records(encoded) == records
+
+
+def test_records_with_missing_keys_and_mixed_values_round_trip():
+    records = [
+        {"timestamp": START, "level": "error", "message": "timeout", "trace_id": "4bf9"},
+        {"timestamp": START + timedelta(seconds=1), "level": "info"},
+        {"timestamp": "not a datetime", "message": "retry"},
+    ]
+    encoded = encode_records(records)
+
+    assert encoded["columns"]["trace_id"]["absent"] == [1, 2]
+    assert decode_records(encoded) == records
+    assert decode_records(encode_records([])) == []
+
+
+def test_schema_1_payload_is_upgraded_on_read(make_state, monkeypatch):
+    upgrade = memory.serialization._UPGRADES[1]
+    upgraded = []
+    monkeypatch.setitem(memory.serialization._UPGRADES, 1, lambda body: upgraded.append(body) or upgrade(body))
+    serializer = StateSerializer(codec="json", compression="zlib")
+    state = make_state(logs=[{"timestamp": START, "level": "error", "message": "timeout"}], now=START)
+    current = serializer.dumps(state)
+
+    # Schema 1 held the same body with inline record columns
+    old = _HEADER.pack(MAGIC, 1, *_HEADER.unpack_from(current)[2:]) + current[_HEADER.size:]
+    loaded = serializer.loads(old)
+    assert len(upgraded) == 1
+    assert serializer.loads(current) is not None and len(upgraded) == 1
+    assert loaded.incident.logs == [{"timestamp": START, "level": "error", "message": "timeout"}]
+
+    newer = _HEADER.pack(MAGIC, 99, *_HEADER.unpack_from(current)[2:]) + current[_HEADER.size:]
+    with pytest.raises(ValueError):
+        serializer.loads(newer)
@@ -0,0 +1,66 @@
+import pytest
+
+from memory.concurrency import ConcurrentModificationError
+from memory.index import IncidentQuery
+from memory.shared_store import SharedSQLiteContextStore
+
+
+def open_pair(tmp_path):
+    path = str(tmp_path / "incidents.db")
+    return SharedSQLiteContextStore(path, flush_interval=3600), SharedSQLiteContextStore(path, flush_interval=3600)
+
+
+def test_save_in_one_store_replaces_the_other_stores_cached_copy(tmp_path, make_state):
+    first, second = open_pair(tmp_path)
+    first.save_context(make_state())
+    cached = second.get_context("INC-1")
+    assert cached.incident.severity == "high"
+
+    state = first.get_context("INC-1")
+    state.incident.severity = "critical"
+    first.save_context(state, expected_version=1)
+
+    current = second.get_context("INC-1")
+    assert current is not cached
+    assert (current.version, current.incident.severity) == (2, "critical")
+    assert second.query_incidents(IncidentQuery(severity=["critical"])).total == 1
+    assert second.get_stats()["remote_changes"] >= 1
+    first.close()
+    second.close()
+
+
+def test_compare_and_set_holds_across_stores(tmp_path, make_state):
+    first, second = open_pair(tmp_path)
+    first.save_context(make_state())
+    stale = second.get_context("INC-1")
+
+    state = first.get_context("INC-1")
+    state.incident.status = "in_progress"
+    first.save_context(state, expected_version=1)
+
+    stale.incident.severity = "low"
+    with pytest.raises(ConcurrentModificationError):
+        second.save_context(stale, expected_version=1)
+
+    # update_context rereads the other store's save and applies the change on top
+    def downgrade(state):
+        state.incident.severity = "low"
+
+    second.update_context("INC-1", downgrade)
+    current = first.get_context("INC-1")
+    assert (current.version, current.incident.status, current.incident.severity) == (3, "in_progress", "low")
+    first.close()
+    second.close()
+
+
+def test_removal_in_one_store_drops_the_incident_from_the_other(tmp_path, make_state):
+    first, second = open_pair(tmp_path)
+    first.save_context(make_state())
+    assert second.get_context("INC-1") is not None
+
+    first.cleanup_old_incidents(max_age_days=-1)
+
+    assert second.get_context("INC-1") is None
+    assert second.list_incidents() == []
+    first.close()
+    second.close()
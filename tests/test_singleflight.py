@@ -0,0 +1,155 @@
+import asyncio
+import threading
+
+from utils.singleflight import SingleFlight, share_current_flight
+
+
+class Operation:
+    """Counts its runs and blocks each one until `release` is set"""
+
+    def __init__(self):
+        self.runs = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        self.started.set()
+        await self.release.wait()
+        return {"run": self.runs}
+
+
+def test_callers_join_the_running_flight_and_share_its_result():
+    async def scenario():
+        flights = SingleFlight("test")
+        operation = Operation()
+        leader = asyncio.create_task(flights.run(("INC-1", 1), operation))
+        await operation.started.wait()
+        joiners = [asyncio.create_task(flights.run(("INC-1", 1), operation)) for _ in range(3)]
+        await asyncio.sleep(0)
+        operation.release.set()
+        return flights, operation, await leader, await asyncio.gather(*joiners)
+
+    flights, operation, result, joined = asyncio.run(scenario())
+    assert operation.runs == 1
+    assert all(value is result for value in joined)
+    stats = flights.get_stats()
+    assert (stats["calls"], stats["executed"], stats["deduplicated"], stats["in_flight"]) == (4, 1, 3, 0)
+
+
+def test_joiners_get_the_leaders_exception():
+    async def scenario():
+        flights = SingleFlight("test")
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def failing():
+            started.set()
+            await release.wait()
+            raise RuntimeError("backend down")
+
+        leader = asyncio.create_task(flights.run("INC-1", failing))
+        await started.wait()
+        joiner = asyncio.create_task(flights.run("INC-1", failing))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(leader, joiner, return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+    assert [str(outcome) for outcome in outcomes] == ["backend down", "backend down"]
+
+
+def test_cancelled_joiner_leaves_the_run_to_the_others():
+    async def scenario():
+        flights = SingleFlight("test")
+        operation = Operation()
+        leader = asyncio.create_task(flights.run("INC-1", operation))
+        await operation.started.wait()
+        impatient = asyncio.create_task(flights.run("INC-1", operation))
+        patient = asyncio.create_task(flights.run("INC-1", operation))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        await asyncio.sleep(0)
+        operation.release.set()
+        return operation, impatient, await leader, await patient
+
+    operation, impatient, result, shared = asyncio.run(scenario())
+    assert impatient.cancelled()
+    assert operation.runs == 1 and shared is result
+
+
+def test_cancelled_leader_hands_the_run_to_a_waiting_caller():
+    async def scenario():
+        flights = SingleFlight("test")
+        operation = Operation()
+        leader = asyncio.create_task(flights.run("INC-1", operation))
+        await operation.started.wait()
+        waiter = asyncio.create_task(flights.run("INC-1", operation))
+        await asyncio.sleep(0)
+        leader.cancel()
+        operation.release.set()
+        return operation, leader, await waiter
+
+    operation, leader, result = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert operation.runs == 2 and result == {"run": 2}
+
+
+def test_new_version_runs_separately_unless_the_run_shares_it():
+    async def scenario():
+        flights = SingleFlight("test")
+        operation = Operation()
+        old = asyncio.create_task(flights.run(("INC-1", 1), operation))
+        await operation.started.wait()
+        # A save moved the incident on; its new version is a different key
+        newer = asyncio.create_task(flights.run(("INC-1", 2), operation))
+        await asyncio.sleep(0)
+        operation.release.set()
+        await asyncio.gather(old, newer)
+        separate = operation.runs
+
+        operation = Operation()
+
+        async def enriching():
+            # The run saves version 4 itself, so callers for it join
+            share_current_flight(("INC-1", 4))
+            return await operation()
+
+        leader = asyncio.create_task(flights.run(("INC-1", 3), enriching))
+        await operation.started.wait()
+        joiner = asyncio.create_task(flights.run(("INC-1", 4), enriching))
+        await asyncio.sleep(0)
+        operation.release.set()
+        shared = (await leader) is (await joiner)
+        return separate, operation.runs, shared, flights.get_stats()["in_flight"]
+
+    separate, runs, shared, in_flight = asyncio.run(scenario())
+    assert separate == 2
+    assert runs == 1 and shared
+    assert in_flight == 0
+
+
+def test_caller_on_another_event_loop_joins():
+    flights = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    async def operation():
+        runs.append(1)
+        started.set()
+        await asyncio.get_running_loop().run_in_executor(None, release.wait)
+        return "done"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(asyncio.run(flights.run("INC-1", operation))))
+    leader.start()
+    assert started.wait(5)
+
+    async def join():
+        task = asyncio.ensure_future(flights.run("INC-1", operation))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await task
+
+    results.append(asyncio.run(join()))
+    leader.join(5)
+    assert results == ["done", "done"] and len(runs) == 1
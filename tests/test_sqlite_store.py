@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from memory.sqlite_store import SQLiteContextStore
+
+
+def test_state_failing_to_serialize_stays_pending(tmp_path, monkeypatch, make_state):
+    store = SQLiteContextStore(str(tmp_path / "incidents.db"), batch_size=1000, flush_interval=3600)
+    store.save_context(make_state("INC-1"))
+
+    to_body = store.serializer.to_body
+    monkeypatch.setattr(store.serializer, "to_body", lambda state, blobs: 1 / 0)
+    assert store.flush() == 0
+    assert store.get_stats()["serialize_failures"] == 1
+
+    monkeypatch.setattr(store.serializer, "to_body", to_body)
+    assert store.flush() == 1
+    store.close()
+
+    reopened = SQLiteContextStore(str(tmp_path / "incidents.db"))
+    assert reopened.get_context("INC-1") is not None
+    reopened.close()
+
+
+def stored_versions(store) -> int:
+    return store._conn.execute("SELECT COUNT(*) FROM incident_versions").fetchone()[0]
+
+
+def test_history_is_written_with_the_flush_and_keyframes_share_record_blobs(tmp_path, make_state):
+    path = str(tmp_path / "incidents.db")
+    store = SQLiteContextStore(path, batch_size=1000, flush_interval=3600, history_keyframe_interval=1)
+    state = make_state("INC-1")
+    state.incident.logs = [{"timestamp": datetime(2024, 1, 1), "level": "error", "message": "first"}]
+    store.save_context(state)
+    state.incident.severity = "critical"
+    store.save_context(state, expected_version=1)
+
+    # Staged until the flush, but already readable
+    assert stored_versions(store) == 0
+    assert store.history.get("INC-1", 1).incident.severity == "high"
+    store.flush()
+    assert stored_versions(store) == 2
+
+    # Both keyframes and the state reference the same chunk
+    assert store._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+
+    # A replaced log list leaves the first chunk to the history alone
+    state.incident.logs = [{"timestamp": datetime(2024, 1, 1), "level": "error", "message": "second"}]
+    store.save_context(state, expected_version=2)
+    store.flush()
+    store.blob_store.prune()
+    store.close()
+
+    store = SQLiteContextStore(path, flush_interval=3600)
+    assert [log["message"] for log in store.history.get("INC-1", 1).incident.logs] == ["first"]
+    assert [log["message"] for log in store.history.get("INC-1", 3).incident.logs] == ["second"]
+    store.close()
+
+
+def test_prune_before_the_flush_keeps_deduplicated_blobs(tmp_path, make_state):
+    path = str(tmp_path / "incidents.db")
+    store = SQLiteContextStore(path, batch_size=1000, flush_interval=3600)
+    logs = [{"timestamp": datetime(2024, 1, 1), "level": "error", "message": "timeout"}]
+    old = make_state("INC-0")
+    old.incident.logs = list(logs)
+    store.save_context(old)
+    store.flush()
+
+    # Deduplicated against INC-0's chunk, which nothing links once INC-0 is gone
+    state = make_state("INC-1")
+    state.incident.logs = list(logs)
+    store.save_context(state)
+    store.blob_store.unlink("INC-0")
+    assert store.blob_store.prune() == 0
+    store.flush()
+    store.close()
+
+    store = SQLiteContextStore(path, flush_interval=3600)
+    assert [log["message"] for log in store.get_context("INC-1").incident.logs] == ["timeout"]
+    assert [log["message"] for log in store.history.get("INC-1", 1).incident.logs] == ["timeout"]
+    store.close()
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from contracts.incident import DebugLog, IncidentState
+from memory.versions import StateHistory
+
+START = datetime(2024, 1, 1)
+
+
+def make_log(message: str, offset: int = 0) -> DebugLog:
+    return DebugLog(timestamp=START + timedelta(seconds=offset), level="error", message=message)
+
+
+def save(history: StateHistory, state: IncidentState) -> None:
+    state.version += 1
+    history.record(state)
+
+
+def messages(history: StateHistory, version: int):
+    return [log["message"] for log in history.get("INC-1", version).incident.logs]
+
+
+def test_replaced_log_list_is_rebuilt_whole(make_state):
+    history = StateHistory()
+    state = make_state(logs=[make_log("old-1"), make_log("old-2", 1)])
+    save(history, state)
+
+    # An analysis swaps in a new list with more records than before
+    state.incident.logs = [make_log("new-1"), make_log("new-2", 1), make_log("new-3", 2)]
+    save(history, state)
+
+    assert messages(history, 1) == ["old-1", "old-2"]
+    assert messages(history, 2) == ["new-1", "new-2", "new-3"]
+    changed = {change.path: change.op for change in history.diff("INC-1", 1, 2)}
+    assert changed["incident.logs"] == "changed"
+
+
+def test_appends_to_the_same_list_are_stored_as_appends(make_state):
+    history = StateHistory()
+    state = make_state(logs=[make_log("old-1")])
+    save(history, state)
+
+    state.incident.logs.append(make_log("old-2", 1))
+    save(history, state)
+
+    assert messages(history, 2) == ["old-1", "old-2"]
+    changes = history.diff("INC-1", 1, 2)
+    assert [(change.path, change.op) for change in changes if change.path == "incident.logs"] == [
+        ("incident.logs", "appended")
+    ]
+
+
+def test_replaced_list_after_the_latest_version_was_evicted(make_state):
+    history = StateHistory(cached=0)
+    state = make_state(logs=[make_log("old-1"), make_log("old-2", 1)])
+    save(history, state)
+
+    state.incident.logs = [make_log("new-1"), make_log("new-2", 1), make_log("new-3", 2)]
+    save(history, state)
+
+    assert messages(history, 2) == ["new-1", "new-2", "new-3"]
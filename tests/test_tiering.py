@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from contracts.incident import DebugLog
+from memory.concurrency import ConcurrentModificationError
+from memory.sqlite_store import SQLiteContextStore
+from memory.store import ContextStore
+from memory.tiering import ColdStorage, RetentionTiering
+
+START = datetime(2024, 1, 1)
+
+
+def make_logs(count: int):
+    return [DebugLog(timestamp=START + timedelta(seconds=i), level="error", message=f"timeout after {i}ms")
+            for i in range(count)]
+
+
+def test_compaction_keeps_history_without_records(tmp_path, make_state):
+    store = SQLiteContextStore(str(tmp_path / "incidents.db"), flush_interval=3600)
+    state = make_state(logs=make_logs(3), status="resolved", now=START)
+    store.save_context(state)
+    state.incident.severity = "critical"
+    store.save_context(state, expected_version=1)
+
+    tiering = RetentionTiering(store, ColdStorage(str(tmp_path / "cold")), {"resolved": 0})
+    assert tiering.compact("INC-1", "resolved")
+
+    assert [version.version for version in store.history.versions("INC-1")] == [1, 2, 3]
+    assert store.history.get("INC-1", 1).incident.severity == "high"
+    assert store.history.get("INC-1", 1).incident.logs == []
+    assert store.history.get("INC-1", 3).compaction.log_count == 3
+    assert store.get_context("INC-1").incident.logs == []
+    store.close()
+
+
+def test_lost_compare_and_set_leaves_state_and_cold_storage_alone(tmp_path, monkeypatch, make_state):
+    store = ContextStore(ttl_seconds=0)
+    state = make_state(logs=make_logs(3), status="resolved", now=START)
+    store.save_context(state)
+    cold = ColdStorage(str(tmp_path / "cold"))
+    tiering = RetentionTiering(store, cold, {"resolved": 0})
+
+    def conflict(state, expected_version=None):
+        raise ConcurrentModificationError("saved by another process")
+
+    monkeypatch.setattr(store, "save_context", conflict)
+    assert not tiering.compact("INC-1", "resolved")
+
+    cached = store.get_context("INC-1")
+    assert len(cached.incident.logs) == 3
+    assert cached.compaction is None
+    assert len(store.history.get("INC-1", 1).incident.logs) == 3
+    assert cold.get("INC-1") is None
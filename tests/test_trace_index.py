@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from contracts.incident import DebugLog
+from memory.store import ContextStore
+from monitoring.trace_index import trace_index_registry
+
+
+def traced_logs():
+    return [DebugLog(timestamp=datetime.utcnow(), level="error", message="trace_id=4bf92f3577b34da6 request timed out")]
+
+
+def test_replaced_log_list_is_indexed_again(make_state):
+    state = make_state("TRACE-1", logs=traced_logs())
+    first = trace_index_registry.index_incident(state.incident)
+    assert trace_index_registry.index_incident(state.incident) is first
+
+    state.incident.logs = list(state.incident.logs)
+    assert trace_index_registry.index_incident(state.incident) is not first
+    trace_index_registry.discard("TRACE-1")
+
+
+def test_evicted_incident_drops_its_trace_index(make_state):
+    store = ContextStore(max_entries=1, ttl_seconds=0)
+    state = make_state("TRACE-2", logs=traced_logs())
+    store.save_context(state)
+    trace_index_registry.index_incident(state.incident)
+    assert "TRACE-2" in trace_index_registry
+
+    store.save_context(make_state("TRACE-3", logs=traced_logs()))
+    assert store.get_context("TRACE-2") is None
+    assert "TRACE-2" not in trace_index_registry
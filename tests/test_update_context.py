@@ -0,0 +1,92 @@
+import pytest
+
+from contracts.incident import IncidentState
+from memory.concurrency import ConcurrentModificationError
+from memory.store import ContextStore
+
+
+def test_retried_change_journals_its_events_once(monkeypatch, make_state):
+    store = ContextStore()
+    store.save_context(make_state())
+
+    save_context = store.save_context
+    attempts = []
+
+    def conflict_once(state, expected_version=None):
+        attempts.append(expected_version)
+        if len(attempts) == 1:
+            raise ConcurrentModificationError("saved by another process")
+        save_context(state, expected_version=expected_version)
+
+    def record_results(state: IncidentState) -> None:
+        state.analysis_results = {"root_cause": "connection pool exhaustion"}
+        state.add_conversation_message(role="system", content="Analysis completed successfully", analysis_type="summary")
+
+    monkeypatch.setattr(store, "save_context", conflict_once)
+    store.update_context("INC-1", record_results)
+
+    assert len(attempts) == 2
+    messages = store.journal.read("INC-1", "conversation")
+    assert [message["content"] for message in messages] == ["Analysis completed successfully"]
+    assert store.get_context("INC-1").conversation_history == messages
+
+
+def test_failed_change_journals_nothing(make_state):
+    store = ContextStore()
+    store.save_context(make_state())
+
+    def fail(state: IncidentState) -> None:
+        state.add_conversation_message(role="system", content="half done", analysis_type="summary")
+        raise RuntimeError("analysis crashed")
+
+    try:
+        store.update_context("INC-1", fail)
+    except RuntimeError:
+        pass
+    assert store.journal.count("INC-1", "conversation") == 0
+
+
+def test_update_retries_on_a_save_that_interleaves_with_it(make_state):
+    store = ContextStore()
+    store.save_context(make_state())
+    seen = []
+
+    def escalate(state: IncidentState) -> None:
+        seen.append(state.version)
+        if len(seen) == 1:
+            # Another writer saves its own copy after this read and before the compare-and-set
+            other = make_state()
+            other.incident.title = "checkout outage"
+            store.save_context(other, expected_version=1)
+        state.incident.severity = "critical"
+
+    store.update_context("INC-1", escalate)
+
+    assert seen == [1, 2]
+    current = store.get_context("INC-1")
+    assert current.version == 3
+    assert (current.incident.title, current.incident.severity) == ("checkout outage", "critical")
+    assert store.get_concurrency_stats()["retries"] == 1
+
+
+def test_stale_expected_version_is_rejected(make_state):
+    store = ContextStore()
+    store.save_context(make_state())
+    stale = store.get_context("INC-1").version
+    store.save_context(make_state(), expected_version=stale)
+
+    with pytest.raises(ConcurrentModificationError):
+        store.save_context(make_state(), expected_version=stale)
+    assert store.get_context("INC-1").version == 2
+
+
+def test_update_gives_up_when_every_attempt_is_overtaken(make_state):
+    store = ContextStore()
+    store.save_context(make_state())
+
+    def always_overtaken(state: IncidentState) -> None:
+        store.save_context(make_state())
+
+    with pytest.raises(ConcurrentModificationError):
+        store.update_context("INC-1", always_overtaken, max_retries=2)
+    assert store.get_concurrency_stats()["retries"] == 3
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import memory.wal
+from memory.wal import WriteAheadLog, replay
+from memory.wal_store import WALContextStore
+
+
+def encode(batch):
+    return json.dumps(batch).encode()
+
+
+def decode(payload):
+    return json.loads(payload)
+
+
+def fail_once(monkeypatch):
+    """Make the next frame write half its bytes and then fail, like a full disk"""
+    write_frame = memory.wal.write_frame
+
+    def torn_write(handle, payload):
+        monkeypatch.setattr(memory.wal, "write_frame", write_frame)
+        handle.write(b"\0\0\1\0partial")
+        handle.flush()
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(memory.wal, "write_frame", torn_write)
+
+
+def test_failed_batch_is_reported_lost_and_later_batches_survive_recovery(tmp_path, monkeypatch):
+    wal = WriteAheadLog(str(tmp_path), encode, commit_delay=0)
+    first = wal.submit("first")
+    wal.wait(first)
+
+    fail_once(monkeypatch)
+    lost = wal.submit("lost")
+    with pytest.raises(OSError):
+        wal.wait(lost)
+
+    later = wal.submit("later")
+    # The error belongs to the failed batch only
+    wal.wait(later)
+    wal.wait(first)
+    with pytest.raises(OSError):
+        wal.wait(lost)
+    assert wal.get_stats()["durable_seq"] == first
+    wal.close()
+
+    # The torn frame was cut off, so recovery keeps the write acknowledged after it
+    assert [record for _, record in replay(str(tmp_path), decode)] == ["first", "later"]
+
+
+def test_store_history_survives_restart_and_snapshot(tmp_path, make_state):
+    state = make_state(logs=[{"timestamp": datetime.utcnow(), "level": "error", "message": "timeout"}])
+    directory = str(tmp_path / "wal")
+    store = WALContextStore(directory, commit_delay=0, history_keyframe_interval=2)
+    store.save_context(state)
+    for severity in ("critical", "low"):
+        state.incident.severity = severity
+        store.save_context(state)
+    store.close()
+
+    store = WALContextStore(directory, commit_delay=0)
+    assert [version.version for version in store.list_versions("INC-1")] == [1, 2, 3]
+    assert store.get_version("INC-1", 2).incident.severity == "critical"
+    assert [log["message"] for log in store.get_version("INC-1", 1).incident.logs] == ["timeout"]
+
+    # Versions recorded after the restart extend the recovered history; records dropped from it stay dropped
+    state = store.get_context("INC-1")
+    state.incident.status = "resolved"
+    store.save_context(state)
+    store.history.drop_records("INC-1")
+    store.snapshot()
+    store.close()
+
+    store = WALContextStore(directory, commit_delay=0)
+    assert [version.version for version in store.list_versions("INC-1")] == [1, 2, 3, 4]
+    assert store.get_version("INC-1", 1).incident.logs == []
+    assert store.get_version("INC-1", 4).incident.status == "resolved"
+    store.close()
@@ -39,11 +39,11 @@ def display_incident_tabs(incident: Incident, manager):
     with tabs[0]:
             display_analysis_tab(incident_state, manager)
     with tabs[1]:
-            display_metrics_tab(current_incident)
+            display_metrics_tab(current_incident, incident_state.live_tail)
     with tabs[2]:
             display_context_tab(current_incident)
     with tabs[3]:
-            display_logs_tab(current_incident)
+            display_logs_tab(current_incident, incident_state.live_tail)
     with tabs[4]:
             display_code_tab(current_incident)
     with tabs[5]:
@@ -1,5 +1,7 @@
 import streamlit as st
 from datetime import datetime
+from core.manager import analysis_flights
+from monitoring.resilience import get_backend_stats
 
 def display_sidebar_header():
     """Display header information in sidebar"""
@@ -28,5 +30,13 @@ def display_sidebar_header():
             value=st.session_state.get('debug_mode', False),
             key='debug_mode_toggle'
         )
+
+    # Backend health for tail-latency tuning
+    if st.session_state.get('debug_mode_toggle', False):
+        with st.sidebar.expander("🩺 Monitoring Backends", expanded=False):
+            st.json(get_backend_stats())
+        # Analyses joined by concurrent requests instead of run again
+        with st.sidebar.expander("🔁 Analysis Dedup", expanded=False):
+            st.json(analysis_flights.get_stats())
     
     st.sidebar.markdown("---")
\ No newline at end of file
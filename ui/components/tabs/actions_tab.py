@@ -39,6 +39,30 @@ def display_quick_actions(incident: Incident, manager):
         if st.button("Export Analysis", key="export_button"):
             export_incident_analysis(incident)
 
+    if incident.status in (IncidentStatus.NEW.value, IncidentStatus.IN_PROGRESS.value):
+        display_live_tail_toggle(incident, manager)
+
+def display_live_tail_toggle(incident: Incident, manager):
+    """Toggle incremental tailing of new logs and metrics"""
+    active = manager.is_live_tail_active(incident.id)
+    enabled = st.checkbox(
+        "Live tail new logs and metrics",
+        value=active,
+        key="live_tail_toggle",
+        help="Append only data newer than the last poll until the incident is resolved"
+    )
+    if enabled == active:
+        return
+
+    try:
+        if enabled:
+            asyncio.run(manager.start_live_tail(incident.id))
+        else:
+            asyncio.run(manager.stop_live_tail(incident.id))
+        st.rerun()
+    except Exception as e:
+        st.error(f"Error toggling live tail: {str(e)}")
+
 # def display_advanced_options(incident: dict, manager):
 #     """Display advanced options and settings"""
 #     with st.expander("Advanced Options", expanded=False):
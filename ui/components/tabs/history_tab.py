@@ -3,14 +3,34 @@ from datetime import datetime
 
 from contracts.incident import IncidentState
 
+HISTORY_PAGE_SIZE = 20
+
+def select_history_page(incident_state: IncidentState, kind: str, label: str) -> list:
+    """Read one page of an event stream from the journal, newest page first"""
+    total = incident_state.event_count(kind)
+    if total == 0:
+        return []
+    pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"{label} page (newest is {pages})",
+            min_value=1,
+            max_value=pages,
+            value=pages,
+            key=f"{kind}_page_{incident_state.incident_id}"
+        )
+    return incident_state.history_page(kind, (page - 1) * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE)
+
 def display_history_tab(incident_state: IncidentState):
     """Display incident history and analysis steps"""
     st.markdown("### Incident History")
     
     # Display analysis steps
-    if incident_state.analysis_steps:
+    steps = select_history_page(incident_state, "analysis_step", "Analysis steps")
+    if steps:
         st.markdown("#### Analysis Steps")
-        for step in incident_state.analysis_steps:
+        for step in steps:
             with st.expander(
                 f"📋 {step['step_type']} - {step['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}",
                 expanded=False
@@ -28,9 +48,10 @@ def display_history_tab(incident_state: IncidentState):
                 st.json(step['output_result'])
 
     # Display conversation history
-    if incident_state.conversation_history:
+    messages = select_history_page(incident_state, "conversation", "Event timeline")
+    if messages:
         st.markdown("#### Event Timeline")
-        for message in incident_state.conversation_history:
+        for message in messages:
             with st.expander(
                 f"💬 {message['timestamp'].strftime('%Y-%m-%d %H:%M:%S')} - {message['role']}",
                 expanded=False
@@ -1,9 +1,13 @@
+import pandas as pd
 import streamlit as st
 from datetime import datetime
+from typing import Optional
 
 from contracts.incident import Incident
+from contracts.monitoring import LiveTailState
+from monitoring.trace_index import trace_index_registry
 
-def display_logs_tab(incident: Incident):
+def display_logs_tab(incident: Incident, live_tail: Optional[LiveTailState] = None):
     """Display logs with component state instead of session state"""
     st.markdown("### Logs")
 
@@ -52,7 +56,8 @@ def display_logs_tab(incident: Incident):
     # Apply filters
     filtered_logs = filter_logs(incident.logs, log_level, search_term, start_time, end_time)
     display_filtered_logs(filtered_logs)
-    display_log_statistics(incident.logs)
+    display_trace_view(incident)
+    display_log_statistics(incident.logs, live_tail)
 
 def apply_log_filters(logs: list) -> list:
     """Apply filters to logs with state persistence"""
@@ -163,12 +168,69 @@ Message: {log['message']}""")
                     st.markdown("**Additional Attributes:**")
                     st.json(log['attributes'])
 
-def display_log_statistics(logs: list):
+def display_trace_view(incident: Incident):
+    """Reconstruct a single request from its trace ID with a latency breakdown"""
+    index = trace_index_registry.index_incident(incident)
+    trace_ids = index.trace_ids()
+    if not trace_ids:
+        return
+
+    st.markdown("### Show Trace")
+    trace_id = st.selectbox(
+        "Trace ID",
+        options=[""] + trace_ids,
+        format_func=lambda value: value or "Select a trace...",
+        key=f"trace_select_{incident.id}"
+    )
+    if not trace_id:
+        return
+
+    breakdown = index.breakdown(incident.logs, trace_id)
+    if breakdown is None:
+        st.info("No logs found for this trace")
+        return
+
+    stat_cols = st.columns(3)
+    with stat_cols[0]:
+        st.metric("Duration", f"{breakdown.duration_seconds:.3f}s")
+    with stat_cols[1]:
+        st.metric("Log Lines", breakdown.log_count)
+    with stat_cols[2]:
+        st.metric("Errors", breakdown.error_count)
+
+    if len(breakdown.services) > 1 or breakdown.duration_seconds > 0:
+        st.markdown("**Time by Service**")
+        st.bar_chart(pd.DataFrame(
+            {"seconds": [timing.seconds for timing in breakdown.services]},
+            index=[timing.service for timing in breakdown.services]
+        ))
+
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Offset (s)": round(step.offset_seconds, 3),
+                "Gap (s)": round(step.gap_seconds, 3),
+                "Service": step.service or "",
+                "Level": step.level,
+                "Message": step.message,
+            }
+            for step in breakdown.steps
+        ]),
+        use_container_width=True
+    )
+
+def display_log_statistics(logs: list, live_tail: Optional[LiveTailState] = None):
     """Display log statistics summary"""
     st.markdown("### Log Statistics")
     
-    # Calculate statistics
-    stats = get_log_statistics(logs)
+    # While tailing, running counts avoid rescanning every log; once stopped they may be stale
+    if live_tail and live_tail.active:
+        stats = get_tail_statistics(live_tail)
+        st.caption(
+            f"Live tail active · {live_tail.appended_logs} logs appended over {live_tail.polls} polls"
+        )
+    else:
+        stats = get_log_statistics(logs)
     
     # Display statistics in columns
     stat_cols = st.columns(4)
@@ -202,4 +264,15 @@ def get_log_statistics(logs: list) -> dict:
         elif level == 'DEBUG':
             stats['debug_count'] += 1
             
-    return stats
\ No newline at end of file
+    return stats
+
+def get_tail_statistics(live_tail: LiveTailState) -> dict:
+    """Build log statistics from live tail running counts"""
+    counts = live_tail.log_level_counts
+    return {
+        'total': sum(counts.values()),
+        'error_count': counts.get('ERROR', 0),
+        'warning_count': counts.get('WARNING', 0) + counts.get('WARN', 0),
+        'info_count': counts.get('INFO', 0),
+        'debug_count': counts.get('DEBUG', 0)
+    }
@@ -3,13 +3,19 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
+from typing import Optional
 from contracts.incident import Incident
-from contracts.monitoring import MetricType
+from contracts.monitoring import LiveTailState, MetricType
+from contracts.settings import settings
+from monitoring.anomaly import anomaly_engine
 
-def display_metrics_tab(incident: Incident):
+def display_metrics_tab(incident: Incident, live_tail: Optional[LiveTailState] = None):
     """Display metrics dashboard with enhanced visualizations"""
     st.markdown("### Metrics Dashboard")
 
+    if live_tail and live_tail.active and live_tail.metric_stats:
+        display_live_tail_metric_stats(live_tail)
+
     if not incident.metrics:
         st.info("No metrics available for this incident")
         return
@@ -26,12 +32,36 @@ def display_metrics_tab(incident: Incident):
     # Metrics Overview
     display_metrics_overview(df)
 
+    # Default to the most anomalous series
+    ranked = anomaly_engine.rank(incident.metrics, settings.monitoring.anomaly_top_k)
+    anomalous_names = list(dict.fromkeys(series.name for series in ranked))
+
     # Filters and Controls
-    filtered_df = apply_metrics_filters(df)
+    filtered_df = apply_metrics_filters(df, anomalous_names)
 
     if not filtered_df.empty:
         display_metrics_visualizations(filtered_df)
 
+def display_live_tail_metric_stats(live_tail: LiveTailState):
+    """Display running per-metric statistics kept by the live tail"""
+    st.markdown("#### Live Tail Statistics")
+    st.caption(f"{live_tail.appended_metrics} metric points appended over {live_tail.polls} polls")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Metric": name,
+                "Count": int(stats["count"]),
+                "Mean": round(stats["mean"], 3),
+                "Std Dev": round((stats["m2"] / (stats["count"] - 1)) ** 0.5, 3) if stats["count"] > 1 else 0.0,
+                "Min": stats["min"],
+                "Max": stats["max"],
+                "Last": stats["last"],
+            }
+            for name, stats in sorted(live_tail.metric_stats.items())
+        ]),
+        use_container_width=True
+    )
+
 def display_metrics_overview(df: pd.DataFrame):
     """Display metrics overview statistics"""
     st.markdown("#### Metrics Overview")
@@ -50,7 +80,7 @@ def display_metrics_overview(df: pd.DataFrame):
             time_range = df['timestamp'].max() - df['timestamp'].min()
             st.metric("Time Range", f"{time_range.total_seconds()/3600:.1f}h")
 
-def apply_metrics_filters(df: pd.DataFrame) -> pd.DataFrame:
+def apply_metrics_filters(df: pd.DataFrame, preferred_metrics: list = None) -> pd.DataFrame:
     """Apply user-selected filters to metrics data"""
     # Metric Type Filter
     metric_type = st.selectbox(
@@ -66,10 +96,11 @@ def apply_metrics_filters(df: pd.DataFrame) -> pd.DataFrame:
     metric_names = sorted(df['name'].unique())
     
     # Metric Selection
+    default_metrics = [name for name in (preferred_metrics or []) if name in metric_names]
     selected_metrics = st.multiselect(
         "Select metrics to display",
         options=metric_names,
-        default=metric_names[:3] if metric_names else [],
+        default=default_metrics or metric_names[:3],
         key="metrics_selection"
     )
 
@@ -1,11 +1,94 @@
 import streamlit as st
+from datetime import datetime, timedelta
+from contracts.base import IncidentStatus, Severity
 from contracts.monitoring import MonitoringQuery
+from memory.index import IncidentQuery
+from memory.search import SearchQuery
+from memory.store import context_store
 from monitoring.system import MonitoringSystem
 from ui.components.metrics_view import display_metrics, display_performance_graph
 
+OPEN_STATUSES = [IncidentStatus.NEW, IncidentStatus.IN_PROGRESS]
+
+def display_incident_overview():
+    """Incident counts and the latest open critical incidents, served from the store indexes"""
+    st.markdown("## Incident Overview")
+
+    open_query = IncidentQuery(status=OPEN_STATUSES)
+    by_status = context_store.count_incidents("status")
+    open_by_severity = context_store.count_incidents("severity", open_query)
+    this_week = context_store.query_incidents(
+        IncidentQuery(created_from=datetime.utcnow() - timedelta(days=7), limit=0)
+    )
+
+    stat_cols = st.columns(4)
+    with stat_cols[0]:
+        st.metric("Total Incidents", sum(by_status.values()))
+    with stat_cols[1]:
+        st.metric("Open", sum(by_status.get(status.value, 0) for status in OPEN_STATUSES))
+    with stat_cols[2]:
+        st.metric("Open Critical", open_by_severity.get(Severity.CRITICAL.value, 0))
+    with stat_cols[3]:
+        st.metric("Created This Week", this_week.total)
+
+    if not by_status:
+        st.info("No incidents recorded yet")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Open by Severity**")
+        st.bar_chart({severity.value: open_by_severity.get(severity.value, 0) for severity in Severity})
+    with col2:
+        st.markdown("**Open by Application**")
+        st.bar_chart(context_store.count_incidents("application", open_query))
+
+    critical = context_store.query_incidents(
+        IncidentQuery(status=OPEN_STATUSES, severity=[Severity.CRITICAL], limit=10)
+    )
+    if critical.incident_ids:
+        st.markdown("**Latest Open Critical Incidents**")
+        for incident_id in critical.incident_ids:
+            state = context_store.get_context(incident_id)
+            if state:
+                st.markdown(f"- `{incident_id}` {state.incident.title} ({state.incident.context.application})")
+
+def display_incident_search():
+    """Ranked full-text search over past incidents, their log templates and analyses"""
+    st.markdown("## Search Incidents")
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        text = st.text_input("Search", placeholder="e.g. connection pool timeout")
+    with col2:
+        statuses = st.multiselect("Status", list(IncidentStatus), format_func=lambda status: status.value)
+    with col3:
+        severities = st.multiselect("Severity", list(Severity), format_func=lambda severity: severity.value)
+    if not text.strip():
+        return
+
+    results = context_store.search_incidents(SearchQuery(
+        text=text,
+        status=statuses or None,
+        severity=severities or None,
+        prefix=True,
+        limit=20
+    ))
+    st.caption(f"{results.total} matching incidents")
+    for hit in results.hits:
+        state = context_store.get_context(hit.incident_id)
+        if state:
+            incident = state.incident
+            st.markdown(
+                f"- `{hit.incident_id}` {incident.title} "
+                f"({incident.status.value}, {incident.severity.value}, {incident.context.component})"
+            )
+
 async def insights_page():
     st.markdown("# Insights Dashboard")
 
+    display_incident_overview()
+    display_incident_search()
+
     # Fetch metrics data
     monitoring_system = MonitoringSystem()
     query = MonitoringQuery(metric_name="*")
@@ -15,4 +98,4 @@ async def insights_page():
     display_metrics(metrics["metrics"])
 
     st.markdown("## Performance Trends")
-    display_performance_graph(metrics["metrics"])
\ No newline at end of file
+    display_performance_graph(metrics["metrics"])
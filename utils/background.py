@@ -0,0 +1,66 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Coroutine, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+class BackgroundLoop:
+    """Event loop on a daemon thread for work that must outlive a single asyncio.run"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name=self.name,
+                    daemon=True
+                )
+                self._thread.start()
+                # A daemon thread still running a task while the interpreter shuts down can abort the process
+                atexit.register(self.stop)
+                logger.info(f"[Background Loop] Started {self.name}")
+            return self._loop
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the background loop from any thread"""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel the loop's remaining tasks and stop its thread; runs at exit"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def cancel_tasks():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"[Background Loop] Tasks on {self.name} did not stop cleanly: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        logger.info(f"[Background Loop] Stopped {self.name}")
+
+# Shared loop for prefetching and other background monitoring work
+background_loop = BackgroundLoop("monitoring-background")
@@ -0,0 +1,33 @@
+import gc
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+_lock = threading.Lock()
+# Callers currently inside gc_paused, and whether the collector was on when the first one entered
+_depth = 0
+_was_enabled = False
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector while allocating a large acyclic batch
+
+    The collector is process-wide, so nested and concurrent callers share one
+    pause: the first caller in turns it off and the last one out turns it
+    back on, only if it was on to begin with. Keep the block to the
+    allocation burst itself; other threads run without collection meanwhile.
+    """
+    global _depth, _was_enabled
+    with _lock:
+        if _depth == 0:
+            _was_enabled = gc.isenabled()
+            gc.disable()
+        _depth += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _depth -= 1
+            if _depth == 0 and _was_enabled:
+                gc.enable()
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+class ConcurrencyLimit:
+    """
+    Caps how many calls run at once across every event loop in the process
+
+    Streamlit runs each action under its own asyncio.run and background work
+    runs on a separate loop, so an asyncio.Semaphore, which belongs to one
+    loop, would only cap calls made from that loop. Here slots are counted
+    under a thread lock and waiters are woken on their own loop, in the order
+    they arrived. A limit of 0 or less disables the cap but keeps the counts.
+
+    Usage:
+        async with llm_limit:
+            await chain.ainvoke(inputs)
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+        self.in_flight = 0
+        self.peak = 0
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        self.acquired += 1
+        self.peak = max(self.peak, self.in_flight)
+
+    async def acquire(self) -> None:
+        """Wait for a free slot"""
+        with self._lock:
+            if self.limit <= 0 or (self.in_flight < self.limit and not self._waiters):
+                self._enter()
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+            self.waits += 1
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            # A slot handed to a waiter cancelled before its wake-up is passed on by `_wake`
+            if handed_over and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            with self._lock:
+                self.wait_seconds += time.monotonic() - started
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiter if there is one"""
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._wake, future)
+                except RuntimeError:
+                    # The waiter's loop has closed
+                    continue
+                self.acquired += 1
+                return
+            self.in_flight -= 1
+
+    def _wake(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self) -> "ConcurrencyLimit":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "peak": self.peak,
+                "acquired": self.acquired,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+            }
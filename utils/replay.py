@@ -0,0 +1,183 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from contracts.settings import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+class ReplayMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recorded response matches a request"""
+
+class ReplayedError(RuntimeError):
+    """Re-raises an error that was recorded for a request"""
+
+def _identity(value: Any) -> Any:
+    return value
+
+def request_key(kind: str, request: Any) -> str:
+    """Stable key for a request payload"""
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(f"{kind}:{payload}".encode()).hexdigest()
+
+class Cassette:
+    """Compressed per-incident recording of backend and LLM calls"""
+
+    def __init__(self, path: str, mode: ReplayMode, speed: float = 1.0):
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.metadata: Dict[str, Any] = {}
+        self.entries: List[Dict] = []
+        self._started = time.monotonic()
+        self._queues: Dict[Tuple[str, str], Deque[Dict]] = defaultdict(deque)
+
+        if mode == ReplayMode.REPLAY:
+            self._load()
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get("kind") == "metadata":
+                    self.metadata = entry["metadata"]
+                    continue
+                self.entries.append(entry)
+                self._queues[(entry["kind"], entry["key"])].append(entry)
+        logger.info(f"[Replay] Loaded {len(self.entries)} recorded calls from {self.path}")
+
+    def save(self) -> None:
+        """Write the cassette atomically"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "metadata", "metadata": self.metadata}, default=str) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+        logger.info(f"[Replay] Recorded {len(self.entries)} calls to {self.path}")
+
+    async def call(
+        self,
+        kind: str,
+        request: Any,
+        operation: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any] = _identity,
+        decode: Callable[[Any], Any] = _identity
+    ) -> Any:
+        """
+        Record or replay a single call
+
+        Args:
+            kind: Call type, e.g. "prometheus.query_metrics"
+            request: JSON-serialisable request payload used for matching
+            operation: Zero-argument callable performing the real call
+            encode: Converts the response to a JSON-serialisable value
+            decode: Rebuilds the response from its recorded value
+
+        Returns:
+            The live or replayed response
+        """
+        key = request_key(kind, request)
+
+        if self.mode == ReplayMode.REPLAY:
+            queue = self._queues.get((kind, key))
+            if not queue:
+                raise CassetteMissError(f"No recorded response for {kind} in {self.path}")
+            entry = queue.popleft()
+            if self.speed > 0:
+                await asyncio.sleep(entry["elapsed"] / self.speed)
+            if entry.get("error"):
+                raise ReplayedError(entry["error"])
+            return decode(entry["response"])
+
+        started = time.monotonic()
+        entry = {
+            "kind": kind,
+            "key": key,
+            "request": request,
+            "offset": started - self._started,
+        }
+        try:
+            result = await operation()
+        except Exception as e:
+            entry["elapsed"] = time.monotonic() - started
+            entry["error"] = str(e)
+            self.entries.append(entry)
+            raise
+
+        entry["elapsed"] = time.monotonic() - started
+        entry["response"] = encode(result)
+        self.entries.append(entry)
+        return result
+
+_active_cassette: ContextVar[Optional[Cassette]] = ContextVar("active_cassette", default=None)
+
+def cassette_path(name: str) -> str:
+    return os.path.join(settings.replay.directory, f"{name}.jsonl.gz")
+
+@contextmanager
+def use_cassette(
+    name: str,
+    mode: Optional[ReplayMode] = None,
+    speed: Optional[float] = None
+):
+    """
+    Activate a cassette for all recorded calls made in this context
+
+    Args:
+        name: Cassette name, usually the incident ID
+        mode: Overrides the configured replay mode
+        speed: Replay speed multiplier; 0 serves responses without delay
+
+    Yields:
+        The active Cassette, or None when recording is off
+    """
+    mode = ReplayMode(mode or settings.replay.mode)
+    if mode == ReplayMode.OFF:
+        yield None
+        return
+
+    cassette = Cassette(
+        cassette_path(name),
+        mode,
+        settings.replay.speed if speed is None else speed
+    )
+    token = _active_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active_cassette.reset(token)
+        if mode == ReplayMode.RECORD:
+            cassette.save()
+
+def active_cassette() -> Optional[Cassette]:
+    return _active_cassette.get()
+
+async def recorded(
+    kind: str,
+    request: Any,
+    operation: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], Any] = _identity,
+    decode: Callable[[Any], Any] = _identity
+) -> Any:
+    """Run a call through the active cassette, or directly if none is active"""
+    cassette = _active_cassette.get()
+    if cassette is None:
+        return await operation()
+    return await cassette.call(kind, request, operation, encode, decode)
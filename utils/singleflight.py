@@ -0,0 +1,128 @@
+import asyncio
+import concurrent.futures
+import threading
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class _Flight:
+    def __init__(self, key: Hashable):
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.keys: List[Hashable] = [key]
+
+# Flight led by the current asyncio task, so the work it runs can answer for more keys
+_leading: ContextVar[Optional[Tuple["SingleFlight", _Flight]]] = ContextVar("leading_flight", default=None)
+
+class SingleFlight:
+    """
+    Runs one call per key at a time; callers arriving while it runs share its result
+
+    The first caller for a key runs the operation and later callers wait for
+    its result or exception instead of running it again. Results are handed
+    over through a concurrent.futures.Future, so callers on other event loops
+    (each Streamlit action runs its own) join as well. If the leading caller
+    is cancelled, a waiting caller runs the operation itself.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+        self.calls = 0
+        self.executed = 0
+        self.deduplicated = 0
+
+    async def run(self, key: Hashable, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run the operation for a key, or join the run already in flight
+
+        Args:
+            key: Callers with equal keys share one run
+            operation: Zero-argument callable returning the awaitable to run
+        """
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = _Flight(key)
+                    self._flights[key] = flight
+                    self.executed += 1
+                    leader = True
+                else:
+                    leader = False
+            if leader:
+                return await self._lead(flight, operation)
+
+            try:
+                # Shielded so a caller giving up does not cancel the run for the others
+                result = await asyncio.shield(asyncio.wrap_future(flight.future))
+            except asyncio.CancelledError:
+                if not flight.future.cancelled():
+                    raise
+                logger.info(f"[Single Flight] {self.name} run for {key} was cancelled, running it again")
+                continue
+            except Exception:
+                self._count_joined()
+                raise
+            self._count_joined()
+            return result
+
+    def _count_joined(self) -> None:
+        with self._lock:
+            self.deduplicated += 1
+
+    async def _lead(self, flight: _Flight, operation: Callable[[], Awaitable[T]]) -> T:
+        token = _leading.set((self, flight))
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            flight.future.cancel()
+            raise
+        except Exception as e:
+            flight.future.set_exception(e)
+            raise
+        finally:
+            _leading.reset(token)
+            with self._lock:
+                for key in flight.keys:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+        flight.future.set_result(result)
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "executed": self.executed,
+                "deduplicated": self.deduplicated,
+                "dedup_rate": self.deduplicated / self.calls if self.calls else 0.0,
+                "in_flight": len({id(flight) for flight in self._flights.values()}),
+            }
+
+def share_current_flight(key: Hashable) -> None:
+    """
+    Let callers for `key` join the run the current task is leading, if any
+
+    For operations that change their own input partway through, such as an
+    analysis saving the incident it enriched: callers keyed on the new state
+    still join the run instead of starting another.
+    """
+    leading = _leading.get()
+    if leading is None:
+        return
+    flights, flight = leading
+    with flights._lock:
+        if key not in flights._flights:
+            flights._flights[key] = flight
+            flight.keys.append(key)